@@ -2,12 +2,20 @@
 Agents模块 (Agents Module)
 
 提供多智能体系统中的Agent创建和管理功能
+
+子模块按需导入：import agents 不会立即加载 autogen
 """
 
-from .agent_factory import create_agents, create_assistant, create_user_proxy
+from utils.lazy_import import lazy_module_getattr
+
+# 公开名称 -> 所在子模块（第一次访问时才导入，避免导入包时加载 autogen）
+_LAZY_ATTRS = {
+    'create_agents': '.agent_factory',
+    'create_assistant': '.agent_factory',
+    'create_user_proxy': '.agent_factory',
+    'enable_streaming': '.streaming',
+}
+
+__all__ = list(_LAZY_ATTRS)
 
-__all__ = [
-    'create_agents',
-    'create_assistant',
-    'create_user_proxy'
-]
+__getattr__, __dir__ = lazy_module_getattr(__name__, _LAZY_ATTRS)
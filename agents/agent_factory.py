@@ -6,10 +6,44 @@ Agent工厂模块 (Agent Factory Module)
 Agent类型：
 1. AssistantAgent: AI助手，负责代码生成、问题回答等
 2. UserProxyAgent: 用户代理，负责代码执行和工具调用
+
+遥测（见 utils/telemetry.py）：LLM 调用记录为 llm_turn span 并统计 token 用量，
+代码执行记录为 code_execution span；遥测关闭时只多一层函数调用。
+
+流式输出（LLM_STREAM，见 agents/streaming.py）：Assistant 的回复边生成边打印，
+开启 LLM_SPECULATIVE 时 UserProxy 在消息结束前就开始执行已经完整的代码块和工具调用。
 """
 
+import functools
 from autogen import AssistantAgent, UserProxyAgent
-from config import get_llm_config
+from config import get_llm_config, LLM_STREAM, LLM_SPECULATIVE
+from utils.telemetry import SIZE_BUCKETS, get_logger, traced, count, observe
+
+logger = get_logger("Agent")
+
+
+def _instrument_llm_client(agent):
+    """
+    记录 Agent 每次 LLM 调用的耗时（llm_turn span）和 token 用量（llm_tokens_total / llm_turn_tokens）
+
+    替换的是 agent.client.create，同步和异步对话（a_generate_oai_reply 在线程中调用同步接口）都会经过这里。
+    """
+    client = agent.client
+    if client is None:
+        return
+    create = traced("llm_turn", counter="llm_calls_total", agent=agent.name)(client.create)
+
+    @functools.wraps(client.create)
+    def create_with_usage(*args, **kwargs):
+        response = create(*args, **kwargs)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            count("llm_tokens_total", usage.prompt_tokens, agent=agent.name, type="prompt")
+            count("llm_tokens_total", usage.completion_tokens, agent=agent.name, type="completion")
+            observe("llm_turn_tokens", usage.total_tokens, buckets=SIZE_BUCKETS, agent=agent.name)
+        return response
+
+    client.create = create_with_usage
 
 
 def create_assistant(llm_config: dict = None) -> AssistantAgent:
@@ -33,6 +67,8 @@ def create_assistant(llm_config: dict = None) -> AssistantAgent:
 1. 编写和执行 Python 代码来完成计算任务
 2. 使用 matplotlib 创建数据可视化图表
 3. 调用 query_knowledge_base 工��来检索知识库中的信息
+4. 问题包含多个方面时，调用 query_knowledge_base_multi 工具一次性查询所有子问题
+5. 询问单个属性（如年龄、生日、鞋码、电脑配置）时，优先调用 lookup_field 工具直接查询字段
 
 当用户询问关于特定人物（如 QSH）的信息时，你必须先调用 query_knowledge_base 工具获取相关信息，然后基于检索结果回答。
 
@@ -40,7 +76,8 @@ def create_assistant(llm_config: dict = None) -> AssistantAgent:
         llm_config=llm_config,
     )
 
-    print("[Agent] Assistant Agent 创建完成")
+    _instrument_llm_client(assistant)
+    logger.info("Assistant Agent 创建完成")
     return assistant
 
 
@@ -65,7 +102,11 @@ def create_user_proxy(work_dir: str = "workspace") -> UserProxyAgent:
         },
     )
 
-    print(f"[Agent] UserProxy Agent 创建完成 (工作目录: {work_dir})")
+    # 代码执行耗时（code_execution span）和执行次数（code_executions_total）
+    user_proxy.execute_code_blocks = traced("code_execution", counter="code_executions_total")(
+        user_proxy.execute_code_blocks
+    )
+    logger.info(f"UserProxy Agent 创建完成 (工作目录: {work_dir})")
     return user_proxy
 
 
@@ -88,6 +129,11 @@ def create_agents(llm_config: dict = None, work_dir: str = "workspace") -> tuple
     assistant = create_assistant(llm_config)
     user_proxy = create_user_proxy(work_dir)
 
+    # 流式输出：增量解析回复，推测执行完整的代码块和工具调用
+    if LLM_STREAM:
+        from .streaming import enable_streaming
+        enable_streaming(assistant, user_proxy if LLM_SPECULATIVE else None)
+
     print("=" * 60)
 
     return assistant, user_proxy
@@ -0,0 +1,389 @@
+"""
+流式输出与推测执行模块 (Streaming & Speculative Execution Module)
+
+enable_streaming() 让 Assistant 以流式方式接收回复并实时打印（首字节时间大幅缩短）。
+流式接收本身并不能让 UserProxy 更早开始工作：它要等整条消息接收完毕后才会执行其中的代码块
+或工具调用。因此本模块在数据块到达时增量解析：
+1. 代码块：使用与 autogen 相同的正则（CODE_BLOCK_PATTERN），结束标记 ``` 到达时即得到完整的代码块
+2. 工具调用：按 index 累积函数名和参数，参数拼成完整的 JSON 对象时即得到完整的调用
+
+解析出的代码块 / 工具调用立即在后台推测执行；消息接收完毕后 UserProxy 执行同一个代码块
+（语言和代码完全相同）或同一个工具调用（函数名和参数完全相同）时直接使用推测执行的结果，
+未被使用的结果在下一次 LLM 调用开始时丢弃。
+
+注意：推测执行在消息结束前就会运行代码。如果 Assistant 在同一条消息中包含代码块和 TERMINATE
+（UserProxy 不会执行这样的代码），代码的副作用仍会发生，因此推测执行需单独开启（见 config.LLM_SPECULATIVE）。
+"""
+
+import re
+import json
+import time
+import asyncio
+import inspect
+import threading
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from autogen.io import IOStream
+from autogen.code_utils import CODE_BLOCK_PATTERN
+from utils.telemetry import get_logger, count, observe
+
+logger = get_logger("Agent")
+
+_CODE_BLOCK_RE = re.compile(CODE_BLOCK_PATTERN, re.DOTALL)
+
+
+class StreamParser:
+    """
+    流式回复的增量解析器
+
+    依次调用 feed_text() / feed_tool_call()，完整的代码块和工具调用通过回调函数通知：
+    on_code_block(lang, code) 和 on_tool_call(name, arguments)。
+    """
+
+    def __init__(self, on_code_block: Callable[[str, str], None] = None,
+                 on_tool_call: Callable[[str, str], None] = None):
+        """
+        Args:
+            on_code_block: 代码块完整时的回调，参数与 autogen extract_code() 返回的 (lang, code) 一致
+            on_tool_call: 工具调用完整时的回调，参数为函数名和参数 JSON 字符串（已确认可以解析为对象）
+        """
+        self.on_code_block = on_code_block
+        self.on_tool_call = on_tool_call
+        self.text = ""
+        self._scan_from = 0
+        # index -> [函数名, 参数字符串, 是否已通知]
+        self._tool_calls: Dict[int, list] = {}
+
+    def feed_text(self, delta: str):
+        """追加一段文本，检查是否有新的完整代码块"""
+        self.text += delta
+        # 只有新文本中包含反引号时才可能出现新的结束标记
+        if "`" not in delta:
+            return
+        for match in _CODE_BLOCK_RE.finditer(self.text, self._scan_from):
+            self._scan_from = match.end()
+            if self.on_code_block is not None:
+                self.on_code_block(match.group(1) or "", match.group(2))
+
+    def feed_tool_call(self, index: int, name: Optional[str], arguments: Optional[str]):
+        """追加一个工具调用的增量（函数名和参数片段），参数成为完整的 JSON 对象时通知"""
+        call = self._tool_calls.setdefault(index, ["", "", False])
+        if name:
+            call[0] += name
+        if arguments:
+            call[1] += arguments
+        if not call[2] and call[0] and call[1].rstrip().endswith("}"):
+            self._emit_tool_call(call)
+
+    def finish(self):
+        """回复结束：通知尚未通知过的工具调用（如没有参数的调用）"""
+        for call in self._tool_calls.values():
+            if not call[2] and call[0]:
+                self._emit_tool_call(call)
+
+    def _emit_tool_call(self, call: list):
+        try:
+            arguments = json.loads(call[1] or "{}")
+        except ValueError:
+            return
+        if not isinstance(arguments, dict):
+            return
+        call[2] = True
+        if self.on_tool_call is not None:
+            self.on_tool_call(call[0], call[1])
+
+
+def _tool_key(name: str, arguments: str) -> Tuple[str, str]:
+    """工具调用的匹配键（函数名 + 参数 JSON 字符串，与消息中的 function_call 完全一致）"""
+    return ("tool", f"{name}:{arguments}")
+
+
+def _code_key(lang: str, code: str) -> Tuple[str, str]:
+    """代码块的匹配键（语言 + 代码，与 extract_code() 的结果完全一致）"""
+    return ("code", json.dumps([lang, code], ensure_ascii=False))
+
+
+class SpeculativeExecutor:
+    """
+    推测执行流式回复中已经完整的代码块和工具调用，并把结果交给 UserProxy
+
+    install() 替换 UserProxy 的 execute_code_blocks / execute_function / a_execute_function：
+    有对应的推测执行结果时直接使用（必要时等待其完成），否则照常执行。
+    工具函数在执行时才从 function_map 中查找，install() 之后注册的工具同样适用。
+    """
+
+    def __init__(self, user_proxy, max_tool_workers: int = 4):
+        """
+        Args:
+            user_proxy: 执行代码和工具的 UserProxyAgent
+            max_tool_workers: 并行推测执行同步工具调用的线程数
+        """
+        self.user_proxy = user_proxy
+        # 代码块按出现顺序串行执行（与 execute_code_blocks 一致），前一个代码块失败后不再执行后面的
+        self._code_executor = ThreadPoolExecutor(1, thread_name_prefix="speculative-code")
+        self._tool_executor = ThreadPoolExecutor(max_tool_workers, thread_name_prefix="speculative-tool")
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._code_failed = False
+        self._lock = threading.Lock()
+        # 异步工具在主事件循环中推测执行（与 UserProxy 执行异步工具时使用同一个事件循环）
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._execute_code_blocks = None
+        self._execute_function = None
+        self._a_execute_function = None
+
+    def install(self):
+        """替换 UserProxy 的代码和工具执行函数（重复调用无副作用）"""
+        if self._execute_code_blocks is not None:
+            return
+        proxy = self.user_proxy
+        self._execute_code_blocks = proxy.execute_code_blocks
+        self._execute_function = proxy.execute_function
+        self._a_execute_function = proxy.a_execute_function
+        proxy.execute_code_blocks = self._execute_code_blocks_speculative
+        proxy.execute_function = self._execute_function_speculative
+        proxy.a_execute_function = self._a_execute_function_speculative
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+
+    def new_turn(self):
+        """新的 LLM 调用开始：丢弃上一条消息中未被使用的推测执行结果"""
+        with self._lock:
+            stale, self._futures = self._futures, {}
+            self._code_failed = False
+        for key, future in stale.items():
+            future.cancel()
+            count("speculative_total", kind=key[0], result="wasted")
+
+    # ------------------------------------------------------------------
+    # 推测执行
+    # ------------------------------------------------------------------
+
+    def start_code_block(self, lang: str, code: str):
+        """代码块完整时调用：在后台开始执行"""
+        key = _code_key(lang, code)
+        with self._lock:
+            if key in self._futures:
+                return
+            self._futures[key] = self._code_executor.submit(self._run_code_block, lang, code)
+        logger.debug("推测执行代码块", lang=lang or "auto", lines=code.count("\n") + 1)
+
+    def _run_code_block(self, lang: str, code: str) -> Tuple[int, str]:
+        if self._code_failed:
+            raise RuntimeError("前一个代码块执行失败，不再推测执行")
+        exitcode, logs = self._execute_code_blocks([(lang, code)])
+        if exitcode != 0:
+            self._code_failed = True
+        return exitcode, logs
+
+    def start_tool_call(self, name: str, arguments: str):
+        """工具调用完整时调用：在后台开始执行（异步工具需要已知的主事件循环，否则不推测执行）"""
+        func = self.user_proxy.function_map.get(name)
+        if func is None:
+            return
+        func_call = {"name": name, "arguments": arguments}
+        key = _tool_key(name, arguments)
+        with self._lock:
+            if key in self._futures:
+                return
+            if not inspect.iscoroutinefunction(func):
+                future = self._tool_executor.submit(self._execute_function, func_call)
+            elif self._loop is not None and self._loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(self._a_execute_function(func_call), self._loop)
+            else:
+                return
+            self._futures[key] = future
+        logger.debug("推测执行工具调用", tool=name)
+
+    def _take(self, key: Tuple[str, str]) -> Optional[Future]:
+        """取出（并移除）推测执行的结果，没有时记录未命中"""
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is not None and future.cancelled():
+            future = None
+        count("speculative_total", kind=key[0], result="miss" if future is None else "hit")
+        return future
+
+    # ------------------------------------------------------------------
+    # UserProxy 侧：使用推测执行的结果
+    # ------------------------------------------------------------------
+
+    def _execute_code_blocks_speculative(self, code_blocks: List[Tuple[str, str]]) -> Tuple[int, str]:
+        """与 ConversableAgent.execute_code_blocks 的返回值一致：逐个代码块执行，遇到失败即停止"""
+        logs_all = ""
+        exitcode = 0
+        for lang, code in code_blocks:
+            future = self._take(_code_key(lang, code))
+            if future is not None:
+                exitcode, logs = future.result()
+            else:
+                exitcode, logs = self._execute_code_blocks([(lang, code)])
+            logs_all += logs
+            if exitcode != 0:
+                break
+        return exitcode, logs_all
+
+    def _execute_function_speculative(self, func_call, verbose: bool = False):
+        future = self._take(_tool_key(func_call.get("name", ""), func_call.get("arguments", "{}")))
+        if future is not None:
+            return future.result()
+        return self._execute_function(func_call, verbose=verbose)
+
+    async def _a_execute_function_speculative(self, func_call):
+        self._loop = asyncio.get_running_loop()
+        future = self._take(_tool_key(func_call.get("name", ""), func_call.get("arguments", "{}")))
+        if future is not None:
+            return await asyncio.wrap_future(future)
+        return await self._a_execute_function(func_call)
+
+
+class StreamObserver:
+    """
+    消费一次流式 LLM 调用的数据块：实时打印文本增量、记录首字节时间、交给解析器增量解析，
+    最后拼接成与非流式调用相同的 ChatCompletion
+    """
+
+    def __init__(self, agent_name: str, on_token: Callable[[str], None] = None,
+                 speculative: SpeculativeExecutor = None, echo: bool = True):
+        """
+        Args:
+            agent_name: 发起调用的 Agent 名称（用于指标标签）
+            on_token: 每个文本增量的回调
+            speculative: 推测执行器，为 None 时只解析不执行
+            echo: 是否把文本增量打印到 autogen 的输出流
+        """
+        self.agent_name = agent_name
+        self.on_token = on_token
+        self.speculative = speculative
+        self.echo = echo
+        self.parser = StreamParser(
+            on_code_block=speculative.start_code_block if speculative is not None else None,
+            on_tool_call=speculative.start_tool_call if speculative is not None else None,
+        )
+        self._start = time.perf_counter()
+        self._first_token = False
+        # index -> {"id", "type", "function": {"name", "arguments"}}
+        self._tool_calls: Dict[int, dict] = {}
+
+    def collect(self, chunks):
+        """
+        消费全部数据块，返回拼接后的 ChatCompletion（只解析第一个候选回复）
+
+        Args:
+            chunks: chat.completions.create(stream=True) 返回的数据块迭代器
+
+        Returns:
+            ChatCompletion: 与非流式调用格式相同的响应（usage 来自 include_usage 数据块）
+        """
+        from openai.types.chat import ChatCompletion
+
+        if self.speculative is not None:
+            self.speculative.new_turn()
+        iostream = IOStream.get_default() if self.echo else None
+        meta, usage, finish_reason = {}, None, None
+        try:
+            for chunk in chunks:
+                meta = {"id": chunk.id, "created": chunk.created, "model": chunk.model}
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage.model_dump()
+                for choice in chunk.choices or []:
+                    if choice.index != 0:
+                        continue
+                    finish_reason = choice.finish_reason or finish_reason
+                    self._feed(choice.delta, iostream)
+        finally:
+            self.parser.finish()
+            if iostream is not None and self.parser.text:
+                iostream.print("", flush=True)
+
+        tool_calls = [self._tool_calls[index] for index in sorted(self._tool_calls)]
+        message = {"role": "assistant", "content": self.parser.text or None}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+        return ChatCompletion.model_validate(dict(
+            meta,
+            object="chat.completion",
+            choices=[{"index": 0, "finish_reason": finish_reason or ("tool_calls" if tool_calls else "stop"),
+                      "message": message}],
+            usage=usage,
+        ))
+
+    def _feed(self, delta, iostream):
+        if delta is None:
+            return
+        if not self._first_token and (delta.content or delta.tool_calls):
+            self._first_token = True
+            first_token_seconds = time.perf_counter() - self._start
+            observe("llm_first_token_seconds", first_token_seconds, agent=self.agent_name)
+            logger.debug("收到首个数据块", agent=self.agent_name, seconds=round(first_token_seconds, 3))
+        if delta.content:
+            if iostream is not None:
+                iostream.print(delta.content, end="", flush=True)
+            if self.on_token is not None:
+                self.on_token(delta.content)
+            self.parser.feed_text(delta.content)
+        for tool_call in delta.tool_calls or []:
+            call = self._tool_calls.setdefault(
+                tool_call.index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+            if tool_call.id:
+                call["id"] = tool_call.id
+            function = tool_call.function
+            name = function.name if function else None
+            arguments = function.arguments if function else None
+            call["function"]["name"] += name or ""
+            call["function"]["arguments"] += arguments or ""
+            self.parser.feed_tool_call(tool_call.index, name, arguments)
+
+
+def enable_streaming(assistant, user_proxy=None, on_token: Callable[[str], None] = None,
+                     echo: bool = True) -> Optional[SpeculativeExecutor]:
+    """
+    让 Assistant 的 LLM 调用以流式方式接收回复，并接入增量解析
+
+    替换 Assistant 的每个 OpenAI 客户端的 chat.completions.create：autogen 仍按非流式调用，
+    实际以 stream=True 请求，数据块到达时实时打印和解析，结束后拼接成完整的 ChatCompletion 交给 autogen。
+    （不使用 llm_config 中的 stream=True：autogen 0.2 的流式分支用 tiktoken 估算 token 数，
+    对 deepseek-chat 等非 OpenAI 模型会抛出 NotImplementedError，且拿不到真实的 usage。）
+
+    Args:
+        assistant: AssistantAgent
+        user_proxy: 执行代码和工具的 UserProxyAgent；给出时推测执行完整的代码块和工具调用
+        on_token: 每个文本增量的回调（如转发到其他界面）
+        echo: 是否把文本增量打印到控制台（autogen 的输出流）
+
+    Returns:
+        SpeculativeExecutor: 推测执行器（user_proxy 为 None 时返回 None）
+    """
+    speculative = None
+    if user_proxy is not None:
+        speculative = SpeculativeExecutor(user_proxy)
+        speculative.install()
+
+    client = assistant.client
+    for model_client in (client._clients if client is not None else []):
+        oai_client = getattr(model_client, "_oai_client", None)
+        if oai_client is None:
+            logger.warning(f"{type(model_client).__name__} 不支持流式输出，已跳过")
+            continue
+        completions = oai_client.chat.completions
+        completions.create = _streamed_create(completions.create, assistant.name, on_token, speculative, echo)
+
+    logger.info("已启用流式输出" + ("（推测执行代码块和工具调用）" if speculative is not None else ""))
+    return speculative
+
+
+def _streamed_create(create: Callable, agent_name: str, on_token, speculative, echo: bool) -> Callable:
+    """包装 chat.completions.create：非流式请求改为流式接收，返回拼接后的完整响应"""
+
+    @functools.wraps(create)
+    def streamed_create(*args, **kwargs):
+        # 调用方自己请求流式输出，或需要多个候选回复时照常调用
+        if kwargs.get("stream") or kwargs.get("n", 1) != 1:
+            return create(*args, **kwargs)
+        observer = StreamObserver(agent_name, on_token, speculative, echo)
+        kwargs = dict(kwargs, stream=True, stream_options={"include_usage": True})
+        return observer.collect(create(*args, **kwargs))
+
+    return streamed_create
@@ -0,0 +1,182 @@
+"""
+批量问答检查 (Batch Q&A Check)
+
+在本地 LLM 桩服务（mock_llm_server.py）上端到端运行批量问答（tasks/batch_qa.py）：
+桩服务第一轮返回 query_knowledge_base 工具调用，拿到工具结果后给出答案；每第 N 个请求返回 429。
+知识库查询工具换成不依赖 RAG 模型的桩函数（原样返回问题），检查：
+
+1. 正确性：每个问题都成功回答，答案对应自己的问题（并发对话之间没有串话）
+2. 重试：注入的 429 全部被重试，重试次数等于桩服务注入的错误数
+3. 限流：LLM 请求速率不超过令牌桶的速率 + 突发
+4. 吞吐：并发回答的吞吐量高于逐个回答
+5. 断点续跑：中途取消后再次运行，只回答剩余的问题，每个问题恰好有一条成功结果
+
+任一检查失败时以非零状态码退出。
+
+用法：
+    python benchmarks/check_batch_qa.py [--questions 60] [--concurrency 16] [--rate 15] [--burst 8]
+"""
+
+import os
+import re
+import sys
+import json
+import asyncio
+import logging
+import functools
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import start_mock_server
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    """记录一项检查结果"""
+    print(f"[检查] {'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def respond(request: dict) -> dict:
+    """桩服务回复：用户问题 -> 工具调用；工具结果 -> 基于结果的答案"""
+    last = (request.get("messages") or [{}])[-1]
+    content = str(last.get("content") or "")
+    if last.get("role") == "tool":
+        return {"content": f"根据知识库：{content}\n\nTERMINATE"}
+    match = re.search(r"问题 \d+：[^\n]*", content)
+    if match:
+        arguments = json.dumps({"question": match.group(0)}, ensure_ascii=False)
+        return {"content": "", "tool_calls": [{"name": "query_knowledge_base", "arguments": arguments}]}
+    return None
+
+
+def register_stub_tool(assistant, user_proxy):
+    """注册不依赖 RAG 模型的知识库查询桩函数"""
+
+    async def query_knowledge_base(question: str) -> str:
+        await asyncio.sleep(0.01)
+        return f"检索结果<{question}>"
+
+    assistant.register_for_llm(name="query_knowledge_base", description="查询知识库")(query_knowledge_base)
+    user_proxy.register_for_execution(name="query_knowledge_base")(query_knowledge_base)
+
+
+def create_agent_pair(work_dir: str) -> tuple:
+    """与默认 agent_factory 相同，但关闭 autogen 的 cache_seed 磁盘缓存（每次都要真正请求桩服务）"""
+    from config import get_llm_config
+    from agents import create_assistant, create_user_proxy
+
+    llm_config = dict(get_llm_config(), cache_seed=None)
+    llm_config["config_list"] = [{**entry, "max_retries": 0} for entry in llm_config["config_list"]]
+    return create_assistant(llm_config), create_user_proxy(work_dir)
+
+
+def write_questions(path: str, n: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"id": f"q{i}", "question": f"问题 {i}：QSH 的第 {i} 项信息是什么？"},
+                               ensure_ascii=False) + "\n")
+
+
+def read_records(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="端到端检查批量问答的并发、限流、重试和断点续跑")
+    parser.add_argument("--questions", type=int, default=60, help="问题数，默认 60")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发对话数，默认 16")
+    parser.add_argument("--rate", type=float, default=15, help="LLM 请求速率上限（次/秒），默认 15")
+    parser.add_argument("--burst", type=float, default=8, help="突发请求数，默认 8")
+    parser.add_argument("--latency", type=float, default=0.2, help="桩服务每个请求的延迟（秒），默认 0.2")
+    parser.add_argument("--fail-every", type=int, default=7, help="每第 N 个请求返回 429，默认 7")
+    args = parser.parse_args()
+
+    server = start_mock_server(latency=args.latency, respond=respond, fail_every=args.fail_every)
+    # config 在导入时读取环境变量
+    os.environ.update({"DEEPSEEK_BASE_URL": server.base_url, "LLM_CACHE_MODE": "off"})
+    from tasks import run_batch_qa
+
+    # 桩服务的模型没有价格信息，autogen 每次请求都会警告
+    logging.getLogger("autogen.oai.client").setLevel(logging.ERROR)
+
+    options = dict(setup=register_stub_tool, rate_limit=args.rate, burst=args.burst,
+                   base_delay=0.05, max_delay=0.5, report_interval=1.0)
+
+    with tempfile.TemporaryDirectory(prefix="batch-qa-check-") as tmp:
+        options["agent_factory"] = functools.partial(create_agent_pair, tmp)
+        questions = os.path.join(tmp, "questions.jsonl")
+        write_questions(questions, args.questions)
+
+        # 1~3. 并发回答全部问题
+        output = os.path.join(tmp, "answers.jsonl")
+        stats = asyncio.run(run_batch_qa(questions, output, concurrency=args.concurrency, work_dir=tmp, **options))
+        records = read_records(output)
+        matched = [r for r in records if r["status"] == "ok" and f"<问题 {r['id'][1:]}：" in r["answer"]]
+        check(len(records) == args.questions and len(matched) == args.questions,
+              f"{args.questions} 个问题全部成功，答案对应自己的问题（{len(matched)} 个）")
+        check(server.failures > 0 and stats["retries"] == server.failures,
+              f"重试: 注入 {server.failures} 个 429，重试 {stats['retries']} 次")
+        rate = server.requests / stats["seconds"]
+        check(server.requests <= args.rate * stats["seconds"] + args.burst + 1,
+              f"限流: {server.requests} 个请求 / {stats['seconds']:.2f}s = {rate:.1f} 次/秒"
+              f"（上限 {args.rate:g} 次/秒，突发 {args.burst:g}）")
+
+        # 4. 与逐个回答对比吞吐量（取前 10 个问题，不限流）
+        subset = os.path.join(tmp, "subset.jsonl")
+        write_questions(subset, 10)
+        fast = dict(options, rate_limit=0, report_interval=0)
+        sequential = asyncio.run(run_batch_qa(subset, os.path.join(tmp, "seq.jsonl"), concurrency=1,
+                                              work_dir=tmp, **fast))
+        concurrent = asyncio.run(run_batch_qa(subset, os.path.join(tmp, "con.jsonl"), concurrency=10,
+                                              work_dir=tmp, **fast))
+        check(concurrent["throughput"] > sequential["throughput"] * 3,
+              f"吞吐: 并发 {concurrent['throughput']:.2f} 问/秒，逐个 {sequential['throughput']:.2f} 问/秒"
+              f"（p50 {concurrent['p50']:.2f}s / {sequential['p50']:.2f}s）")
+
+        # 5. 断点续跑：回答到一部分时取消，写入半行模拟崩溃，再次运行
+        resume_output = os.path.join(tmp, "resume.jsonl")
+
+        async def interrupted():
+            task = asyncio.create_task(run_batch_qa(questions, resume_output, concurrency=args.concurrency,
+                                                    work_dir=tmp, **options))
+            while not os.path.exists(resume_output) or len(read_records(resume_output)) < args.questions // 3:
+                await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        asyncio.run(interrupted())
+        first = read_records(resume_output)
+        with open(resume_output, "a", encoding="utf-8") as f:
+            f.write('{"id": "q')
+        before = server.requests
+        resumed = asyncio.run(run_batch_qa(questions, resume_output, concurrency=args.concurrency,
+                                           work_dir=tmp, **options))
+        with open(resume_output, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        final = [json.loads(line) for line in lines[:len(first)] + lines[len(first) + 1:]]
+        check(lines[len(first)].strip() == '{"id": "q', "续跑从新的一行开始追加（写了一半的行保持原样）")
+        ok_ids = [r["id"] for r in final if r["status"] == "ok"]
+        check(resumed["skipped"] == len(first) and resumed["done"] == args.questions - len(first)
+              and sorted(ok_ids) == sorted(f"q{i}" for i in range(args.questions)),
+              f"断点续跑: 第一次完成 {len(first)} 个，续跑跳过 {resumed['skipped']} 个、回答 {resumed['done']} 个，"
+              f"每个问题恰好一条成功结果（续跑发出 {server.requests - before} 个请求）")
+
+    server.shutdown()
+    if _failures:
+        print(f"[检查] {len(_failures)} 项检查失败")
+        return 1
+    print("[检查] 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+共享 HTTP 连接池检查 (Shared HTTP Connection Pool Check)
+
+启动本地 LLM 桩服务（mock_llm_server.py，HTTP/1.1 keep-alive），统计桩服务接受的 TCP 连接数：
+1. 共享连接池：多个 Agent 使用同一个 httpx 客户端，顺序请求只建立一个连接
+2. 对比：不使用共享客户端时，每个 Agent 各自建立连接
+3. 连接数上限：并发请求数超过 LLM_HTTP_MAX_CONNECTIONS 时，同时打开的连接数不超过上限
+4. 分阶段超时：read 超时生效（llm_config 中的整体 timeout 不会覆盖它）
+
+任一检查失败时以非零状态码退出。
+
+用法：
+    python benchmarks/check_http_pool.py [--agents 3] [--calls 5] [--concurrency 16] [--max-connections 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import start_mock_server
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    """记录一项检查结果"""
+    print(f"[检查] {'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def run_agents(llm_config: dict, agents: int, calls: int) -> float:
+    """创建多个 AssistantAgent，每个依次发送 calls 个不同的请求，返回总耗时（秒）"""
+    from autogen import AssistantAgent
+
+    start = time.perf_counter()
+    for a in range(agents):
+        agent = AssistantAgent(f"Assistant{a}", llm_config=llm_config)
+        for c in range(calls):
+            agent.generate_reply(messages=[{"role": "user", "content": f"问题 {a}-{c}"}])
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="检查所有 Agent 共用的 HTTP 连接池")
+    parser.add_argument("--agents", type=int, default=3, help="Agent 数量，默认 3")
+    parser.add_argument("--calls", type=int, default=5, help="每个 Agent 的请求数，默认 5")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发请求数，默认 16")
+    parser.add_argument("--max-connections", type=int, default=4, help="连接池上限，默认 4")
+    args = parser.parse_args()
+
+    server = start_mock_server(latency=0.05)
+    # config 在导入时读取环境变量
+    os.environ.update({
+        "DEEPSEEK_BASE_URL": server.base_url,
+        "LLM_CACHE_MODE": "off",
+        "LLM_HTTP_MAX_CONNECTIONS": str(args.max_connections),
+    })
+    from config import get_llm_config, get_http_client, llm_config as plain_config
+    from utils.http_client import create_http_client
+
+    # 1. 共享连接池
+    # 关闭 autogen 的 cache_seed 磁盘缓存，每次都要真正请求桩服务
+    pooled = dict(get_llm_config(), cache_seed=None)
+    from autogen import AssistantAgent
+    clients = {id(AssistantAgent(f"A{i}", llm_config=pooled).client._clients[0]._oai_client._client) for i in range(2)}
+    check(clients == {id(get_http_client())}, "所有 Agent 的 OpenAI 客户端使用同一个 httpx 客户端")
+
+    elapsed = run_agents(pooled, args.agents, args.calls)
+    shared_connections = server.connections
+    check(shared_connections == 1,
+          f"共享连接池: {args.agents} 个 Agent、{server.requests} 个请求只建立 {shared_connections} 个连接"
+          f"（{elapsed * 1000:.0f} ms）")
+
+    # 2. 对比：每个 Agent 使用 OpenAI 默认的客户端
+    before = server.connections
+    plain = {**plain_config, "cache_seed": None,
+             "config_list": [{**entry, "base_url": server.base_url} for entry in plain_config["config_list"]]}
+    elapsed = run_agents(plain, args.agents, args.calls)
+    check(server.connections - before >= args.agents,
+          f"不共享时: {args.agents} 个 Agent 建立 {server.connections - before} 个连接（{elapsed * 1000:.0f} ms）")
+
+    # 3. 并发请求时的连接数上限
+    from autogen import OpenAIWrapper
+    before = server.connections
+    wrapper = OpenAIWrapper(**pooled)
+
+    def ask(i):
+        response = wrapper.create(messages=[{"role": "user", "content": f"并发问题 {i}"}])
+        return wrapper.extract_text_or_completion_object(response)[0]
+
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        replies = list(executor.map(ask, range(args.concurrency * 2)))
+    new_connections = server.connections - before
+    check(len(replies) == args.concurrency * 2 and new_connections <= args.max_connections,
+          f"{args.concurrency} 个并发请求最多新建 {new_connections} 个连接（上限 {args.max_connections}）")
+
+    # 4. 分阶段超时：read 超时 0.2s，服务端延迟 1s
+    slow = start_mock_server(latency=1.0)
+    client = create_http_client(read_timeout=0.2)
+    config = {"cache_seed": None, "config_list": [
+        {"model": "deepseek-chat", "api_key": "sk-mock", "base_url": slow.base_url,
+         "http_client": client, "max_retries": 0}]}
+    start = time.perf_counter()
+    try:
+        OpenAIWrapper(**config).create(messages=[{"role": "user", "content": "慢请求"}])
+        check(False, "read 超时生效")
+    except TimeoutError:
+        check(time.perf_counter() - start < 0.9, f"read 超时生效（{(time.perf_counter() - start) * 1000:.0f} ms 后超时）")
+    client.close()
+    slow.shutdown()
+
+    server.shutdown()
+    if _failures:
+        print(f"[检查] {len(_failures)} 项检查失败")
+        return 1
+    print("[检查] 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+启动导入耗时检查 (Import-Time Budget Check)
+
+在全新的 Python 子进程中导入项目的各个包，检查：
+1. 导入总耗时不超过预算（默认 300 毫秒）
+2. 导入后没有加载 autogen / chromadb / sentence-transformers / torch 等重量级依赖
+
+任一条件不满足时以非零状态码退出，可在 CI 中用于发现启动速度的回退。
+
+用法：
+    python benchmarks/check_import_time.py [--budget-ms 300] [--repeat 3]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# 项目根目录
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 需要检查的导入语句
+IMPORT_STATEMENT = "import config, utils, rag, agents, tools, tasks, main"
+
+# 导入项目包时不应被加载的重量级依赖
+HEAVY_MODULES = ("autogen", "chromadb", "sentence_transformers", "torch", "onnxruntime")
+
+_PROBE = f"""
+import sys, time, json
+start = time.perf_counter()
+{IMPORT_STATEMENT}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"elapsed_ms": elapsed * 1000, "heavy_modules": heavy}}))
+"""
+
+
+def measure_import_time() -> dict:
+    """
+    在新的子进程中测量一次导入耗时
+
+    Returns:
+        dict: {"elapsed_ms": 导入耗时（毫秒）, "heavy_modules": 被加载的重量级依赖列表}
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="检查项目包的导入耗时是否超出预算")
+    parser.add_argument("--budget-ms", type=float, default=300.0, help="导入耗时预算（毫秒），默认 300")
+    parser.add_argument("--repeat", type=int, default=3, help="重复测量次数（取最小值），默认 3")
+    args = parser.parse_args()
+
+    runs = [measure_import_time() for _ in range(args.repeat)]
+    best_ms = min(run["elapsed_ms"] for run in runs)
+    heavy = sorted({m for run in runs for m in run["heavy_modules"]})
+
+    print(f"[导入耗时] {IMPORT_STATEMENT}")
+    print(f"[导入耗时] 最小耗时 {best_ms:.1f} ms（预算 {args.budget_ms:.0f} ms，共 {args.repeat} 次）")
+
+    failed = False
+    if best_ms > args.budget_ms:
+        print(f"[错误] 导入耗时超出预算 {best_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if heavy:
+        print(f"[错误] 导入时加载了重量级依赖: {', '.join(heavy)}")
+        failed = True
+    if not failed:
+        print("[成功] 导入耗时检查通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
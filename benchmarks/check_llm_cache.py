@@ -0,0 +1,133 @@
+"""
+LLM 响应缓存检查 (LLM Response Cache Check)
+
+启动本地 LLM 桩服务（mock_llm_server.py），通过 autogen 的 OpenAIWrapper 和 AssistantAgent
+检查 LLMResponseCache 的行为，统计实际到达桩服务的请求数：
+1. readwrite: 相同请求只访问一次网络；消息、tools 或采样参数不同时不会命中
+2. replay: 已录制的请求不访问网络；未录制的请求抛出 LLMCacheMissError
+3. record: 总是访问网络并覆盖缓存
+4. ttl / max_bytes: 过期记录不再命中，超过大小上限时淘汰最久未访问的记录
+5. AssistantAgent（深拷贝 llm_config）使用同一个缓存实例
+
+同时输出有缓存和无缓存时单次请求的耗时。任一检查失败时以非零状态码退出。
+
+用法：
+    python benchmarks/check_llm_cache.py [--latency 0.2]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import start_mock_server
+from utils.llm_cache import LLMResponseCache, LLMCacheMissError
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    """记录一项检查结果"""
+    print(f"[检查] {'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="检查 LLM 响应缓存的命中、录制/回放和淘汰行为")
+    parser.add_argument("--latency", type=float, default=0.2, help="桩服务每个请求的模拟延迟（秒），默认 0.2")
+    args = parser.parse_args()
+
+    from autogen import AssistantAgent, OpenAIWrapper
+
+    server = start_mock_server(latency=args.latency)
+    config_list = [{"model": "deepseek-chat", "api_key": "sk-mock", "base_url": server.base_url,
+                    "price": [0, 0]}]
+    messages = [{"role": "user", "content": "计算斐波那契数列的前 10 项"}]
+    tools = [{"type": "function", "function": {"name": "query_knowledge_base", "description": "检索知识库",
+                                               "parameters": {"type": "object", "properties": {}}}}]
+
+    def create(cache, **params):
+        """用给定缓存发送一次请求，返回 (回复文本, 耗时秒数, 本次请求是否到达桩服务)"""
+        before = server.requests
+        client = OpenAIWrapper(config_list=config_list, cache=cache)
+        start = time.perf_counter()
+        response = client.create(messages=params.pop("messages", messages), **params)
+        elapsed = time.perf_counter() - start
+        return client.extract_text_or_completion_object(response)[0], elapsed, server.requests > before
+
+    with tempfile.TemporaryDirectory(prefix="llm-cache-check-") as tmp:
+        path = os.path.join(tmp, "llm_cache.sqlite")
+
+        # 1. readwrite
+        cache = LLMResponseCache(path, mode="readwrite")
+        first, network_seconds, hit_network = create(cache, temperature=0.7)
+        check(hit_network, "readwrite 首次请求访问网络")
+        second, cached_seconds, hit_network = create(cache, temperature=0.7)
+        check(not hit_network and second == first, "readwrite 相同请求命中缓存，返回相同回复")
+        print(f"[检查] 单次请求耗时: 网络 {network_seconds * 1000:.1f} ms，缓存 {cached_seconds * 1000:.1f} ms")
+        check(create(cache, temperature=0.2)[2], "temperature 不同时不命中")
+        check(create(cache, temperature=0.7, tools=tools)[2], "tools 定义不同时不命中")
+        other = [{"role": "user", "content": "QSH 的生日是哪天？"}]
+        check(create(cache, temperature=0.7, messages=other)[2], "消息不同时不命中")
+
+        # 2. replay
+        recorded = server.requests
+        replay = LLMResponseCache(path, mode="replay", ttl=1e-9)
+        check(not create(replay, temperature=0.7)[2], "replay 已录制的请求不访问网络（忽略 ttl）")
+        try:
+            create(replay, temperature=0.7, messages=[{"role": "user", "content": "未录制的问题"}])
+            check(False, "replay 未录制的请求抛出 LLMCacheMissError")
+        except LLMCacheMissError as e:
+            check(True, f"replay 未录制的请求抛出 LLMCacheMissError（{str(e)[:40]}...）")
+        check(server.requests == recorded, "replay 模式没有访问网络")
+
+        # 3. record
+        record = LLMResponseCache(path, mode="record")
+        check(create(record, temperature=0.7)[2], "record 模式总是访问网络")
+        check(not create(cache, temperature=0.7)[2], "record 写入的响应可被 readwrite 命中")
+
+        # 4. ttl / max_bytes
+        expiring = LLMResponseCache(os.path.join(tmp, "ttl.sqlite"), mode="readwrite", ttl=0.5)
+        create(expiring, temperature=0.7)
+        check(not create(expiring, temperature=0.7)[2], "ttl 内命中")
+        time.sleep(0.6)
+        check(create(expiring, temperature=0.7)[2], "超过 ttl 后不再命中")
+
+        bounded = LLMResponseCache(os.path.join(tmp, "bounded.sqlite"), mode="readwrite", max_bytes=2000)
+        for i in range(30):
+            bounded.set(f'{{"model": "m", "i": {i}}}', "x" * 200)
+        stats = bounded.stats()
+        check(stats["bytes"] <= 2000 and bounded.get('{"model": "m", "i": 29}') is not None,
+              f"超过大小上限时淘汰旧记录（剩余 {stats['entries']} 条，{stats['bytes']} 字节）")
+        check(bounded.get('{"model": "m", "i": 0}') is None, "最久未访问的记录被淘汰")
+
+        # 5. AssistantAgent 深拷贝 llm_config 后仍使用同一个缓存
+        agent_cache = LLMResponseCache(os.path.join(tmp, "agent.sqlite"), mode="readwrite")
+        llm_config = {"config_list": config_list, "temperature": 0.7, "cache": agent_cache}
+        replies = []
+        for _ in range(2):
+            before = server.requests
+            agent = AssistantAgent("Assistant", llm_config=llm_config)
+            replies.append(agent.generate_reply(messages=messages))
+            hit_network = server.requests > before
+        check(not hit_network and replies[0] == replies[1] and agent_cache.stats()["entries"] == 1,
+              "AssistantAgent 的第二次对话命中缓存")
+
+        for c in (cache, replay, record, expiring, bounded, agent_cache):
+            c.close()
+
+    server.shutdown()
+    print(f"[检查] 桩服务共收到 {server.requests} 个请求")
+    if _failures:
+        print(f"[检查] {len(_failures)} 项检查失败")
+        return 1
+    print("[检查] 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
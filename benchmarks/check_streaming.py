@@ -0,0 +1,209 @@
+"""
+流式输出与推测执行检查 (Streaming & Speculative Execution Check)
+
+1. 增量解析：把包含多个代码块的文本按随机长度分块输入 StreamParser，
+   得到的代码块与 autogen extract_code() 对完整文本的结果一致；工具调用参数完整时才通知
+2. 代码块：本地 LLM 桩服务流式返回 "代码块 + 较长的说明文字"，对比开启 / 关闭推测执行时
+   一轮对话的总耗时，并检查代码只执行了一次、执行结果交给了 Assistant
+3. 工具调用：流式返回两个工具调用（同步工具和异步工具），检查每个工具只执行一次、结果正确
+4. 首字节时间：流式输出时第一个文本增量的到达时间，对比非流式时完整回复的到达时间
+5. usage：拼接后的响应带有服务端返回的真实 token 用量（stream_options.include_usage）
+
+任一检查失败时以非零状态码退出。
+
+用法：
+    python benchmarks/check_streaming.py [--chunk-delay 0.02]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import start_mock_server
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    """记录一项检查结果"""
+    print(f"[检查] {'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def check_parser():
+    """增量解析与 extract_code() 的结果一致"""
+    from autogen.code_utils import extract_code
+    from agents.streaming import StreamParser
+
+    text = ("先计算斐波那契数列：\n```python\nfib = [0, 1]\nprint(fib)\n```\n然后画图：\n"
+            "```\necho `date`\n```\n再执行一段 shell：\n``` sh\nls -l\n```\n最后说明 `inline` 代码。")
+    rng = random.Random(0)
+    for trial in range(20):
+        blocks = []
+        parser = StreamParser(on_code_block=lambda lang, code: blocks.append((lang, code)))
+        position = 0
+        while position < len(text):
+            size = rng.randint(1, 12)
+            parser.feed_text(text[position:position + size])
+            position += size
+        if blocks != extract_code(text):
+            check(False, f"增量解析的代码块与 extract_code() 一致（第 {trial} 次分块: {blocks}）")
+            return
+    check(True, f"增量解析的代码块与 extract_code() 一致（{len(extract_code(text))} 个代码块，20 种分块方式）")
+
+    calls = []
+    parser = StreamParser(on_tool_call=lambda name, arguments: calls.append((name, arguments)))
+    parser.feed_tool_call(0, "query_knowledge_base", '{"question": "Q')
+    parser.feed_tool_call(0, None, 'SH {} 的爱好')
+    check(not calls, "参数 JSON 不完整时不通知（即使以 } 结尾）")
+    parser.feed_tool_call(0, None, '"}')
+    parser.feed_tool_call(1, "lookup_field", "")
+    check(calls == [("query_knowledge_base", '{"question": "QSH {} 的爱好"}')], "参数 JSON 完整时立即通知")
+    parser.finish()
+    check(calls[-1] == ("lookup_field", ""), "回复结束时通知没有参数的调用")
+
+
+def make_agents(base_url: str, work_dir: str):
+    """创建连接到桩服务的 Assistant 和 UserProxy"""
+    from autogen import AssistantAgent, UserProxyAgent
+
+    llm_config = {"config_list": [{"model": "deepseek-chat", "api_key": "sk-mock", "base_url": base_url,
+                                   "price": [0, 0]}],
+                  "cache_seed": None}
+    assistant = AssistantAgent("Assistant", llm_config=llm_config)
+    user_proxy = UserProxyAgent("UserProxy", human_input_mode="NEVER", max_consecutive_auto_reply=3,
+                                is_termination_msg=lambda x: (x.get("content") or "").rstrip().endswith("TERMINATE"),
+                                code_execution_config={"work_dir": work_dir, "use_docker": False})
+    return assistant, user_proxy
+
+
+async def run_code_turn(speculative: bool, chunk_delay: float, work_dir: str) -> dict:
+    """流式返回代码块 + 说明文字，返回一轮对话的耗时和代码执行次数"""
+    from agents.streaming import enable_streaming
+
+    code = ("import time\ntime.sleep(0.5)\n"
+            "open('runs.txt', 'a').write('run\\n')\nprint('fibonacci ok')")
+    explanation = "说明：这段代码计算斐波那契数列并保存结果。" * 12
+    server = start_mock_server(chunk_delay=chunk_delay, responses=[
+        {"content": f"计算如下：\n```python\n{code}\n```\n{explanation}"},
+        {"content": "已完成。TERMINATE"},
+    ])
+    assistant, user_proxy = make_agents(server.base_url, work_dir)
+    enable_streaming(assistant, user_proxy if speculative else None)
+
+    start = time.perf_counter()
+    result = await user_proxy.a_initiate_chat(assistant, message="计算斐波那契数列", silent=True)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    with open(os.path.join(work_dir, "runs.txt"), encoding="utf-8") as f:
+        runs = len(f.readlines())
+    os.remove(os.path.join(work_dir, "runs.txt"))
+    executed = any("fibonacci ok" in (m.get("content") or "") for m in result.chat_history)
+    return {"seconds": elapsed, "runs": runs, "executed": executed}
+
+
+async def run_tool_turn(speculative: bool, chunk_delay: float, work_dir: str) -> dict:
+    """流式返回两个工具调用，返回一轮对话的耗时、工具执行次数和工具结果"""
+    from agents.streaming import enable_streaming
+
+    calls = []
+
+    def slow_lookup(key: str, note: str = "") -> str:
+        time.sleep(0.3)
+        calls.append(("slow_lookup", key))
+        return f"lookup:{key}"
+
+    async def a_slow_search(key: str, note: str = "") -> str:
+        await asyncio.sleep(0.3)
+        calls.append(("a_slow_search", key))
+        return f"search:{key}"
+
+    note = "补充说明" * 30
+    server = start_mock_server(chunk_delay=chunk_delay, responses=[
+        {"content": "", "tool_calls": [
+            {"name": "slow_lookup", "arguments": f'{{"key": "生日", "note": "{note}"}}'},
+            {"name": "a_slow_search", "arguments": f'{{"key": "爱好", "note": "{note}"}}'},
+        ]},
+        {"content": "QSH 的生日和爱好已查到。TERMINATE"},
+    ])
+    assistant, user_proxy = make_agents(server.base_url, work_dir)
+    for func in (slow_lookup, a_slow_search):
+        assistant.register_for_llm(name=func.__name__, description=func.__name__)(func)
+        user_proxy.register_for_execution(name=func.__name__)(func)
+    enable_streaming(assistant, user_proxy if speculative else None)
+
+    start = time.perf_counter()
+    result = await user_proxy.a_initiate_chat(assistant, message="QSH 的生日和爱好？", silent=True)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    tool_contents = [r["content"] for m in result.chat_history for r in m.get("tool_responses") or []]
+    usage = assistant.client.total_usage_summary or {}
+    return {"seconds": elapsed, "calls": sorted(calls), "results": sorted(tool_contents),
+            "completion_tokens": sum(v.get("completion_tokens", 0) for v in usage.values() if isinstance(v, dict))}
+
+
+def first_token_seconds(stream: bool, chunk_delay: float, work_dir: str) -> float:
+    """第一个文本增量（流式）或完整回复（非流式）的到达时间"""
+    from agents.streaming import enable_streaming
+
+    server = start_mock_server(chunk_delay=chunk_delay, responses=[{"content": "斐波那契数列" * 40}])
+    assistant, _ = make_agents(server.base_url, work_dir)
+    arrivals = []
+    if stream:
+        enable_streaming(assistant, on_token=lambda delta: arrivals.append(time.perf_counter()))
+    start = time.perf_counter()
+    assistant.generate_reply(messages=[{"role": "user", "content": "你好"}])
+    arrivals.append(time.perf_counter())
+    server.shutdown()
+    return arrivals[0] - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="检查流式输出的增量解析和推测执行")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="桩服务每个数据块的间隔（秒），默认 0.02")
+    args = parser.parse_args()
+
+    check_parser()
+
+    with tempfile.TemporaryDirectory(prefix="stream-check-") as work_dir, \
+            open(os.devnull, "w") as devnull:
+        # autogen 会把流式回复和代码执行过程打印到标准输出
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            baseline = asyncio.run(run_code_turn(False, args.chunk_delay, work_dir))
+            speculative = asyncio.run(run_code_turn(True, args.chunk_delay, work_dir))
+            tool_baseline = asyncio.run(run_tool_turn(False, args.chunk_delay, work_dir))
+            tool_speculative = asyncio.run(run_tool_turn(True, args.chunk_delay, work_dir))
+            ttfb_stream = first_token_seconds(True, args.chunk_delay, work_dir)
+            ttfb_full = first_token_seconds(False, args.chunk_delay, work_dir)
+        finally:
+            sys.stdout = stdout
+
+    check(speculative["runs"] == 1 and speculative["executed"], "推测执行的代码块只执行一次，结果交给了 Assistant")
+    check(speculative["seconds"] < baseline["seconds"],
+          f"代码块: 推测执行 {speculative['seconds']:.2f}s，不推测执行 {baseline['seconds']:.2f}s")
+    expected_calls = [("a_slow_search", "爱好"), ("slow_lookup", "生日")]
+    check(tool_speculative["calls"] == expected_calls and tool_speculative["results"] == tool_baseline["results"],
+          f"推测执行的工具调用各执行一次，结果与不推测执行时相同（{tool_speculative['results']}）")
+    check(tool_speculative["seconds"] < tool_baseline["seconds"],
+          f"工具调用: 推测执行 {tool_speculative['seconds']:.2f}s，不推测执行 {tool_baseline['seconds']:.2f}s")
+    check(tool_speculative["completion_tokens"] > 0, "拼接后的响应带有服务端返回的 token 用量")
+    check(ttfb_stream < ttfb_full,
+          f"首字节时间: 流式 {ttfb_stream * 1000:.0f} ms，非流式 {ttfb_full * 1000:.0f} ms")
+
+    if _failures:
+        print(f"[检查] {len(_failures)} 项检查失败")
+        return 1
+    print("[检查] 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
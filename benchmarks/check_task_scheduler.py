@@ -0,0 +1,190 @@
+"""
+并发任务调度检查 (Task Scheduler Check)
+
+1. 真实 Agent 对：本地 LLM 桩服务（mock_llm_server.py）上运行两个任务，
+   一个执行耗时的代码块（同步阻塞），一个只对话；并发时总耗时接近最慢的任务，而不是两者之和
+2. 依赖：依赖的任务完成后才开始；依赖失败时跳过
+3. 超时：超时的任务记为 timeout，不影响其他任务
+4. 并发上限：同时运行的任务数不超过 max_concurrency
+5. 配置错误：依赖未注册的任务或循环依赖时不运行任何任务
+
+任一检查失败时以非零状态码退出。
+
+用法：
+    python benchmarks/check_task_scheduler.py [--latency 0.3]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_llm_server import start_mock_server
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    """记录一项检查结果"""
+    print(f"[检查] {'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+async def code_task(assistant, user_proxy):
+    """让 Assistant 返回一个耗时 1 秒的代码块（UserProxy 同步执行）"""
+    await user_proxy.a_initiate_chat(assistant, message="CODE", clear_history=True, silent=True)
+
+
+async def chat_task(assistant, user_proxy, rounds: int = 2):
+    """只对话的任务（每轮等待桩服务延迟）"""
+    for i in range(rounds):
+        await user_proxy.a_initiate_chat(assistant, message=f"问题 {i}", clear_history=True, silent=True)
+
+
+def run_agent_tasks(base_url: str, work_dir: str, max_concurrency: int) -> tuple:
+    """在真实的 Agent 对上运行两个任务，返回 (调度器, 结果)"""
+    from autogen import AssistantAgent, UserProxyAgent
+    from tasks import TaskScheduler
+
+    llm_config = {"config_list": [{"model": "deepseek-chat", "api_key": "sk-mock", "base_url": base_url,
+                                   "price": [0, 0]}],
+                  "cache_seed": None}
+
+    def create_agents():
+        assistant = AssistantAgent("Assistant", llm_config=llm_config)
+        user_proxy = UserProxyAgent("UserProxy", human_input_mode="NEVER", max_consecutive_auto_reply=2,
+                                    is_termination_msg=lambda x: (x.get("content") or "").rstrip().endswith("TERMINATE"),
+                                    code_execution_config={"work_dir": work_dir, "use_docker": False})
+        return assistant, user_proxy
+
+    scheduler = TaskScheduler(agent_factory=create_agents, max_concurrency=max_concurrency)
+    scheduler.add_task("code", code_task)
+    scheduler.add_task("chat", chat_task)
+    return scheduler, asyncio.run(scheduler.run())
+
+
+def respond(request: dict) -> dict:
+    """桩服务回复：消息为 CODE 时返回耗时 1 秒的代码块，代码执行结果返回 TERMINATE，其他消息复述"""
+    last = str((request.get("messages") or [{}])[-1].get("content") or "")
+    if last == "CODE":
+        return {"content": "```python\nimport time\ntime.sleep(1.0)\nprint('done')\n```"}
+    if "exitcode" in last:
+        return {"content": "完成。TERMINATE"}
+    return None
+
+
+def check_agent_tasks(latency: float):
+    """两个真实任务：并发执行时总耗时接近最慢的任务"""
+    server = start_mock_server(latency=latency, respond=respond)
+    with tempfile.TemporaryDirectory(prefix="scheduler-check-") as work_dir, \
+            open(os.devnull, "w") as devnull:
+        # autogen 会把对话和代码执行过程打印到标准输出
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            sequential, sequential_results = run_agent_tasks(server.base_url, work_dir, max_concurrency=1)
+            concurrent, concurrent_results = run_agent_tasks(server.base_url, work_dir, max_concurrency=2)
+        finally:
+            sys.stdout = stdout
+    server.shutdown()
+
+    check(all(r.ok for r in sequential_results.values()) and all(r.ok for r in concurrent_results.values()),
+          f"两个任务都成功完成: {list(concurrent_results.values())}")
+    slowest = max(r.seconds for r in concurrent_results.values())
+    total = sum(r.seconds for r in concurrent_results.values())
+    check(concurrent.wall_seconds < total * 0.8 and concurrent.wall_seconds < slowest + 0.3,
+          f"并发: 总耗时 {concurrent.wall_seconds:.2f}s，最慢任务 {slowest:.2f}s，任务耗时之和 {total:.2f}s"
+          f"（依次执行 {sequential.wall_seconds:.2f}s）")
+    print(concurrent.summary())
+
+
+def sleeper(log: list, active: list, seconds: float = 0.2, fail: bool = False):
+    """生成一个只等待的任务函数，记录开始 / 结束时间和同时运行的任务数"""
+
+    async def task(assistant, user_proxy, label: str):
+        log.append((label, "start", time.perf_counter()))
+        active.append(label)
+        log.append((label, "active", len(active)))
+        try:
+            await asyncio.sleep(seconds)
+            if fail:
+                raise RuntimeError(f"{label} 失败")
+        finally:
+            active.remove(label)
+            log.append((label, "end", time.perf_counter()))
+
+    return task
+
+
+def check_scheduling():
+    """依赖、超时、并发上限和配置错误（不需要 LLM，agent_factory 返回空的 Agent 对）"""
+    from tasks import TaskScheduler
+
+    def new_scheduler(max_concurrency: int = 4) -> TaskScheduler:
+        return TaskScheduler(agent_factory=lambda: (None, None), max_concurrency=max_concurrency, default_timeout=5)
+
+    # 依赖
+    log, active = [], []
+    scheduler = new_scheduler()
+    scheduler.add_task("a", sleeper(log, active), label="a")
+    scheduler.add_task("b", sleeper(log, active), depends_on=["a"], label="b")
+    scheduler.add_task("c", sleeper(log, active, fail=True), label="c")
+    scheduler.add_task("d", sleeper(log, active), depends_on=["b", "c"], label="d")
+    results = asyncio.run(scheduler.run())
+    times = {(name, event): value for name, event, value in log}
+    check(times[("b", "start")] >= times[("a", "end")], "依赖的任务完成后才开始")
+    check(results["c"].status == "error" and results["d"].status == "skipped" and ("d", "start") not in times,
+          f"依赖失败时跳过: c={results['c'].status}, d={results['d'].status}（{results['d'].error}）")
+
+    # 超时
+    log, active = [], []
+    scheduler = new_scheduler()
+    scheduler.add_task("slow", sleeper(log, active, seconds=5), timeout=0.2, label="slow")
+    scheduler.add_task("fast", sleeper(log, active), label="fast")
+    results = asyncio.run(scheduler.run())
+    check(results["slow"].status == "timeout" and results["fast"].ok and scheduler.wall_seconds < 1,
+          f"超时: slow={results['slow'].status}（{results['slow'].seconds:.2f}s），fast={results['fast'].status}")
+
+    # 并发上限
+    log, active = [], []
+    scheduler = new_scheduler(max_concurrency=2)
+    for i in range(6):
+        scheduler.add_task(f"t{i}", sleeper(log, active, seconds=0.1), label=f"t{i}")
+    asyncio.run(scheduler.run())
+    peak = max(value for _, event, value in log if event == "active")
+    check(peak == 2, f"并发上限: 6 个任务同时运行的最多 {peak} 个（上限 2）")
+
+    # 配置错误
+    for depends_on, expected in ((["missing"], "未注册"), (["y"], "循环依赖")):
+        scheduler = new_scheduler()
+        scheduler.add_task("x", sleeper([], []), depends_on=depends_on, label="x")
+        if expected == "循环依赖":
+            scheduler.add_task("y", sleeper([], []), depends_on=["x"], label="y")
+        try:
+            asyncio.run(scheduler.run())
+            check(False, f"{expected}时抛出 ValueError")
+        except ValueError as e:
+            check(expected in str(e) and not scheduler.results, f"{expected}时抛出 ValueError: {e}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="检查并发任务调度器")
+    parser.add_argument("--latency", type=float, default=0.3, help="桩服务每个请求的延迟（秒），默认 0.3")
+    args = parser.parse_args()
+
+    check_scheduling()
+    check_agent_tasks(args.latency)
+
+    if _failures:
+        print(f"[检查] {len(_failures)} 项检查失败")
+        return 1
+    print("[检查] 全部通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+本地 LLM 桩服务 (Mock OpenAI-Compatible LLM Server)
+
+一个兼容 OpenAI Chat Completions 接口的本地 HTTP 服务，用于在不访问 DeepSeek 的情况下
+测试 LLM 响应缓存、批量运行等功能：
+- POST .../chat/completions: 返回确定性的回复（复述最后一条消息并以 TERMINATE 结尾），
+  usage 按字符数估算 token 数；也可以预先给出按顺序返回的回复（文本或工具调用），或根据请求决定回复；
+  请求中 stream=true 时以 SSE 数据块逐块返回（每块间隔 chunk_delay 秒）；
+  可以让每第 fail_every 个请求返回错误状态码（默认 429），用于测试重试
+- GET /stats: 返回已处理的请求数、注入的错误数和已接受的 TCP 连接数（HTTP/1.1 keep-alive，连接可复用）
+
+把 DEEPSEEK_BASE_URL 指向该服务即可让整个程序使用它：
+    python benchmarks/mock_llm_server.py --port 8765 [--latency 0.2]
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8765 python main.py
+
+也可以在脚本中启动：server = start_mock_server(latency=0.1); ...; server.shutdown()
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """本地 LLM 桩服务（在后台线程中运行）"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 chunk_delay: float = 0.0, responses: list = None, respond=None,
+                 fail_every: int = 0, fail_status: int = 429):
+        """
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示随机选择空闲端口
+            latency: 每个请求的模拟延迟（秒，流式请求为首个数据块之前的延迟）
+            chunk_delay: 流式响应中每个数据块之间的间隔（秒）；非流式响应按同样的数据块数延迟返回
+            responses: 按顺序返回的回复，每项为 {"content": 文本} 或
+                {"content": 文本, "tool_calls": [{"name": 函数名, "arguments": 参数 JSON}]}；用完后复述最后一条消息
+            respond: 根据请求体决定回复的函数 respond(request) -> 回复（格式同 responses）或 None，
+                优先于 responses（并发请求的回复顺序不确定时使用）
+            fail_every: 每第 fail_every 个请求返回错误（按请求序号），0 表示不注入错误
+            fail_status: 注入错误的 HTTP 状态码，默认 429（限流）
+        """
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.chunk_delay = chunk_delay
+        self.responses = list(responses or [])
+        self.respond = respond
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.requests = 0
+        self.failures = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        # 每个新的 TCP 连接调用一次（同一连接上的多个请求不会再次调用）
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI 客户端使用的 base_url"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def next_request(self, request: dict) -> tuple:
+        """请求计数加一，返回 (请求序号, 预先给出的回复或 None, 是否注入错误)"""
+        with self._lock:
+            self.requests += 1
+            request_id = self.requests
+            if self.fail_every and request_id % self.fail_every == 0:
+                self.failures += 1
+                return request_id, None, True
+        scripted = self.respond(request) if self.respond is not None else None
+        if scripted is None:
+            with self._lock:
+                if self.responses:
+                    scripted = self.responses.pop(0)
+        return request_id, scripted, False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+    # HTTP/1.1：响应后保持连接，客户端可以复用
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 不输出每个请求的访问日志
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, {"requests": self.server.requests, "failures": self.server.failures,
+                                  "connections": self.server.connections})
+        else:
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"not found: {self.path}"}})
+            return
+
+        request_id, scripted, fail = self.server.next_request(request)
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        if fail:
+            self._send_json(self.server.fail_status, {"error": {
+                "message": f"mock error for request {request_id}", "type": "rate_limit_error", "code": None}})
+            return
+        response = completion_response(request, request_id, scripted)
+        if request.get("stream"):
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._send_stream(response, include_usage)
+        else:
+            # 非流式回复要等全部内容生成完才返回：模拟与逐块发送相同的生成时间
+            if self.server.chunk_delay > 0:
+                time.sleep(self.server.chunk_delay * (len(stream_chunks(response)) - 1))
+            self._send_json(200, response)
+
+    def _send_stream(self, response: dict, include_usage: bool = False):
+        """以 SSE 数据块逐块发送响应（分块传输编码）"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, chunk in enumerate(stream_chunks(response, include_usage=include_usage)):
+            if index and self.server.chunk_delay > 0:
+                time.sleep(self.server.chunk_delay)
+            self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def completion_response(request: dict, request_id: int, scripted: dict = None) -> dict:
+    """
+    根据请求生成确定性的 Chat Completion 响应
+
+    Args:
+        request: 请求体（model / messages / ...）
+        request_id: 请求序号
+        scripted: 预先给出的回复（见 MockLLMServer），为 None 时复述最后一条消息
+
+    Returns:
+        dict: OpenAI Chat Completion 格式的响应
+    """
+    messages = request.get("messages") or [{}]
+    if scripted is None:
+        last = str(messages[-1].get("content") or "")
+        scripted = {"content": f"[mock] {last[:200]}\n\nTERMINATE"}
+    content = scripted.get("content")
+    message = {"role": "assistant", "content": content}
+    if scripted.get("tool_calls"):
+        message["tool_calls"] = [
+            {"id": f"call_{request_id}_{i}", "type": "function",
+             "function": {"name": call["name"], "arguments": call["arguments"]}}
+            for i, call in enumerate(scripted["tool_calls"])
+        ]
+    prompt_tokens = max(1, len(json.dumps(messages, ensure_ascii=False)) // 4)
+    completion_tokens = max(1, len(json.dumps(message, ensure_ascii=False)) // 4)
+    return {
+        "id": f"mock-{request_id}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if "tool_calls" in message else "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def stream_chunks(response: dict, size: int = 8, include_usage: bool = False) -> list:
+    """
+    把完整的响应拆成流式数据块（chat.completion.chunk），文本和工具调用参数每 size 个字符一块
+
+    Args:
+        response: completion_response() 返回的响应
+        size: 每个数据块的字符数
+        include_usage: 是否在最后追加包含 usage 的数据块（请求中 stream_options.include_usage 为 true）
+
+    Returns:
+        list: 数据块列表
+    """
+    base = {"id": response["id"], "object": "chat.completion.chunk", "created": response["created"],
+            "model": response["model"]}
+    choice = response["choices"][0]
+    message = choice["message"]
+    deltas = [{"role": "assistant", "content": ""}]
+    content = message.get("content") or ""
+    deltas += [{"content": content[i:i + size]} for i in range(0, len(content), size)]
+    for index, call in enumerate(message.get("tool_calls") or []):
+        deltas.append({"tool_calls": [{"index": index, "id": call["id"], "type": "function",
+                                       "function": {"name": call["function"]["name"], "arguments": ""}}]})
+        arguments = call["function"]["arguments"]
+        deltas += [{"tool_calls": [{"index": index, "function": {"arguments": arguments[i:i + size]}}]}
+                   for i in range(0, len(arguments), size)]
+    chunks = [dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": None}]) for delta in deltas]
+    chunks.append(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}]))
+    if include_usage:
+        chunks.append(dict(base, choices=[], usage=response["usage"]))
+    return chunks
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                      chunk_delay: float = 0.0, responses: list = None, respond=None,
+                      fail_every: int = 0, fail_status: int = 429) -> MockLLMServer:
+    """
+    在后台线程中启动桩服务
+
+    Args:
+        host: 监听地址
+        port: 监听端口，0 表示随机选择空闲端口
+        latency: 每个请求的模拟延迟（秒）
+        chunk_delay: 流式响应中每个数据块之间的间隔（秒）
+        responses: 按顺序返回的回复（见 MockLLMServer）
+        respond: 根据请求体决定回复的函数（见 MockLLMServer）
+        fail_every: 每第 fail_every 个请求返回错误，0 表示不注入错误
+        fail_status: 注入错误的 HTTP 状态码
+
+    Returns:
+        MockLLMServer: 已启动的服务（用完后调用 shutdown()）
+    """
+    server = MockLLMServer(host, port, latency, chunk_delay, responses, respond, fail_every, fail_status)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="兼容 OpenAI Chat Completions 接口的本地 LLM 桩服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口，默认 8765")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的模拟延迟（秒），默认 0")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="流式响应每个数据块的间隔（秒），默认 0")
+    parser.add_argument("--fail-every", type=int, default=0, help="每第 N 个请求返回错误，默认 0（不注入）")
+    parser.add_argument("--fail-status", type=int, default=429, help="注入错误的 HTTP 状态码，默认 429")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency, args.chunk_delay,
+                           fail_every=args.fail_every, fail_status=args.fail_status)
+    print(f"[桩服务] 监听 {server.base_url}（延迟 {args.latency}s），Ctrl+C 退出")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print(f"[桩服务] 共处理 {server.requests} 个请求（注入 {server.failures} 个错误），{server.connections} 个连接")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
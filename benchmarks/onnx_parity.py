@@ -0,0 +1,138 @@
+"""
+ONNX后端一致性与吞吐量对比 (ONNX Backend Parity & Throughput)
+
+对比 torch（sentence-transformers）与 ONNX（fp32 / int8 量化）Embedding 后端：
+1. 一致性：同一批文本在两种后端下向量的余弦相似度（最小值 / 平均值）
+2. 吞吐量：每秒可向量化的文本数
+
+余弦相似度最小值低于阈值时以非零状态码退出。
+
+用法（需先导出 ONNX 模型，见 rag/onnx_backend.py）：
+    python benchmarks/onnx_parity.py --model-dir ./onnx_models/all-MiniLM-L6-v2 [--texts 512] [--output result.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from rag.model_registry import EMBEDDING_MODEL_NAME
+from rag.onnx_backend import OnnxEmbeddingModel
+
+
+def build_texts(count: int, seed: int = 0) -> list:
+    """
+    构造测试文本：知识库中的真实段落 + 随机组合的中英文句子
+
+    Args:
+        count: 文本数量
+        seed: 随机种子
+
+    Returns:
+        list: 文本列表
+    """
+    rng = random.Random(seed)
+    texts = []
+    profile = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "qsh_profile.txt")
+    if os.path.exists(profile):
+        with open(profile, "r", encoding="utf-8") as f:
+            texts.extend(line.strip() for line in f if line.strip())
+
+    words = ["深度学习", "向量检索", "知识库", "多智能体", "Python", "embedding", "latency", "CPU",
+             "模型", "推理", "篮球", "配置", "benchmark", "quantization", "数据库", "问答"]
+    while len(texts) < count:
+        texts.append(" ".join(rng.choice(words) for _ in range(rng.randint(3, 40))))
+    return texts[:count]
+
+
+def measure_throughput(model, texts: list, batch_size: int) -> float:
+    """
+    测量向量化吞吐量（先预热一次）
+
+    Returns:
+        float: 每秒文本数
+    """
+    model.encode(texts[:batch_size], batch_size=batch_size)
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """逐行计算余弦相似度"""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main() -> int:
+    from config import ONNX_MODEL_DIR
+
+    parser = argparse.ArgumentParser(description="对比 torch 与 ONNX Embedding 后端的一致性和吞吐量")
+    parser.add_argument("--model-dir", default=ONNX_MODEL_DIR, help="导出的 ONNX 模型目录")
+    parser.add_argument("--texts", type=int, default=512, help="测试文本数量，默认 512")
+    parser.add_argument("--batch-size", type=int, default=32, help="批大小，默认 32")
+    parser.add_argument("--min-cosine-fp32", type=float, default=0.999, help="fp32 模型的余弦相似度下限")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.98, help="int8 模型的余弦相似度下限")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    texts = build_texts(args.texts)
+    torch_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+    reference = torch_model.encode(texts, batch_size=args.batch_size, convert_to_numpy=True)
+
+    results = {
+        "model": EMBEDDING_MODEL_NAME,
+        "texts": len(texts),
+        "batch_size": args.batch_size,
+        "backends": {
+            "torch": {"texts_per_sec": measure_throughput(torch_model, texts, args.batch_size)},
+        },
+    }
+
+    failed = False
+    for quantized, threshold in ((False, args.min_cosine_fp32), (True, args.min_cosine_int8)):
+        name = "onnx-int8" if quantized else "onnx-fp32"
+        try:
+            onnx_model = OnnxEmbeddingModel(args.model_dir, quantized=quantized)
+        except (OSError, RuntimeError) as e:
+            print(f"[跳过] {name}: {e}")
+            continue
+
+        cosine = cosine_rows(reference, onnx_model.encode(texts, batch_size=args.batch_size))
+        entry = {
+            "texts_per_sec": measure_throughput(onnx_model, texts, args.batch_size),
+            "cosine_min": float(cosine.min()),
+            "cosine_mean": float(cosine.mean()),
+            "cosine_threshold": threshold,
+        }
+        entry["passed"] = entry["cosine_min"] >= threshold
+        failed = failed or not entry["passed"]
+        results["backends"][name] = entry
+
+    torch_speed = results["backends"]["torch"]["texts_per_sec"]
+    print(f"{'后端':<12}{'文本/秒':>12}{'加速比':>10}{'余弦最小值':>14}{'余弦平均值':>14}")
+    for name, entry in results["backends"].items():
+        cos_min = f"{entry['cosine_min']:.5f}" if "cosine_min" in entry else "-"
+        cos_mean = f"{entry['cosine_mean']:.5f}" if "cosine_mean" in entry else "-"
+        print(f"{name:<12}{entry['texts_per_sec']:>12.1f}{entry['texts_per_sec'] / torch_speed:>10.2f}"
+              f"{cos_min:>14}{cos_mean:>14}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if failed:
+        print("[错误] ONNX 向量与 torch 向量的一致性低于阈值")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+RAG 性能基准 (RAG Benchmark Suite)
+
+对比原始版本（RAGSystem）与优化版本（RAGSystemOptimized）：
+1. 加载吞吐量：每秒写入的段落数（不同批大小）
+2. 检索延迟：单个问题的 p50 / p95 / p99（毫秒）
+3. 峰值内存：进程的峰值 RSS（MB）
+
+语料为随机生成的合成文本（每行一个段落，两种版本都按行分段，段落数完全相同）：
+- cjk: 随机组合的中文词语
+- ascii: 随机组合的英文单词
+
+每个测试用例在独立的子进程中运行，峰值 RSS 互不影响；
+优化版本不使用 Embedding 磁盘缓存，避免多次运行之间相互影响。
+结果写入 JSON 文件（包含 git 提交号），用于跨提交追踪性能回归。
+
+用法：
+    python benchmarks/rag_benchmark.py [--chunks 1000] [--lang cjk ascii] [--batch-sizes 16 32 64]
+                                       [--queries 100] [--backend torch] [--output result.json]
+
+原始版本逐段落向量化和写入，段落数超过 --baseline-max-chunks（默认 10000）时跳过。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CJK_WORDS = ["深度学习", "向量检索", "知识库", "多智能体", "模型", "推理", "篮球", "配置", "数据库", "问答",
+             "自动化", "数学", "专业", "学生", "电脑", "华为", "处理器", "爱好", "特长", "生日",
+             "作业", "目标", "课程", "实验", "训练", "数据", "算法", "优化", "内存", "延迟"]
+ASCII_WORDS = ["deep", "learning", "vector", "retrieval", "knowledge", "agent", "model", "inference",
+               "basketball", "config", "database", "question", "answer", "python", "latency", "memory",
+               "throughput", "batch", "embedding", "index", "query", "cache", "token", "chunk",
+               "pipeline", "thread", "benchmark", "student", "course", "project"]
+
+
+def write_corpus(path: str, chunks: int, lang: str, seed: int = 0) -> int:
+    """
+    流式生成合成语料（每行一个段落，每个段落 8-40 个词）
+
+    Args:
+        path: 输出文件路径
+        chunks: 段落数
+        lang: cjk 或 ascii
+        seed: 随机种子
+
+    Returns:
+        int: 文件字节数
+    """
+    rng = random.Random(seed)
+    words = CJK_WORDS if lang == "cjk" else ASCII_WORDS
+    separator = "，" if lang == "cjk" else " "
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(chunks):
+            # 段落编号保证每行内容不同（段落ID由内容哈希生成，重复内容会被合并）
+            body = separator.join(rng.choice(words) for _ in range(rng.randint(8, 40)))
+            f.write(f"{i} {body}\n")
+    return os.path.getsize(path)
+
+
+def make_queries(count: int, lang: str, seed: int = 1) -> list:
+    """生成互不相同的检索问题（避免命中检索缓存）"""
+    rng = random.Random(seed)
+    words = CJK_WORDS if lang == "cjk" else ASCII_WORDS
+    separator = "" if lang == "cjk" else " "
+    return [f"{separator.join(rng.sample(words, 3))} {i}" for i in range(count)]
+
+
+def percentile(values: list, q: float) -> float:
+    """线性插值的百分位数"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值 RSS（MB）"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(spec: dict) -> dict:
+    """
+    在当前进程中运行一个测试用例（由子进程调用）
+
+    Args:
+        spec: 用例参数（system / corpus / chunks / batch_size / queries / lang / vector_store / query_mode）
+
+    Returns:
+        dict: 测试结果
+    """
+    queries = make_queries(spec["queries"], spec["lang"])
+    with tempfile.TemporaryDirectory(prefix="rag-bench-") as db_path, \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if spec["system"] == "RAGSystem":
+            from rag.rag_system import RAGSystem
+            rag = RAGSystem(collection_name="bench", db_path=db_path)
+            start = time.perf_counter()
+            rag.add_document(spec["corpus"], chunker="line")
+        else:
+            from rag.rag_system_optimized import RAGSystemOptimized
+            rag = RAGSystemOptimized(collection_name="bench", db_path=db_path, embedding_cache_dir=None,
+                                     chunker="line", vector_store=spec["vector_store"], query_mode=spec["query_mode"])
+            start = time.perf_counter()
+            rag.add_document(spec["corpus"], batch_size=spec["batch_size"])
+        ingest_seconds = time.perf_counter() - start
+        count = rag.get_collection_count()
+
+        # 第一次检索单独计时（包含惰性初始化），不计入百分位数
+        start = time.perf_counter()
+        rag.query(queries[0])
+        first_query_ms = (time.perf_counter() - start) * 1000
+
+        latencies = []
+        for question in queries[1:]:
+            start = time.perf_counter()
+            rag.query(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "system": spec["system"],
+        "lang": spec["lang"],
+        "chunks": count,
+        "batch_size": spec["batch_size"],
+        "ingest_seconds": ingest_seconds,
+        "paragraphs_per_sec": count / ingest_seconds if ingest_seconds > 0 else 0.0,
+        "first_query_ms": first_query_ms,
+        "query_p50_ms": percentile(latencies, 50) if latencies else None,
+        "query_p95_ms": percentile(latencies, 95) if latencies else None,
+        "query_p99_ms": percentile(latencies, 99) if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_case_subprocess(spec: dict, backend: str) -> dict:
+    """在独立子进程中运行测试用例，返回结果（失败时包含 error）"""
+    env = dict(os.environ, RAG_EMBEDDING_BACKEND=backend)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(spec)],
+                          capture_output=True, text=True, env=env, cwd=ROOT)
+    if proc.returncode != 0:
+        return {"system": spec["system"], "lang": spec["lang"], "batch_size": spec["batch_size"],
+                "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"退出码 {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    """当前 git 提交号（不在 git 仓库中时为 None）"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=ROOT, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="RAG 加载吞吐量、检索延迟和峰值内存基准")
+    parser.add_argument("--chunks", type=int, default=1000, help="语料段落数（1k-1M），默认 1000")
+    parser.add_argument("--lang", nargs="+", default=["cjk", "ascii"], choices=["cjk", "ascii"], help="语料语言")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64], help="优化版本的批大小")
+    parser.add_argument("--queries", type=int, default=100, help="每个用例的检索次数，默认 100")
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx"], help="Embedding 推理后端")
+    parser.add_argument("--vector-store", default="chroma", help="优化版本的向量存储（chroma / numpy）")
+    parser.add_argument("--query-mode", default="vector", help="优化版本的检索模式，默认 vector（与原始版本一致）")
+    parser.add_argument("--baseline-max-chunks", type=int, default=10000,
+                        help="段落数超过该值时跳过原始版本，默认 10000")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # 子进程：运行单个用例，最后一行输出 JSON 结果
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rag-bench-corpus-") as corpus_dir:
+        for lang in args.lang:
+            corpus = os.path.join(corpus_dir, f"{lang}.txt")
+            size = write_corpus(corpus, args.chunks, lang)
+            print(f"[基准] 语料 {lang}: {args.chunks} 个段落，{size / 1e6:.1f} MB")
+
+            base = {"corpus": corpus, "lang": lang, "queries": args.queries,
+                    "vector_store": args.vector_store, "query_mode": args.query_mode}
+            specs = [dict(base, system="RAGSystemOptimized", batch_size=batch) for batch in args.batch_sizes]
+            if args.chunks <= args.baseline_max_chunks:
+                specs.insert(0, dict(base, system="RAGSystem", batch_size=None))
+            else:
+                print(f"[基准] 段落数超过 {args.baseline_max_chunks}，跳过 RAGSystem")
+
+            for spec in specs:
+                result = run_case_subprocess(spec, args.backend)
+                results.append(result)
+                label = f"{spec['system']}(batch={spec['batch_size']})"
+                if "error" in result:
+                    print(f"[基准] {label:<32} 失败: {result['error']}")
+                    continue
+                print(f"[基准] {label:<32} {result['paragraphs_per_sec']:>9.1f} 段落/秒  "
+                      f"p50 {result['query_p50_ms']:.2f} / p95 {result['query_p95_ms']:.2f} / "
+                      f"p99 {result['query_p99_ms']:.2f} ms  峰值 RSS {result['peak_rss_mb']:.0f} MB")
+
+    # 优化版本相对原始版本的加载加速比（每种语言取最快的批大小）
+    speedups = {}
+    for lang in args.lang:
+        ok = [r for r in results if r["lang"] == lang and "error" not in r]
+        baseline = [r for r in ok if r["system"] == "RAGSystem"]
+        optimized = [r for r in ok if r["system"] == "RAGSystemOptimized"]
+        if baseline and optimized and baseline[0]["paragraphs_per_sec"] > 0:
+            best = max(r["paragraphs_per_sec"] for r in optimized)
+            speedups[lang] = best / baseline[0]["paragraphs_per_sec"]
+            print(f"[基准] {lang} 加载加速比: {speedups[lang]:.1f}x")
+
+    if args.output:
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "case")},
+            "results": results,
+            "ingest_speedup": speedups,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[基准] 结果已写入 {args.output}")
+    return 0 if all("error" not in r for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+向量存储精度对比 (Vector Storage Precision Benchmark)
+
+对比 NumpyVectorStore 的三种存储精度（float32 / float16 / pq）：
+1. 磁盘占用：快照目录的大小（pq 快照 = float16 向量 + PQ 编码，比 float16 大）
+2. 内存：加载快照并完成全部检索期间进程峰值 RSS 的增量（MB）。
+   RSS 包含内存映射后实际读取过的页，所有精度按同一口径统计
+3. 加载耗时：从快照创建存储实例的时间
+4. 检索延迟：单个查询的 p50 / p95（毫秒）
+5. recall@k：与 float32 精确检索结果的重合比例
+
+每种精度的加载和检索在独立的子进程中运行，峰值 RSS 互不影响。
+使用带聚类结构的随机单位向量作为语料（不需要 Embedding 模型）。
+
+用法：
+    python benchmarks/vector_storage.py [--vectors 20000] [--dim 384] [--queries 200] [--k 10] [--output result.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from rag.vector_store import NumpyVectorStore, VECTOR_STORAGE_DTYPES
+
+
+def make_corpus(n: int, dim: int, n_queries: int, seed: int = 0):
+    """
+    生成带聚类结构的单位向量语料和查询（查询为语料向量加噪声）
+
+    Returns:
+        tuple: (语料矩阵, 查询矩阵)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n // 100), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.5 * rng.normal(size=(n, dim))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    queries = vectors[rng.integers(0, n, n_queries)] + 0.1 * rng.normal(size=(n_queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors, queries
+
+
+def dir_size(path: str) -> int:
+    """目录中所有文件的总字节数"""
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值 RSS（MB）"""
+    # Linux 上子进程的 ru_maxrss 会继承 fork 时父进程的峰值，优先读取 exec 后重新统计的 VmHWM
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def build_storage(storage: str, root: str, ids: list, vectors: np.ndarray, **store_kwargs) -> float:
+    """
+    构建并保存一种存储精度的快照
+
+    Returns:
+        float: persist() 耗时（秒）
+    """
+    store = NumpyVectorStore(f"bench-{storage}", root, storage=storage, **store_kwargs)
+    store.upsert(ids, vectors, ids, [{} for _ in ids])
+    start = time.perf_counter()
+    store.persist()
+    return time.perf_counter() - start
+
+
+def run_case(spec: dict) -> dict:
+    """
+    加载一种存储精度的快照并检索（由子进程调用）
+
+    Args:
+        spec: 用例参数（storage / root / k / store_kwargs）
+
+    Returns:
+        dict: 测试结果
+    """
+    k = spec["k"]
+    queries = np.load(os.path.join(spec["root"], "queries.npy"))
+    with open(os.path.join(spec["root"], "truth.json"), encoding="utf-8") as f:
+        truth = json.load(f)
+    rss_before = peak_rss_mb()
+
+    start = time.perf_counter()
+    store = NumpyVectorStore(f"bench-{spec['storage']}", spec["root"], storage=spec["storage"], **spec["store_kwargs"])
+    load_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = store.query(query[None, :], k)["ids"][0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(result) & set(expected))
+
+    return {
+        "disk_mb": dir_size(store.path) / 1e6,
+        "rss_mb": peak_rss_mb() - rss_before,
+        "load_ms": load_ms,
+        "query_p50_ms": float(np.percentile(latencies, 50)),
+        "query_p95_ms": float(np.percentile(latencies, 95)),
+        f"recall@{k}": hits / (k * len(queries)),
+    }
+
+
+def run_case_subprocess(spec: dict) -> dict:
+    """在独立子进程中运行测试用例，返回结果"""
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(spec)],
+                          capture_output=True, text=True, cwd=ROOT, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="对比 NumpyVectorStore 不同存储精度的大小、内存、延迟和召回率")
+    parser.add_argument("--vectors", type=int, default=20000, help="语料向量数，默认 20000")
+    parser.add_argument("--dim", type=int, default=384, help="向量维度，默认 384（all-MiniLM-L6-v2）")
+    parser.add_argument("--queries", type=int, default=200, help="查询数，默认 200")
+    parser.add_argument("--k", type=int, default=10, help="每个查询返回的结果数，默认 10")
+    parser.add_argument("--pq-subspaces", type=int, default=32, help="PQ 分段数，默认 32")
+    parser.add_argument("--rerank-factor", type=int, default=10, help="PQ 精确重排的候选倍数，默认 10")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # 子进程：运行单个用例，最后一行输出 JSON 结果
+        print(json.dumps(run_case(json.loads(args.case))))
+        return 0
+
+    vectors, queries = make_corpus(args.vectors, args.dim, args.queries)
+    ids = [f"v{i}" for i in range(len(vectors))]
+
+    # float32 精确检索结果作为基准
+    distances = (vectors ** 2).sum(axis=1)[None, :] - 2.0 * queries @ vectors.T
+    truth = [[ids[i] for i in np.argsort(row)[:args.k]] for row in distances]
+
+    root = tempfile.mkdtemp(prefix="rag-storage-bench-")
+    results = {
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "storages": {},
+    }
+    try:
+        np.save(os.path.join(root, "queries.npy"), queries)
+        with open(os.path.join(root, "truth.json"), "w", encoding="utf-8") as f:
+            json.dump(truth, f)
+        for storage in VECTOR_STORAGE_DTYPES:
+            kwargs = {"pq_subspaces": args.pq_subspaces, "rerank_factor": args.rerank_factor} if storage == "pq" else {}
+            persist_seconds = build_storage(storage, root, ids, vectors, **kwargs)
+            spec = {"storage": storage, "root": root, "k": args.k, "store_kwargs": kwargs}
+            results["storages"][storage] = dict(run_case_subprocess(spec), persist_seconds=persist_seconds)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    recall_key = f"recall@{args.k}"
+    print(f"{'精度':<10}{'磁盘(MB)':>10}{'RSS增量(MB)':>12}{'加载(ms)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{recall_key:>12}")
+    for storage, entry in results["storages"].items():
+        print(f"{storage:<10}{entry['disk_mb']:>10.2f}{entry['rss_mb']:>12.2f}{entry['load_ms']:>10.1f}"
+              f"{entry['query_p50_ms']:>10.2f}{entry['query_p95_ms']:>10.2f}{entry[recall_key]:>12.3f}")
+
+    storages = results["storages"]
+    if "pq" in storages and "float16" in storages:
+        pq, half = storages["pq"], storages["float16"]
+        relation = "大于" if pq["disk_mb"] > half["disk_mb"] else "不大于"
+        print(f"磁盘: pq {pq['disk_mb']:.2f} MB {relation} float16 {half['disk_mb']:.2f} MB"
+              f"（pq 快照同时保存 float16 重排向量和 PQ 编码，只减少检索时读入内存的数据）")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
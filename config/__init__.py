@@ -1,21 +1,93 @@
 """
 配置模块 (Configuration Module)
 
-提供LLM配置、API配置等全局配置项
+提供LLM配置（含响应缓存、HTTP 连接池、流式输出）、API配置、RAG配置、遥测配置、任务调度与批量问答配置等全局配置项
 """
 
 from .llm_config import (
     DEEPSEEK_API_KEY,
     DEEPSEEK_BASE_URL,
     DEEPSEEK_MODEL,
+    LLM_CACHE_MODE,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_MB,
+    LLM_HTTP_POOL,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP2,
+    LLM_STREAM,
+    LLM_SPECULATIVE,
     llm_config,
-    get_llm_config
+    get_llm_config,
+    get_llm_cache,
+    get_http_client
+)
+from .rag_config import (
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZED,
+    QUERY_TIMEOUT,
+    VECTOR_STORE,
+    VECTOR_STORAGE,
+    QUERY_MODE,
+    MIN_SCORE,
+    CONTEXT_TOKENS,
+    INDEX_ARTIFACT
+)
+from .telemetry_config import (
+    LOG_LEVEL,
+    LOG_FORMAT,
+    TELEMETRY,
+    METRICS_FILE
+)
+from .task_config import (
+    TASK_CONCURRENCY,
+    TASK_TIMEOUT,
+    BATCH_CONCURRENCY,
+    BATCH_RATE_LIMIT,
+    BATCH_RATE_BURST,
+    BATCH_MAX_RETRIES,
+    BATCH_QUESTION_TIMEOUT,
+    BATCH_REPORT_INTERVAL
 )
 
 __all__ = [
     'DEEPSEEK_API_KEY',
     'DEEPSEEK_BASE_URL',
     'DEEPSEEK_MODEL',
+    'LLM_CACHE_MODE',
+    'LLM_CACHE_PATH',
+    'LLM_CACHE_TTL',
+    'LLM_CACHE_MAX_MB',
+    'LLM_HTTP_POOL',
+    'LLM_HTTP_MAX_CONNECTIONS',
+    'LLM_HTTP2',
+    'LLM_STREAM',
+    'LLM_SPECULATIVE',
     'llm_config',
-    'get_llm_config'
+    'get_llm_config',
+    'get_llm_cache',
+    'get_http_client',
+    'EMBEDDING_BACKEND',
+    'ONNX_MODEL_DIR',
+    'ONNX_QUANTIZED',
+    'QUERY_TIMEOUT',
+    'VECTOR_STORE',
+    'VECTOR_STORAGE',
+    'QUERY_MODE',
+    'MIN_SCORE',
+    'CONTEXT_TOKENS',
+    'INDEX_ARTIFACT',
+    'LOG_LEVEL',
+    'LOG_FORMAT',
+    'TELEMETRY',
+    'METRICS_FILE',
+    'TASK_CONCURRENCY',
+    'TASK_TIMEOUT',
+    'BATCH_CONCURRENCY',
+    'BATCH_RATE_LIMIT',
+    'BATCH_RATE_BURST',
+    'BATCH_MAX_RETRIES',
+    'BATCH_QUESTION_TIMEOUT',
+    'BATCH_REPORT_INTERVAL'
 ]
@@ -8,6 +8,16 @@ LLM配置模块 (LLM Configuration Module)
 - DEEPSEEK_BASE_URL: DeepSeek API基础URL
 - DEEPSEEK_MODEL: 使用的模型名称
 - llm_config: LLM配置字典
+- LLM_CACHE_MODE: LLM 响应缓存模式（off / readwrite / record / replay，默认 off，见 utils/llm_cache.py）
+- LLM_CACHE_PATH: 响应缓存的 SQLite 文件
+- LLM_CACHE_TTL: 缓存记录的有效期（秒），0 表示永不过期
+- LLM_CACHE_MAX_MB: 缓存总大小上限（MB），超过时淘汰最久未访问的记录
+- LLM_HTTP_POOL: 是否让所有 Agent 共用一个带连接池的 HTTP 客户端（见 utils/http_client.py）
+- LLM_HTTP_MAX_CONNECTIONS / LLM_HTTP_MAX_KEEPALIVE / LLM_HTTP_KEEPALIVE_EXPIRY: 连接池大小和 keep-alive 设置
+- LLM_HTTP2: 是否启用 HTTP/2（需要安装 h2）
+- LLM_CONNECT_TIMEOUT / LLM_READ_TIMEOUT / LLM_WRITE_TIMEOUT / LLM_POOL_TIMEOUT: 分阶段超时（秒）
+- LLM_STREAM: Assistant 是否流式输出回复（边生成边打印，见 agents/streaming.py）
+- LLM_SPECULATIVE: 流式输出时是否推测执行已经完整的代码块和工具调用
 """
 
 import os
@@ -18,9 +28,46 @@ import os
 
 # 从环境变量读取API Key，如果不存在则使用占位符
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY", "sk-cc5b864ad13240a58f93c1f7b8f73ad8")
-DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 DEEPSEEK_MODEL = "deepseek-chat"
 
+# ============================================================================
+# LLM 响应缓存配置
+# ============================================================================
+
+# 相同的请求（消息、tools、模型、采样参数都相同）直接返回缓存的响应。
+# 默认 off：不启用该缓存，autogen 自带的 cache_seed=41 磁盘缓存（.cache/41）照常生效，行为与之前相同。
+# 需要 TTL / 大小上限或确定性结果时显式开启：先用 record 录制，CI 中用 replay 只读取录制好的响应、不访问网络
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.sqlite")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# ============================================================================
+# HTTP 连接池配置
+# ============================================================================
+
+# 所有 Agent 共用一个 httpx 连接池：连接在请求之间复用（keep-alive），不必每次重新握手，
+# 同时打开的连接数不超过 LLM_HTTP_MAX_CONNECTIONS
+LLM_HTTP_POOL = os.getenv("LLM_HTTP_POOL", "1").lower() in ("1", "true", "yes")
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "0").lower() in ("1", "true", "yes")
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+LLM_WRITE_TIMEOUT = float(os.getenv("LLM_WRITE_TIMEOUT", "30"))
+LLM_POOL_TIMEOUT = float(os.getenv("LLM_POOL_TIMEOUT", "30"))
+
+# ============================================================================
+# 流式输出配置
+# ============================================================================
+
+# 流式输出缩短首字节时间；推测执行让代码块 / 工具调用在消息结束前就开始执行
+# （推测执行会运行包含 TERMINATE 的消息中的代码，默认关闭）
+LLM_STREAM = os.getenv("LLM_STREAM", "0").lower() in ("1", "true", "yes")
+LLM_SPECULATIVE = os.getenv("LLM_SPECULATIVE", "0").lower() in ("1", "true", "yes")
+
 # ============================================================================
 # LLM 配置字典
 # ============================================================================
@@ -38,14 +85,78 @@ llm_config = {
 }
 
 
+_llm_cache = None
+_http_client = None
+
+
+def get_llm_cache():
+    """
+    获取 LLM 响应缓存（按 LLM_CACHE_* 配置创建，进程内共享同一个实例）
+
+    Returns:
+        LLMResponseCache: 响应缓存，LLM_CACHE_MODE 为 off 时返回 None
+    """
+    global _llm_cache
+    if LLM_CACHE_MODE == "off":
+        return None
+    if _llm_cache is None:
+        from utils.llm_cache import LLMResponseCache
+        _llm_cache = LLMResponseCache(LLM_CACHE_PATH, mode=LLM_CACHE_MODE, ttl=LLM_CACHE_TTL,
+                                      max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024))
+    return _llm_cache
+
+
+def get_http_client():
+    """
+    获取所有 Agent 共用的 HTTP 客户端（按 LLM_HTTP_* 配置创建，进程内共享同一个实例）
+
+    Returns:
+        SharedHTTPClient: 带连接池的 httpx 客户端，LLM_HTTP_POOL 关闭时返回 None
+    """
+    global _http_client
+    if not LLM_HTTP_POOL:
+        return None
+    if _http_client is None:
+        import atexit
+        from utils.http_client import create_http_client
+        _http_client = create_http_client(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+            connect_timeout=LLM_CONNECT_TIMEOUT,
+            read_timeout=LLM_READ_TIMEOUT,
+            write_timeout=LLM_WRITE_TIMEOUT,
+            pool_timeout=LLM_POOL_TIMEOUT,
+            http2=LLM_HTTP2,
+        )
+        atexit.register(_http_client.close)
+    return _http_client
+
+
 def get_llm_config():
     """
-    获取LLM配置字典
+    获取LLM配置字典（附带响应缓存和共享 HTTP 客户端）
+
+    缓存放在 llm_config["cache"] 中，autogen 会把它合并到每个 config_list 条目，
+    优先于对话时传入的 cache 参数和旧的 cache_seed 磁盘缓存；缓存关闭（off）时不修改 cache_seed，
+    autogen 默认的 cache_seed 磁盘缓存照常生效。
+
+    共享 HTTP 客户端放在每个 config_list 条目的 http_client 中；此时去掉整体的 timeout，
+    由客户端的分阶段超时生效（OpenAI 客户端收到 timeout 参数时会覆盖 http_client 的超时设置）。
 
     Returns:
         dict: LLM配置字典
     """
-    return llm_config
+    config = dict(llm_config)
+    cache = get_llm_cache()
+    if cache is not None:
+        config["cache"] = cache
+
+    http_client = get_http_client()
+    if http_client is not None:
+        config.pop("timeout", None)
+        config["config_list"] = [{**entry, "http_client": http_client} for entry in llm_config["config_list"]]
+    return config
 
 
 def validate_api_key():
@@ -0,0 +1,44 @@
+"""
+RAG配置模块 (RAG Configuration Module)
+
+管理 Embedding 推理后端等 RAG 相关配置（均可通过环境变量覆盖）
+
+配置项：
+- EMBEDDING_BACKEND: Embedding 推理后端，"torch"（sentence-transformers）或 "onnx"（onnxruntime）
+- ONNX_MODEL_DIR: 导出的 ONNX 模型目录（见 rag/onnx_backend.py）
+- ONNX_QUANTIZED: 是否使用 int8 量化的 ONNX 模型
+- QUERY_TIMEOUT: 异步知识库检索工具的超时时间（秒）
+- VECTOR_STORE: 向量存储后端，"chroma"（ChromaDB）或 "numpy"（内存中的 NumPy 精确检索）
+- VECTOR_STORAGE: NumPy 后端的向量存储精度，"float32"、"float16" 或 "pq"（乘积量化 + 精确重排）
+- QUERY_MODE: 默认检索模式，"vector"、"lexical"（BM25）或 "hybrid"（词法 + 向量融合）
+- MIN_SCORE: 检索结果的最低相似度（低于该值的结果不会交给 LLM）
+- CONTEXT_TOKENS: 知识库工具每次返回的上下文的 token 预算
+- INDEX_ARTIFACT: 预构建索引目录（见 rag/index_artifact.py），设置后启动时只读加载，不再同步知识库
+"""
+
+import os
+
+# ============================================================================
+# Embedding 推理后端配置
+# ============================================================================
+
+EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("RAG_ONNX_MODEL_DIR", "./onnx_models/all-MiniLM-L6-v2")
+ONNX_QUANTIZED = os.getenv("RAG_ONNX_QUANTIZED", "1").lower() in ("1", "true", "yes")
+
+# ============================================================================
+# 检索配置
+# ============================================================================
+
+QUERY_TIMEOUT = float(os.getenv("RAG_QUERY_TIMEOUT", "30"))
+VECTOR_STORE = os.getenv("RAG_VECTOR_STORE", "chroma")
+VECTOR_STORAGE = os.getenv("RAG_VECTOR_STORAGE", "float32")
+QUERY_MODE = os.getenv("RAG_QUERY_MODE", "hybrid")
+MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.2"))
+CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "512"))
+
+# ============================================================================
+# 预构建索引配置
+# ============================================================================
+
+INDEX_ARTIFACT = os.getenv("RAG_INDEX_ARTIFACT", "")
@@ -0,0 +1,34 @@
+"""
+任务配置模块 (Task Configuration Module)
+
+管理任务调度器和批量问答的并发数、限流和超时配置（均可通过环境变量覆盖）
+
+配置项：
+- TASK_CONCURRENCY: 同时运行的任务数上限，1 表示按注册顺序依次执行
+- TASK_TIMEOUT: 每个任务的默认超时时间（秒），0 表示不限制
+- BATCH_CONCURRENCY: 批量问答同时进行的对话数
+- BATCH_RATE_LIMIT / BATCH_RATE_BURST: 批量问答对 LLM 接口的请求速率（次/秒，0 表示不限流）和允许的突发请求数
+- BATCH_MAX_RETRIES: LLM 请求遇到限流、连接错误、服务端错误时的最大重试次数（指数退避）
+- BATCH_QUESTION_TIMEOUT: 单个问题的超时时间（秒），0 表示不限制
+- BATCH_REPORT_INTERVAL: 批量问答输出进度报告的间隔（秒）
+"""
+
+import os
+
+# ============================================================================
+# 任务调度配置
+# ============================================================================
+
+TASK_CONCURRENCY = max(1, int(os.getenv("QSH_TASK_CONCURRENCY", "4")))
+TASK_TIMEOUT = float(os.getenv("QSH_TASK_TIMEOUT", "600"))
+
+# ============================================================================
+# 批量问答配置
+# ============================================================================
+
+BATCH_CONCURRENCY = max(1, int(os.getenv("QSH_BATCH_CONCURRENCY", "8")))
+BATCH_RATE_LIMIT = float(os.getenv("QSH_BATCH_RATE_LIMIT", "5"))
+BATCH_RATE_BURST = float(os.getenv("QSH_BATCH_RATE_BURST", "10"))
+BATCH_MAX_RETRIES = int(os.getenv("QSH_BATCH_MAX_RETRIES", "5"))
+BATCH_QUESTION_TIMEOUT = float(os.getenv("QSH_BATCH_QUESTION_TIMEOUT", "300"))
+BATCH_REPORT_INTERVAL = float(os.getenv("QSH_BATCH_REPORT_INTERVAL", "10"))
@@ -0,0 +1,27 @@
+"""
+遥测配置模块 (Telemetry Configuration Module)
+
+管理日志级别、日志格式和指标采集配置（均可通过环境变量覆盖）
+
+配置项：
+- LOG_LEVEL: 日志级别（DEBUG / INFO / WARNING / ERROR），DEBUG 时输出每次检索、每个 span 的耗时
+- LOG_FORMAT: 日志格式，"text"（"[RAG] 消息 key=value"）或 "json"（每行一个 JSON 对象）
+- TELEMETRY: 是否采集 span 耗时和计数器/直方图指标（关闭时几乎没有开销）
+- METRICS_FILE: 运行结束时写出的指标文件，扩展名为 .prom / .txt 时为 Prometheus 文本格式，否则为 JSON
+"""
+
+import os
+
+# ============================================================================
+# 日志配置
+# ============================================================================
+
+LOG_LEVEL = os.getenv("QSH_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("QSH_LOG_FORMAT", "text")
+
+# ============================================================================
+# 指标配置
+# ============================================================================
+
+TELEMETRY = os.getenv("QSH_TELEMETRY", "0").lower() in ("1", "true", "yes")
+METRICS_FILE = os.getenv("QSH_METRICS_FILE", "metrics.json")
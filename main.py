@@ -15,18 +15,22 @@
 - rag/: RAG系统模块（向量检索、知识库管理）
 - agents/: Agent定义模块（Assistant、UserProxy）
 - tools/: 工具函数模块（知识库查询工具）
-- tasks/: 任务执行模块（斐波那契任务、问答任务）
-- utils/: 工具类模块（日志工具）
+- tasks/: 任务执行模块（斐波那契任务、问答任务、并发任务调度器）
+- utils/: 工具类模块（日志工具、结构化日志与指标）
 """
 
 import os
 import asyncio
+import functools
 from config import get_llm_config
-from rag import init_rag_system
-from agents import create_agents
-from tools import register_knowledge_base_tool
-from tasks import run_fibonacci_task, run_qa_task
-from utils import print_header
+from utils import print_header, print_section, span, dump_metrics
+
+# 以下包都按需导入子模块（见各包的 __init__.py），
+# 通过 "包.函数" 的方式调用，autogen / chromadb / torch 等依赖直到真正使用时才会加载
+import rag
+import agents
+import tools
+import tasks
 
 
 async def main():
@@ -37,10 +41,9 @@ async def main():
     1. 检查 API Key 配置
     2. 创建工作目录
     3. 初始化 RAG 系统
-    4. 创建 Agent
-    5. 注册工具函数
-    6. 执行阶段一：代码生成与多模态输出
-    7. 执行阶段二：RAG 知识库问答
+    4. 为每个任务创建独立的 Agent 并注册工具函数
+    5. 并发执行阶段一（代码生成与多模态输出）和阶段二（RAG 知识库问答）
+    6. 输出每个任务的状态和耗时汇总
     """
     # 打印欢迎信息
     print_header("多智能体协作系统 (Multi-Agent Collaboration System)")
@@ -53,9 +56,10 @@ async def main():
     os.makedirs(work_dir, exist_ok=True)
     print(f"\n[系统] 工作目录已创建: {work_dir}/")
 
-    # 步骤3：初始化 RAG 系统
+    # 步骤3：初始化 RAG 系统（增量同步，知识库未变化时不会重新向量化）
     try:
-        init_rag_system(knowledge_file="qsh_profile.txt", force_reload=True)
+        with span("rag_init"):
+            rag.init_rag_system(knowledge_file="qsh_profile.txt")
     except FileNotFoundError as e:
         print(f"\n[错误] {e}")
         return
@@ -63,20 +67,29 @@ async def main():
         print(f"\n[错误] RAG系统初始化失败: {e}")
         return
 
-    # 步骤4：创建 Agent
-    llm_config = get_llm_config()
-    assistant, user_proxy = create_agents(llm_config=llm_config, work_dir=work_dir)
-
-    # 步骤5：注册工具函数
-    register_knowledge_base_tool(assistant, user_proxy)
-
-    # 步骤6：执行阶段一 - 代码生成与多模态输出（使用await）
-    await run_fibonacci_task(assistant, user_proxy, output_dir=work_dir)
+    # 知识库未变化时增量同步不会加载模型，在后台预热，避免第一次检索时等待模型加载
+    rag.warmup_embedding_model(background=True)
 
-    # 步骤7：执行阶段二 - RAG 知识库问答（使用await）
-    await run_qa_task(assistant, user_proxy)
+    # 步骤4~6：两个阶段相互独立（只共享 RAG 系统），由调度器并发执行，
+    # 每个任务使用独立的 Agent 对并注册工具函数（见 tasks/scheduler.py）
+    llm_config = get_llm_config()
+    scheduler = tasks.TaskScheduler(
+        agent_factory=functools.partial(agents.create_agents, llm_config=llm_config, work_dir=work_dir),
+        setup=tools.register_knowledge_base_tool,
+    )
+    # 阶段一：代码生成与多模态输出
+    scheduler.add_task("fibonacci", tasks.run_fibonacci_task, output_dir=work_dir)
+    # 阶段二：RAG 知识库问答
+    scheduler.add_task("qa", tasks.run_qa_task)
+    results = await scheduler.run()
+
+    print_section("任务执行汇总")
+    print(scheduler.summary())
 
     # 完成
+    if not all(result.ok for result in results.values()):
+        print_header("部分任务未完成，详见上方汇总")
+        return
     print_header("所有任务执行完成！")
     print("\n生成的文件：")
     print(f"  - {work_dir}/fibonacci_qsh.png (斐波那契数列可视化图表)")
@@ -85,4 +98,8 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    try:
+        asyncio.run(main())
+    finally:
+        # 写出本次运行的指标（QSH_TELEMETRY=1 时，路径见 config.METRICS_FILE）
+        dump_metrics()
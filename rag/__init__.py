@@ -2,15 +2,28 @@
 RAG模块 (Retrieval-Augmented Generation Module)
 
 提供基于ChromaDB的向量检索和知识库管理功能
+
+子模块按需导入：import rag 不会加载 chromadb / sentence-transformers / torch
 """
 
-from .rag_system import RAGSystem
-from .rag_system_optimized import RAGSystemOptimized
-from .initializer import init_rag_system, get_rag_instance
+from utils.lazy_import import lazy_module_getattr
+
+# 公开名称 -> 所在子模块（第一次访问时才导入，避免导入包时加载 chromadb、torch 等重量级依赖）
+_LAZY_ATTRS = {
+    'RAGSystem': '.rag_system',
+    'RAGSystemOptimized': '.rag_system_optimized',
+    'init_rag_system': '.initializer',
+    'get_rag_instance': '.initializer',
+    'build_index_artifact': '.index_artifact',
+    'load_index_artifact': '.index_artifact',
+    'IndexArtifactError': '.index_artifact',
+    'get_embedding_model': '.model_registry',
+    'warmup_embedding_model': '.model_registry',
+    'unload_embedding_model': '.model_registry',
+    'unload_idle_models': '.model_registry',
+    'start_idle_unloader': '.model_registry',
+}
+
+__all__ = list(_LAZY_ATTRS)
 
-__all__ = [
-    'RAGSystem',
-    'RAGSystemOptimized',
-    'init_rag_system',
-    'get_rag_instance'
-]
+__getattr__, __dir__ = lazy_module_getattr(__name__, _LAZY_ATTRS)
@@ -0,0 +1,102 @@
+"""
+异步执行器模块 (Async Executor Module)
+
+在 asyncio 事件循环中执行阻塞的检索操作（向量化是 CPU 密集型，ChromaDB 查询有 SQLite I/O）：
+1. 专用线程池：检索任务不占用事件循环的默认线程池
+2. 有界：同时排队+执行的任务数有上限，超出时协程在事件循环中等待，而不是无限堆积
+3. 超时与取消：协程超时或被取消时，尚未开始执行的任务直接从线程池中撤销；
+   已在执行的任务无法中断，会在后台执行完毕，但其结果被丢弃，执行完毕前仍占用名额
+"""
+
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable
+
+
+class BoundedAsyncExecutor:
+    """
+    有界的异步线程池执行器
+
+    Attributes:
+        max_workers: 工作线程数
+        max_pending: 同时排队+执行的最大任务数
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, thread_name_prefix: str = "rag-query"):
+        """
+        Args:
+            max_workers: 工作线程数，默认 2
+            max_pending: 同时排队+执行的最大任务数，默认 32
+            thread_name_prefix: 工作线程名称前缀
+        """
+        if max_pending < max_workers:
+            raise ValueError("max_pending 不能小于 max_workers")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        # asyncio.Semaphore 绑定到事件循环，每个事件循环各用一个
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_pending)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+    @staticmethod
+    def _release(loop: asyncio.AbstractEventLoop, semaphore: asyncio.Semaphore):
+        """在事件循环线程中释放名额（事件循环已关闭时忽略）"""
+        if not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass
+
+    async def run(self, fn: Callable, *args, timeout: float = None, **kwargs):
+        """
+        在线程池中执行 fn(*args, **kwargs) 并等待结果
+
+        Args:
+            fn: 阻塞函数
+            *args: 位置参数
+            timeout: 超时时间（秒，包含排队时间），为 None 时不限时
+            **kwargs: 关键字参数
+
+        Returns:
+            fn 的返回值
+
+        Raises:
+            asyncio.TimeoutError: 超时
+            asyncio.CancelledError: 协程被取消
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+
+        async def submit():
+            await semaphore.acquire()
+            try:
+                future = self._executor.submit(partial(fn, *args, **kwargs))
+            except BaseException:
+                semaphore.release()
+                raise
+            # 名额在线程中的任务真正结束（或被撤销）后才释放，超时的任务不会让线程池无限堆积
+            future.add_done_callback(lambda _: self._release(loop, semaphore))
+            # 协程被取消时，wrap_future 会撤销尚未开始执行的任务
+            return await asyncio.wrap_future(future)
+
+        return await asyncio.wait_for(submit(), timeout)
+
+    def shutdown(self, wait: bool = True):
+        """
+        关闭线程池
+
+        Args:
+            wait: 是否等待正在执行的任务结束
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,278 @@
+"""
+文本分段模块 (Chunking Module)
+
+将文档的行流切分为用于向量化的文本块（chunk）
+
+分段策略：
+1. LineChunker: 每个非空行为一个块（原始行为）
+2. TokenWindowChunker: 固定 token 数的滑动窗口，相邻块之间有重叠
+3. ParagraphChunker: 按空行/Markdown 标题识别段落，合并相邻的短段落，
+   超长段落按行拆分、超长的行再按 token 窗口切分，块前附带所属标题
+
+token 计数对中日韩文字友好：每个 CJK 字符计为一个 token，
+连续的字母数字计为一个 token，其余标点各计为一个 token。
+所有分段器都以流式方式工作，内存占用与块大小有关，与文件大小无关。
+"""
+
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# CJK 字符范围（平假名/片假名、CJK 统一汉字及扩展A、兼容汉字、韩文音节）
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"[{_CJK_RANGES}]|[^\W{_CJK_RANGES}]+|[^\w\s]")
+
+# Markdown 标题行
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    对文本进行 CJK 友好的切分，返回每个 token 在原文中的位置
+
+    Args:
+        text: 文本
+
+    Returns:
+        List[Tuple[int, int]]: (起始位置, 结束位置) 列表
+    """
+    return [m.span() for m in _TOKEN_RE.finditer(text)]
+
+
+def count_tokens(text: str) -> int:
+    """
+    统计文本的 token 数（与 token_spans 的切分方式一致）
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: token 数
+    """
+    return sum(1 for _ in _TOKEN_RE.finditer(text))
+
+
+def split_by_tokens(text: str, chunk_size: int, overlap: int = 0) -> List[str]:
+    """
+    将一段文本按 token 窗口切分（保留原文中的空白和标点）
+
+    Args:
+        text: 文本
+        chunk_size: 每块的最大 token 数
+        overlap: 相邻块之间重叠的 token 数
+
+    Returns:
+        List[str]: 文本块列表
+    """
+    spans = token_spans(text)
+    if len(spans) <= chunk_size:
+        return [text] if spans else []
+
+    stride = max(1, chunk_size - overlap)
+    chunks = []
+    for start in range(0, len(spans), stride):
+        window = spans[start:start + chunk_size]
+        chunks.append(text[window[0][0]:window[-1][1]])
+        if start + chunk_size >= len(spans):
+            break
+    return chunks
+
+
+class Chunker:
+    """
+    分段器基类
+
+    子类实现 chunks()：输入 (行文本, 已读取字节数) 流（包含空行），
+    输出 (块文本, 已读取字节数) 流。
+    """
+
+    name = "base"
+
+    def chunks(self, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        raise NotImplementedError
+
+    def settings(self) -> Dict:
+        """
+        分段器配置（用于记录和比较索引的构建参数）
+
+        Returns:
+            Dict: 包含 name 和各项参数的字典
+        """
+        return {"name": self.name}
+
+
+class LineChunker(Chunker):
+    """每个非空行为一个块"""
+
+    name = "line"
+
+    def chunks(self, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        for line, bytes_read in lines:
+            if line:
+                yield line, bytes_read
+
+
+class TokenWindowChunker(Chunker):
+    """
+    固定 token 数的滑动窗口分段器（跨行连续切分）
+
+    Attributes:
+        chunk_size: 每块的 token 数
+        overlap: 相邻块之间重叠的 token 数
+    """
+
+    name = "token"
+
+    def __init__(self, chunk_size: int = 128, overlap: int = 16):
+        if overlap >= chunk_size:
+            raise ValueError("overlap 必须小于 chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def chunks(self, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        stride = self.chunk_size - self.overlap
+        text = ""
+        spans = []
+        fresh = 0  # 尚未被任何已输出块覆盖的 token 数
+        bytes_read = 0
+
+        for line, bytes_read in lines:
+            if not line:
+                continue
+            offset = len(text) + 1 if text else 0
+            text = f"{text}\n{line}" if text else line
+            line_spans = [(s + offset, e + offset) for s, e in token_spans(line)]
+            spans.extend(line_spans)
+            fresh += len(line_spans)
+
+            while len(spans) >= self.chunk_size:
+                yield text[spans[0][0]:spans[self.chunk_size - 1][1]], bytes_read
+                # 丢弃窗口前 stride 个 token，剩余的 overlap 个 token 已被输出过
+                new_start = spans[stride][0]
+                text = text[new_start:]
+                spans = [(s - new_start, e - new_start) for s, e in spans[stride:]]
+                fresh = len(spans) - self.overlap
+
+        if spans and fresh > 0:
+            yield text[spans[0][0]:spans[-1][1]], bytes_read
+
+    def settings(self) -> Dict:
+        return {"name": self.name, "chunk_size": self.chunk_size, "overlap": self.overlap}
+
+
+class ParagraphChunker(Chunker):
+    """
+    段落/标题感知的分段器
+
+    - 空行和 Markdown 标题行是段落边界
+    - 同一标题下相邻的短段落会被合并，直到达到 max_tokens
+    - 超过 max_tokens 的段落按行重新合并，超长的行按 token 窗口切分（带 overlap）
+    - 每个块前附带其所属的标题，检索时保留上下文
+
+    Attributes:
+        max_tokens: 每块的最大 token 数
+        overlap: 切分超长段落时的重叠 token 数
+    """
+
+    name = "paragraph"
+
+    def __init__(self, max_tokens: int = 256, overlap: int = 32):
+        if overlap >= max_tokens:
+            raise ValueError("overlap 必须小于 max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+
+    def chunks(self, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        heading = ""
+        paragraph = []     # 当前段落的行
+        pending = []       # 已合并、待输出的段落
+        pending_tokens = 0
+        emitted_under_heading = False
+        bytes_read = 0
+
+        def with_heading(body: str) -> str:
+            return f"{heading}\n{body}" if heading else body
+
+        def flush_pending():
+            nonlocal pending, pending_tokens, emitted_under_heading
+            if pending:
+                emitted_under_heading = True
+                yield with_heading("\n".join(pending)), bytes_read
+            pending, pending_tokens = [], 0
+
+        def merge(text: str, tokens: int):
+            nonlocal pending_tokens
+            if pending and pending_tokens + tokens > self.max_tokens:
+                yield from flush_pending()
+            pending.append(text)
+            pending_tokens += tokens
+
+        def close_paragraph():
+            nonlocal paragraph
+            if not paragraph:
+                return
+            lines_in_paragraph, paragraph = paragraph, []
+            text = "\n".join(lines_in_paragraph)
+            tokens = count_tokens(text)
+            if tokens <= self.max_tokens:
+                yield from merge(text, tokens)
+                return
+
+            # 超长段落：单独成块，按行合并到 max_tokens，超长的行再按 token 窗口切分
+            yield from flush_pending()
+            for line in lines_in_paragraph:
+                line_tokens = count_tokens(line)
+                pieces = [line] if line_tokens <= self.max_tokens else split_by_tokens(line, self.max_tokens, self.overlap)
+                for piece in pieces:
+                    yield from merge(piece, count_tokens(piece))
+            yield from flush_pending()
+
+        for line, bytes_read in lines:
+            if _HEADING_RE.match(line):
+                yield from close_paragraph()
+                yield from flush_pending()
+                if heading and not emitted_under_heading:
+                    # 没有正文的标题单独成块
+                    yield heading, bytes_read
+                heading = line
+                emitted_under_heading = False
+            elif line:
+                paragraph.append(line)
+            else:
+                yield from close_paragraph()
+
+        yield from close_paragraph()
+        yield from flush_pending()
+        if heading and not emitted_under_heading:
+            yield heading, bytes_read
+
+    def settings(self) -> Dict:
+        return {"name": self.name, "max_tokens": self.max_tokens, "overlap": self.overlap}
+
+
+# 可用的分段器
+CHUNKERS = {
+    LineChunker.name: LineChunker,
+    TokenWindowChunker.name: TokenWindowChunker,
+    ParagraphChunker.name: ParagraphChunker,
+}
+
+
+def get_chunker(chunker="paragraph", **kwargs) -> Chunker:
+    """
+    根据名称创建分段器
+
+    Args:
+        chunker: 分段器名称（line / token / paragraph）或 Chunker 实例
+        **kwargs: 传给分段器构造函数的参数（如 chunk_size、overlap、max_tokens）
+
+    Returns:
+        Chunker: 分段器实例
+
+    Raises:
+        ValueError: 未知的分段器名称
+    """
+    if isinstance(chunker, Chunker):
+        return chunker
+    if chunker not in CHUNKERS:
+        raise ValueError(f"未知的分段器: {chunker}（可选: {', '.join(CHUNKERS)}）")
+    return CHUNKERS[chunker](**kwargs)
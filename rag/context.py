@@ -0,0 +1,87 @@
+"""
+上下文组装模块 (Context Assembly Module)
+
+把检索结果整理为交给 LLM 的上下文：
+1. 带分数的检索结果（SearchHit），低于相似度阈值的结果被丢弃
+2. 近似重复的段落（词项集合的 Jaccard 相似度过高）只保留分数最高的一条
+3. 按 token 预算装填：按分数从高到低加入段落，超出预算的段落截断或丢弃
+
+相似度的取值：
+- 向量检索：由平方 L2 距离换算的余弦相似度 1 - d / 2（Embedding 已做 L2 归一化时成立）
+- 只被词法检索命中的段落：查询词的 idf 覆盖率（见 lexical_index）
+"""
+
+from collections import namedtuple
+from typing import List
+from .chunking import count_tokens, split_by_tokens
+from .lexical_index import lexical_tokens
+
+# 检索结果：段落ID、段落文本、相似度（越大越相关）
+SearchHit = namedtuple("SearchHit", ["id", "document", "score"])
+
+
+def distance_to_similarity(distance: float) -> float:
+    """
+    将平方 L2 距离换算为余弦相似度（假设向量已 L2 归一化）
+
+    Args:
+        distance: 平方 L2 距离
+
+    Returns:
+        float: 余弦相似度
+    """
+    return 1.0 - distance / 2.0
+
+
+def dedupe_hits(hits: List[SearchHit], max_overlap: float = 0.9) -> List[SearchHit]:
+    """
+    去除近似重复的段落（保留排在前面的一条）
+
+    Args:
+        hits: 按分数从高到低排列的检索结果
+        max_overlap: 两个段落词项集合的 Jaccard 相似度超过该值时视为重复
+
+    Returns:
+        List[SearchHit]: 去重后的检索结果
+    """
+    kept, kept_terms = [], []
+    for hit in hits:
+        terms = set(lexical_tokens(hit.document))
+        duplicate = any(
+            terms == other or (terms and len(terms & other) / len(terms | other) > max_overlap)
+            for other in kept_terms
+        )
+        if not duplicate:
+            kept.append(hit)
+            kept_terms.append(terms)
+    return kept
+
+
+def pack_context(documents: List[str], max_tokens: int) -> List[str]:
+    """
+    按 token 预算装填段落（documents 应已按相关性排序）
+
+    段落依次加入，直到预算用完；放不下的第一个段落截断到剩余预算，之后的段落全部丢弃。
+
+    Args:
+        documents: 段落列表
+        max_tokens: token 预算，为 None 或不大于 0 时不限制
+
+    Returns:
+        List[str]: 装入预算的段落
+    """
+    if not max_tokens or max_tokens <= 0:
+        return list(documents)
+
+    packed = []
+    remaining = max_tokens
+    for document in documents:
+        tokens = count_tokens(document)
+        if tokens <= remaining:
+            packed.append(document)
+            remaining -= tokens
+            continue
+        if remaining > 0:
+            packed.append(split_by_tokens(document, remaining)[0])
+        break
+    return packed
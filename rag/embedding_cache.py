@@ -0,0 +1,333 @@
+"""
+Embedding缓存模块 (Embedding Cache Module)
+
+为 Embedding 模型提供持久化的磁盘缓存，避免对相同文本重复调用模型
+
+存储结构（每个模型一个子目录）：
+- vectors.bin: 内存映射的向量矩阵 (max_entries × dim)，默认 float16
+- keys.bin: 内存映射的槽位键数组，每个槽位保存对应文本的哈希，用于校验
+- index.json: 键 → 槽位的索引，按最近使用顺序排列（LRU）
+
+缓存键 = sha1(模型名称 + 规范化文本)，规范化包括 NFKC 和空白折叠，
+因此仅空白不同的文本会命中同一条缓存。
+"""
+
+import os
+import json
+import atexit
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from utils.telemetry import get_logger
+
+logger = get_logger("RAG")
+
+# 键长度（sha1 十六进制摘要字符数）
+KEY_SIZE = 40
+
+# 进程内共享的缓存实例（(缓存目录, 模型名称) -> EmbeddingCache），
+# 避免多个 RAG 实例同时打开同一组缓存文件、互相覆盖索引
+_caches: Dict[Tuple[str, str], "EmbeddingCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """
+    规范化文本（NFKC + 折叠空白）
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 规范化后的文本
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """
+    生成缓存键
+
+    Args:
+        model_name: Embedding 模型名称
+        text: 原始文本
+
+    Returns:
+        str: 40 位十六进制 sha1 摘要
+    """
+    payload = f"{model_name}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    基于内存映射文件的 Embedding 缓存
+
+    Attributes:
+        model_name: 缓存对应的模型名称
+        max_entries: 最大缓存条目数，超出后按 LRU 淘汰
+        dtype: 向量存储精度（float16 或 float32）
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 100_000, dtype: str = "float16"):
+        """
+        初始化 Embedding 缓存
+
+        Args:
+            cache_dir: 缓存根目录
+            model_name: Embedding 模型名称
+            max_entries: 最大缓存条目数，默认 100000
+            dtype: 向量存储精度，默认 "float16"（占用空间减半）
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+
+        safe_name = model_name.replace("/", "__")
+        self.cache_path = os.path.join(cache_dir, safe_name)
+        os.makedirs(self.cache_path, exist_ok=True)
+        self._index_file = os.path.join(self.cache_path, "index.json")
+        self._vectors_file = os.path.join(self.cache_path, "vectors.bin")
+        self._keys_file = os.path.join(self.cache_path, "keys.bin")
+
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # key -> slot，按最近使用排序
+        self._next_slot = 0
+        self._dim = None
+        self._vectors = None
+        self._keys = None
+        self._dirty = False
+
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        """从磁盘加载索引；配置不一致、文件缺失或损坏时丢弃旧缓存（之后写入时重建）"""
+        if not os.path.exists(self._index_file):
+            return
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if (meta.get("max_entries") != self.max_entries
+                or meta.get("dtype") != self.dtype.name
+                or not os.path.exists(self._vectors_file)
+                or not os.path.exists(self._keys_file)):
+            logger.info(f"Embedding 缓存配置已变化或文件缺失，重建缓存: {self.cache_path}")
+            return
+
+        try:
+            self._open_storage(meta["dim"], create=False)
+            self._index = OrderedDict((key, slot) for key, slot in meta["entries"])
+            self._next_slot = meta["next_slot"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Embedding 缓存文件已损坏（{e}），重建缓存: {self.cache_path}")
+            self._discard()
+
+    def _discard(self):
+        """丢弃内存中的缓存和磁盘上的索引（向量文件在下次写入时按新的维度重新创建）"""
+        self._index = OrderedDict()
+        self._next_slot = 0
+        self._dim = None
+        self._vectors = None
+        self._keys = None
+        self._dirty = False
+        if os.path.exists(self._index_file):
+            os.remove(self._index_file)
+
+    def ensure_dim(self, dim: int):
+        """
+        校验缓存的向量维度与当前模型一致，不一致（如换成了不同维度的模型）时丢弃旧缓存
+
+        Args:
+            dim: 当前模型输出的向量维度
+        """
+        with self._lock:
+            if self._dim is not None and self._dim != dim:
+                logger.info(f"Embedding 缓存维度为 {self._dim}，当前模型为 {dim}，重建缓存: {self.cache_path}")
+                self._discard()
+
+    def _open_storage(self, dim: int, create: bool):
+        """打开（或创建）向量和键的内存映射文件"""
+        mode = "w+" if create else "r+"
+        if not create:
+            # r+ 模式下 numpy 会把过短的文件补零扩展，先校验大小，截断的文件按损坏处理
+            for path, size in ((self._vectors_file, self.max_entries * dim * self.dtype.itemsize),
+                               (self._keys_file, self.max_entries * KEY_SIZE)):
+                if os.path.getsize(path) != size:
+                    raise ValueError(f"{os.path.basename(path)} 大小为 {os.path.getsize(path)}，应为 {size}")
+        self._dim = dim
+        self._vectors = np.memmap(self._vectors_file, dtype=self.dtype, mode=mode, shape=(self.max_entries, dim))
+        self._keys = np.memmap(self._keys_file, dtype=f"S{KEY_SIZE}", mode=mode, shape=(self.max_entries,))
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        批量查询缓存
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            List[Optional[np.ndarray]]: 与 texts 一一对应，未命中的位置为 None
+        """
+        results = []
+        with self._lock:
+            for text in texts:
+                key = make_cache_key(self.model_name, text)
+                slot = self._index.get(key)
+                # 同时校验槽位键，防止索引与向量文件不同步时返回错误的向量
+                if slot is None or self._keys[slot] != key.encode("ascii"):
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                # 命中会改变 LRU 顺序，标记为已修改，只读检索的会话结束时也保存最近使用顺序
+                self._index.move_to_end(key)
+                self._dirty = True
+                self.hits += 1
+                results.append(np.asarray(self._vectors[slot], dtype=np.float32))
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """
+        批量写入缓存（超出容量时淘汰最久未使用的条目）
+
+        Args:
+            texts: 文本列表
+            vectors: 对应的向量矩阵 (len(texts) × dim)
+        """
+        with self._lock:
+            if self._vectors is not None and vectors.shape[1] != self._dim:
+                logger.info(f"Embedding 缓存维度为 {self._dim}，写入为 {vectors.shape[1]}，重建缓存: {self.cache_path}")
+                self._discard()
+            if self._vectors is None:
+                self._open_storage(vectors.shape[1], create=True)
+
+            for text, vector in zip(texts, vectors):
+                key = make_cache_key(self.model_name, text)
+                slot = self._index.get(key)
+                if slot is None:
+                    if self._next_slot < self.max_entries:
+                        slot = self._next_slot
+                        self._next_slot += 1
+                    else:
+                        _, slot = self._index.popitem(last=False)
+                self._vectors[slot] = vector
+                self._keys[slot] = key.encode("ascii")
+                self._index[key] = slot
+                self._index.move_to_end(key)
+            self._dirty = True
+
+    def flush(self):
+        """将向量和索引写回磁盘（原子替换索引文件）"""
+        with self._lock:
+            if not self._dirty or self._vectors is None:
+                return
+            self._vectors.flush()
+            self._keys.flush()
+            meta = {
+                "model_name": self.model_name,
+                "dim": self._dim,
+                "dtype": self.dtype.name,
+                "max_entries": self.max_entries,
+                "next_slot": self._next_slot,
+                "entries": list(self._index.items()),
+            }
+            tmp_file = self._index_file + ".tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_file, self._index_file)
+            self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def get_embedding_cache(cache_dir: str, model_name: str, max_entries: int = 100_000) -> EmbeddingCache:
+    """
+    获取进程内共享的 Embedding 缓存（同一目录和模型只打开一次）
+
+    Args:
+        cache_dir: 缓存根目录
+        model_name: Embedding 模型名称
+        max_entries: 最大缓存条目数（仅在第一次创建时生效）
+
+    Returns:
+        EmbeddingCache: 共享的缓存实例
+    """
+    key = (os.path.abspath(cache_dir), model_name)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(cache_dir, model_name, max_entries=max_entries)
+            _caches[key] = cache
+        return cache
+
+
+class CachedEmbeddingModel:
+    """
+    带缓存的 Embedding 模型包装器
+
+    提供与 SentenceTransformer.encode 相同的调用方式，
+    只对缓存未命中的文本调用底层模型。其他属性透传给底层模型。
+    """
+
+    # 不影响输出向量的 encode 参数；传入其他参数时绕过缓存
+    _CACHE_SAFE_KWARGS = {"batch_size", "show_progress_bar", "convert_to_numpy"}
+
+    def __init__(self, model, cache: EmbeddingCache):
+        """
+        Args:
+            model: 底层 Embedding 模型（需提供 encode 方法）
+            cache: EmbeddingCache 实例
+        """
+        self.model = model
+        self.cache = cache
+        self._dim_checked = False
+
+    def encode(self, sentences, **kwargs):
+        """
+        生成 embeddings（优先读取缓存）
+
+        Args:
+            sentences: 单个文本或文本列表
+            **kwargs: 传递给底层模型 encode 的参数
+
+        Returns:
+            np.ndarray: 单个文本返回一维向量，文本列表返回二维矩阵
+        """
+        if set(kwargs) - self._CACHE_SAFE_KWARGS:
+            return self.model.encode(sentences, **kwargs)
+        if not self._dim_checked:
+            # 第一次使用时校验缓存维度（会加载模型），避免换模型后读到维度不同的旧向量
+            self.cache.ensure_dim(self.model.get_sentence_embedding_dimension())
+            self._dim_checked = True
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = self.cache.get_many(texts)
+
+        # 只对未命中的文本（去重后）调用模型
+        miss_texts = list(dict.fromkeys(t for t, v in zip(texts, vectors) if v is None))
+        if miss_texts:
+            kwargs["convert_to_numpy"] = True
+            miss_vectors = self.model.encode(miss_texts, **kwargs)
+            self.cache.put_many(miss_texts, miss_vectors)
+            computed = dict(zip(miss_texts, miss_vectors))
+            vectors = [v if v is not None else computed[t] for t, v in zip(texts, vectors)]
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        result = np.stack(vectors).astype(np.float32, copy=False)
+        return result[0] if single else result
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
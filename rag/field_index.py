@@ -0,0 +1,211 @@
+"""
+字段索引模块 (Field Index Module)
+
+知识库文件中的 "字段：值" 行（如 "年龄：19岁"）在加载时被识别出来，
+存入一个 字段名 -> 值 的字典，事实类问题直接查字典即可得到答案，
+不需要向量化、检索和额外的 LLM 推理。
+
+查找顺序：
+1. 字段名完全匹配（O(1)）
+2. 同义词匹配：同一同义词组中的任意名称都能查到该组中已有的字段（如 电脑 / 配置 -> 设备）
+3. 问句中包含已知字段名或同义词（如 "他的鞋码是多少" -> 鞋码）
+
+索引按来源文件整体替换：每次完整读取一个文件后，用新识别出的字段替换该文件原有的字段。
+"""
+
+import os
+import re
+import json
+import threading
+from collections import namedtuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .embedding_cache import normalize_text
+
+# "字段：值" 行：字段名较短，且不包含空白和句内标点
+_FIELD_LINE_RE = re.compile(r"^([^\s：:，。,.;；!！?？#]{1,16})\s*[：:]\s*(\S.*)$")
+
+# 规范化字段名时去除的标点和疑问词
+_FIELD_STRIP = "?？!！.。,，;；:：~～ "
+
+# 默认的同义词组（组中任意名称都能查到组内已有的字段）
+DEFAULT_FIELD_SYNONYMS = (
+    ("设备", "电脑", "配置", "电脑配置", "硬件", "机器", "cpu"),
+    ("年龄", "岁数", "多大"),
+    ("生日", "出生日期", "生日日期"),
+    ("鞋码", "鞋号", "鞋子尺码", "尺码"),
+    ("爱好", "兴趣", "兴趣爱好", "喜好", "运动"),
+    ("特长", "擅长", "技能", "专长"),
+    ("身份", "专业", "年级", "学历"),
+    ("姓名", "名字", "名称"),
+    ("作业目标", "目标", "作业"),
+)
+
+# 字段查找结果：字段名、值、来源文件
+FieldEntry = namedtuple("FieldEntry", ["key", "value", "source"])
+
+
+def parse_field_line(line: str) -> Optional[Tuple[str, str]]:
+    """
+    识别 "字段：值" 行
+
+    Args:
+        line: 一行文本
+
+    Returns:
+        (字段名, 值)，不是字段行时返回 None
+    """
+    match = _FIELD_LINE_RE.match(line.strip())
+    if match is None or match.group(2).startswith("//"):
+        # 排除 "http://..." 之类的 URL
+        return None
+    return match.group(1), match.group(2).strip()
+
+
+def normalize_field(name: str) -> str:
+    """规范化字段名（NFKC、小写、去除首尾标点）"""
+    return normalize_text(name).lower().strip(_FIELD_STRIP)
+
+
+class FieldIndex:
+    """
+    线程安全的字段索引
+
+    Attributes:
+        synonyms: 规范化的名称 -> 所在同义词组（包含自身）
+    """
+
+    def __init__(self, synonyms: Iterable[Iterable[str]] = DEFAULT_FIELD_SYNONYMS):
+        """
+        Args:
+            synonyms: 同义词组列表
+        """
+        self.synonyms: Dict[str, Tuple[str, ...]] = {}
+        for group in synonyms:
+            names = tuple(normalize_field(name) for name in group)
+            for name in names:
+                self.synonyms[name] = tuple(dict.fromkeys(self.synonyms.get(name, ()) + names))
+
+        self._sources: Dict[str, Dict[str, Tuple[str, str]]] = {}  # 来源 -> {规范化字段名: (字段名, 值)}
+        self._fields: Dict[str, List[FieldEntry]] = {}            # 规范化字段名 -> 各来源中的条目
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def _rebuild(self):
+        fields: Dict[str, List[FieldEntry]] = {}
+        for source, entries in self._sources.items():
+            for name, (key, value) in entries.items():
+                fields.setdefault(name, []).append(FieldEntry(key, value, source))
+        self._fields = fields
+
+    def replace_source(self, source: str, fields: Iterable[Tuple[str, str]]):
+        """
+        用新识别出的字段替换某个来源的全部字段
+
+        Args:
+            source: 来源文件
+            fields: (字段名, 值) 列表（同名字段保留最后一次出现的值）
+        """
+        entries = {normalize_field(key): (key, value) for key, value in fields}
+        with self._lock:
+            if self._sources.get(source, {}) == entries:
+                return
+            if entries:
+                self._sources[source] = entries
+            else:
+                self._sources.pop(source, None)
+            self._rebuild()
+            self.dirty = True
+
+    def remove_sources(self, sources: Iterable[str]):
+        """删除来源的全部字段"""
+        with self._lock:
+            removed = [source for source in sources if self._sources.pop(source, None) is not None]
+            if removed:
+                self._rebuild()
+                self.dirty = True
+
+    def sources(self) -> List[str]:
+        """已索引的来源文件"""
+        with self._lock:
+            return list(self._sources)
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._sources.clear()
+            self._fields.clear()
+            self.dirty = True
+
+    def scan(self, source: str, lines: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        """
+        透传行流，同时识别其中的字段行；行流完整读完后替换该来源的字段
+
+        Args:
+            source: 来源文件
+            lines: (行文本, 已读取字节数) 流
+
+        Yields:
+            Tuple[str, int]: 原样产出的行
+        """
+        fields = []
+        for line, bytes_read in lines:
+            field = parse_field_line(line) if line else None
+            if field is not None:
+                fields.append(field)
+            yield line, bytes_read
+        self.replace_source(source, fields)
+
+    def lookup(self, field: str) -> List[FieldEntry]:
+        """
+        查找字段
+
+        Args:
+            field: 字段名、同义词或包含字段名的问句
+
+        Returns:
+            List[FieldEntry]: 匹配的条目（可能来自多个来源），未找到时为空列表
+        """
+        name = normalize_field(field)
+        with self._lock:
+            # 1. 完全匹配 / 2. 同义词组匹配
+            for candidate in (name,) + self.synonyms.get(name, ()):
+                if candidate in self._fields:
+                    return list(self._fields[candidate])
+
+            # 3. 问句中包含字段名或同义词（优先匹配最长的名称）
+            names = sorted(set(self._fields) | set(self.synonyms), key=len, reverse=True)
+            for candidate in names:
+                if candidate and candidate in name:
+                    for key in (candidate,) + self.synonyms.get(candidate, ()):
+                        if key in self._fields:
+                            return list(self._fields[key])
+        return []
+
+    def save(self, path: str):
+        """将索引原子地写入 JSON 文件（未修改时跳过）"""
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            data = {source: list(entries.values()) for source, entries in self._sources.items()}
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+            self.dirty = False
+
+    def load(self, path: str):
+        """从 JSON 文件加载索引（文件不存在时忽略）"""
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._sources = {
+                source: {normalize_field(key): (key, value) for key, value in entries}
+                for source, entries in data.items()
+            }
+            self._rebuild()
+            self.dirty = False
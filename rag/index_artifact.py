@@ -0,0 +1,272 @@
+"""
+预构建索引模块 (Prebuilt Index Artifact Module)
+
+把知识库离线构建为一个带版本的索引目录，启动时以只读方式直接打开，
+不再读取、分段和同步知识库文件，也不需要加载 Embedding 模型：
+
+    <索引目录>/
+        manifest.json              构建清单（格式版本、模型、分段器参数、源文件哈希等）
+        <集合>.numpy/              向量矩阵 + 段落文本和元数据（NumpyVectorStore 快照，内存映射加载）
+        <集合>.lexical.json        词法索引（BM25）
+        <集合>.fields.json         字段索引
+
+加载时校验清单：
+- 格式版本、Embedding 模型、Embedding 推理后端（如 torch 构建、onnx 查询）或分段器参数
+  与当前配置不一致时拒绝加载（IndexArtifactError）
+- 源文件在构建后发生变化时只输出警告
+
+构建索引（知识库变化、或更换模型/分段器后重新执行）：
+    python -m rag.index_artifact qsh_profile.txt --output ./rag_index [--chunker paragraph] [--storage float16]
+
+启动时加载：设置环境变量 RAG_INDEX_ARTIFACT=./rag_index，或 init_rag_system(index_artifact="./rag_index")
+"""
+
+import os
+import json
+import time
+import argparse
+import shutil
+import hashlib
+from typing import Dict, List
+from .chunking import Chunker, get_chunker
+from .ingestion import DEFAULT_EXTENSIONS, iter_corpus_files
+from .model_registry import EMBEDDING_MODEL_NAME, get_embedding_model
+from utils.telemetry import get_logger
+
+logger = get_logger("RAG")
+
+# 索引目录格式版本（目录结构或快照格式不兼容地变化时递增）
+INDEX_FORMAT_VERSION = 1
+
+# 构建清单文件名
+MANIFEST_FILE = "manifest.json"
+
+
+class IndexArtifactError(ValueError):
+    """预构建索引缺失、损坏或与当前配置不匹配"""
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """按块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hashes(knowledge_path: str, extensions: tuple = DEFAULT_EXTENSIONS) -> Dict[str, str]:
+    """
+    计算知识库文件（或目录下所有文档）的哈希
+
+    Args:
+        knowledge_path: 知识库文件或目录
+        extensions: 目录中要包含的文件扩展名
+
+    Returns:
+        Dict[str, str]: 规范化路径（与段落元数据中的 source 一致） -> SHA-256
+    """
+    paths = iter_corpus_files(knowledge_path, extensions) if os.path.isdir(knowledge_path) else [knowledge_path]
+    return {os.path.normpath(path): file_sha256(path) for path in paths}
+
+
+def read_manifest(artifact_dir: str) -> Dict:
+    """
+    读取索引目录的构建清单
+
+    Args:
+        artifact_dir: 索引目录
+
+    Returns:
+        Dict: 构建清单
+
+    Raises:
+        IndexArtifactError: 清单不存在或无法解析
+    """
+    path = os.path.join(artifact_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise IndexArtifactError(f"预构建索引不存在或未构建完成: {artifact_dir}（缺少 {MANIFEST_FILE}）") from None
+    except ValueError as e:
+        raise IndexArtifactError(f"预构建索引清单无法解析: {path}（{e}）") from None
+
+
+def check_manifest(manifest: Dict, chunker="paragraph", model_name: str = EMBEDDING_MODEL_NAME):
+    """
+    校验构建清单与当前配置是否一致
+
+    Args:
+        manifest: read_manifest() 的返回值
+        chunker: 当前使用的分段器名称或 Chunker 实例
+        model_name: 当前使用的 Embedding 模型名称
+
+    Raises:
+        IndexArtifactError: 格式版本、模型、Embedding 推理后端或分段器参数不一致
+    """
+    # embedding 为推理后端标识（如 torch 与 onnx-int8）：不同后端的向量不在同一个空间中，
+    # 查询向量与索引中的向量不可比较
+    expected = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "model": model_name,
+        "embedding": get_embedding_model(model_name).cache_name,
+        "chunker": get_chunker(chunker).settings(),
+    }
+    mismatches = [
+        f"{key}: 索引为 {manifest.get(key)!r}，当前配置为 {value!r}"
+        for key, value in expected.items() if manifest.get(key) != value
+    ]
+    if mismatches:
+        raise IndexArtifactError("预构建索引与当前配置不匹配，请重新构建（python -m rag.index_artifact）:\n  "
+                                 + "\n  ".join(mismatches))
+
+
+def stale_sources(manifest: Dict, knowledge_path: str) -> List[str]:
+    """
+    找出构建后新增、修改或删除的源文件
+
+    Args:
+        manifest: 构建清单
+        knowledge_path: 知识库文件或目录
+
+    Returns:
+        List[str]: 已变化的源文件路径
+    """
+    built = manifest.get("sources", {})
+    current = source_hashes(knowledge_path)
+    return sorted(path for path in set(built) | set(current) if built.get(path) != current.get(path))
+
+
+def build_index_artifact(knowledge_path: str, output_dir: str, chunker="paragraph", storage: str = None,
+                         collection_name: str = "qsh_knowledge_base", batch_size: int = 32,
+                         num_workers: int = None, embedding_cache_dir: str = "./embedding_cache") -> Dict:
+    """
+    构建预构建索引
+
+    先在 <output_dir>.building 中完整构建（清单最后写入），成功后再替换 output_dir，
+    构建失败或中断时原有的索引保持不变。
+
+    Args:
+        knowledge_path: 知识库文件或目录
+        output_dir: 索引目录
+        chunker: 分段器名称（line / token / paragraph）或 Chunker 实例，默认 "paragraph"
+        storage: 向量存储精度（float32 / float16 / pq），默认读取 config.VECTOR_STORAGE
+        collection_name: 集合名称
+        batch_size: 批处理大小，默认32
+        num_workers: 向量化线程数，默认为 CPU 核心数的一半
+        embedding_cache_dir: Embedding 缓存目录（重复构建时未变化的段落不必重新向量化），为 None 时不使用
+
+    Returns:
+        Dict: 构建清单（知识库为空时 count 为 0）
+
+    Raises:
+        FileNotFoundError: 知识库文件不存在
+    """
+    from .rag_system_optimized import RAGSystemOptimized
+    from .vector_store import NumpyVectorStore
+
+    if not os.path.exists(knowledge_path):
+        raise FileNotFoundError(f"知识库文件 {knowledge_path} 不存在！")
+
+    output_dir = os.path.normpath(output_dir)
+    staging = output_dir + ".building"
+    shutil.rmtree(staging, ignore_errors=True)
+    # 知识库为空时向量存储不会写快照（persist 跳过未修改的存储），暂存目录要先建好才能写入清单
+    os.makedirs(staging, exist_ok=True)
+
+    start = time.perf_counter()
+    chunker: Chunker = get_chunker(chunker)
+    sources = source_hashes(knowledge_path)
+    store = NumpyVectorStore(collection_name, staging, storage=storage)
+    rag = RAGSystemOptimized(collection_name, db_path=staging, embedding_cache_dir=embedding_cache_dir,
+                             chunker=chunker, vector_store=store)
+    if os.path.isdir(knowledge_path):
+        rag.add_directory(knowledge_path, batch_size=batch_size, incremental=False, num_workers=num_workers)
+    else:
+        rag.add_document(knowledge_path, batch_size=batch_size, num_workers=num_workers)
+
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "collection": collection_name,
+        "model": EMBEDDING_MODEL_NAME,
+        "embedding": get_embedding_model(EMBEDDING_MODEL_NAME).cache_name,
+        "chunker": chunker.settings(),
+        "vector_store": store.name,
+        "storage": store.storage,
+        "count": store.count(),
+        "sources": sources,
+    }
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # 替换旧索引：构建完成后才改名，output_dir 中不会出现构建到一半的索引
+    previous = output_dir + ".old"
+    shutil.rmtree(previous, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.rename(output_dir, previous)
+    os.rename(staging, output_dir)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    logger.info(f"预构建索引已写入 {output_dir}（{manifest['count']} 条记录，"
+                f"耗时 {time.perf_counter() - start:.2f}s）")
+    return manifest
+
+
+def load_index_artifact(artifact_dir: str, chunker="paragraph", knowledge_path: str = None, **kwargs):
+    """
+    以只读方式打开预构建索引
+
+    Args:
+        artifact_dir: 索引目录
+        chunker: 当前配置的分段器名称或 Chunker 实例（必须与构建时一致）
+        knowledge_path: 知识库文件或目录；给出时检查源文件在构建后是否有变化（只输出警告）
+        **kwargs: 传给 RAGSystemOptimized 的其他参数（如 query_mode、min_score）
+
+    Returns:
+        RAGSystemOptimized: 只读的 RAG 系统实例
+
+    Raises:
+        IndexArtifactError: 索引缺失、损坏或与当前配置不匹配
+    """
+    from .rag_system_optimized import RAGSystemOptimized
+    from .vector_store import NumpyVectorStore
+
+    start = time.perf_counter()
+    manifest = read_manifest(artifact_dir)
+    check_manifest(manifest, chunker)
+
+    if knowledge_path is not None and os.path.exists(knowledge_path):
+        stale = stale_sources(manifest, knowledge_path)
+        if stale:
+            logger.warning(f"预构建索引构建后有 {len(stale)} 个源文件发生变化（如 {stale[0]}），"
+                           f"请重新构建（python -m rag.index_artifact）")
+
+    collection_name = manifest["collection"]
+    store = NumpyVectorStore(collection_name, artifact_dir, storage=manifest["storage"])
+    if store.count() != manifest["count"]:
+        raise IndexArtifactError(f"预构建索引已损坏: 清单记录 {manifest['count']} 条，向量快照中有 {store.count()} 条")
+
+    kwargs.setdefault("embedding_cache_dir", None)
+    rag = RAGSystemOptimized(collection_name, db_path=artifact_dir, chunker=chunker, vector_store=store,
+                             read_only=True, **kwargs)
+    logger.info(f"已只读加载预构建索引 {artifact_dir}（构建于 {manifest.get('created_at')}，"
+                f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms）")
+    return rag
+
+
+if __name__ == "__main__":
+    from .chunking import CHUNKERS
+    from .vector_store import VECTOR_STORAGE_DTYPES
+
+    parser = argparse.ArgumentParser(description="构建预构建索引（启动时只读加载）")
+    parser.add_argument("knowledge", help="知识库文件或目录")
+    parser.add_argument("--output", required=True, help="索引目录")
+    parser.add_argument("--chunker", default="paragraph", choices=list(CHUNKERS), help="分段器，默认 paragraph")
+    parser.add_argument("--storage", choices=list(VECTOR_STORAGE_DTYPES), help="向量存储精度，默认读取 RAG_VECTOR_STORAGE")
+    parser.add_argument("--batch-size", type=int, default=32, help="批处理大小，默认 32")
+    parser.add_argument("--workers", type=int, help="向量化线程数，默认为 CPU 核心数的一半")
+    args = parser.parse_args()
+    build_index_artifact(args.knowledge, args.output, chunker=args.chunker, storage=args.storage,
+                         batch_size=args.batch_size, num_workers=args.workers)
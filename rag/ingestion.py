@@ -0,0 +1,338 @@
+"""
+文档流式读取模块 (Streaming Ingestion Module)
+
+以生成器的方式逐行读取文档并按固定大小分批，
+使文档加载的峰值内存只与批大小有关，而与文件大小无关。
+
+支持的文件格式：
+- .txt / .md: 每个非空行为一个段落
+- .jsonl: 每行一个 JSON 对象，取 "text" 或 "content" 字段（或整行字符串）
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.telemetry import get_logger
+
+logger = get_logger("RAG")
+
+# 目录加载时默认包含的文件扩展名
+DEFAULT_EXTENSIONS = (".txt", ".md", ".jsonl")
+
+# jsonl 文件中依次尝试读取的文本字段
+JSONL_TEXT_FIELDS = ("text", "content")
+
+
+def _jsonl_text(line: str) -> str:
+    """从 jsonl 的一行中取出文本"""
+    record = json.loads(line)
+    if isinstance(record, str):
+        return record
+    for field in JSONL_TEXT_FIELDS:
+        if isinstance(record.get(field), str):
+            return record[field]
+    return ""
+
+
+def iter_lines(doc_path: str, encoding: str = "utf-8") -> Iterator[Tuple[str, int]]:
+    """
+    逐行读取文档（保留空行，供段落感知的分段器识别段落边界）
+
+    .jsonl 文件的每条记录视为一个独立段落（记录之后产出一个空行）。
+
+    Args:
+        doc_path: 文档文件路径
+        encoding: 文件编码，默认 utf-8
+
+    Yields:
+        Tuple[str, int]: (去除首尾空白的行文本, 截至该行已读取的字节数)
+    """
+    is_jsonl = doc_path.lower().endswith(".jsonl")
+    bytes_read = 0
+    # 以二进制方式读取，便于精确统计已读取的字节数
+    with open(doc_path, "rb") as f:
+        for raw_line in f:
+            bytes_read += len(raw_line)
+            line = raw_line.decode(encoding).strip()
+            if is_jsonl:
+                if line:
+                    yield _jsonl_text(line).strip(), bytes_read
+                yield "", bytes_read
+            else:
+                yield line, bytes_read
+
+
+def iter_paragraphs(doc_path: str, encoding: str = "utf-8") -> Iterator[Tuple[str, int]]:
+    """
+    逐行读取文档，产出非空段落
+
+    Args:
+        doc_path: 文档文件路径（.jsonl 文件按 JSON 行解析）
+        encoding: 文件编码，默认 utf-8
+
+    Yields:
+        Tuple[str, int]: (段落内容, 截至该段落已读取的字节数)
+    """
+    for line, bytes_read in iter_lines(doc_path, encoding):
+        if line:
+            yield line, bytes_read
+
+
+def iter_corpus_files(root: str, extensions: Tuple[str, ...] = DEFAULT_EXTENSIONS) -> Iterator[str]:
+    """
+    递归列出目录下所有支持的文档（按路径排序，结果稳定）
+
+    Args:
+        root: 目录路径
+        extensions: 要包含的文件扩展名
+
+    Yields:
+        str: 文件路径
+    """
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(extensions):
+                yield os.path.join(dir_path, file_name)
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[List]:
+    """
+    将任意可迭代对象按固定大小分批
+
+    Args:
+        items: 可迭代对象
+        batch_size: 批大小
+
+    Yields:
+        List: 每批最多 batch_size 个元素
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ChunkBatch:
+    """
+    一批待向量化并写入数据库的段落
+
+    Attributes:
+        ids: 段落ID列表
+        documents: 段落内容列表
+        metadatas: 段落元数据列表
+        paragraphs_read: 本批从文档中读取的段落数（包含被去重或跳过的段落）
+        bytes_read: 本批从文档中读取的字节数
+    """
+
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[Dict],
+                 paragraphs_read: int, bytes_read: int):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.paragraphs_read = paragraphs_read
+        self.bytes_read = bytes_read
+
+    def select(self, indices: List[int]) -> "ChunkBatch":
+        """
+        取出本批中的部分段落（读取统计保持不变）
+
+        Args:
+            indices: 要保留的段落下标
+
+        Returns:
+            ChunkBatch: 新的批次
+        """
+        return ChunkBatch(
+            [self.ids[i] for i in indices],
+            [self.documents[i] for i in indices],
+            [self.metadatas[i] for i in indices],
+            self.paragraphs_read,
+            self.bytes_read,
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def rebatch(batches: Iterable[ChunkBatch], batch_size: int) -> Iterator[ChunkBatch]:
+    """
+    将来自多个文件的小批次合并为固定大小的批次，供共享的向量化流水线使用
+
+    Args:
+        batches: 段落批次的可迭代对象
+        batch_size: 合并后的批大小
+
+    Yields:
+        ChunkBatch: 合并后的批次（最后一批可能不足 batch_size）
+    """
+    pending = ChunkBatch([], [], [], 0, 0)
+    for batch in batches:
+        pending.ids.extend(batch.ids)
+        pending.documents.extend(batch.documents)
+        pending.metadatas.extend(batch.metadatas)
+        pending.paragraphs_read += batch.paragraphs_read
+        pending.bytes_read += batch.bytes_read
+        while len(pending) >= batch_size:
+            yield pending.select(range(batch_size))
+            pending = ChunkBatch(
+                pending.ids[batch_size:], pending.documents[batch_size:], pending.metadatas[batch_size:], 0, 0
+            )
+    if len(pending) or pending.paragraphs_read:
+        yield pending
+
+
+class FileReport:
+    """
+    单个文件的加载统计
+
+    Attributes:
+        source: 文件路径
+        chunks: 文件产生的段落数（去重后）
+        written: 实际向量化并写入数据库的段落数（增量模式下只包含新增段落）
+        read_seconds: 读取与分段耗时（秒）
+        completed_at: 该文件最后一个段落写入数据库的时间（相对加载开始，秒）
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.chunks = 0
+        self.written = 0
+        self.read_seconds = 0.0
+        self.completed_at = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "chunks": self.chunks,
+            "written": self.written,
+            "read_seconds": round(self.read_seconds, 4),
+            "completed_at": None if self.completed_at is None else round(self.completed_at, 4),
+        }
+
+
+def iter_parallel(producers: List[Callable[[], Iterable]], num_workers: int = 4,
+                  queue_depth: int = 8) -> Iterator:
+    """
+    在线程池中并行运行多个生成器，按产出顺序合并它们的结果
+
+    Args:
+        producers: 无参函数列表，每个函数返回一个可迭代对象（如单个文件的批次生成器）
+        num_workers: 并行线程数
+        queue_depth: 合并队列深度（限制尚未被消费的元素数量）
+
+    Yields:
+        各生成器产出的元素（不同生成器之间交错）
+
+    Raises:
+        任一生成器抛出的第一个异常
+    """
+    results = queue.Queue(maxsize=max(1, queue_depth))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # 消费端已停止时放弃等待，避免线程永久阻塞
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(producer):
+        try:
+            for item in producer():
+                if not put(item):
+                    return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="rag-read") as executor:
+        for producer in producers:
+            executor.submit(run, producer)
+        try:
+            remaining = len(producers)
+            while remaining:
+                item = results.get()
+                if item is done:
+                    remaining -= 1
+                elif isinstance(item, BaseException):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+
+
+class IngestionProgress:
+    """
+    文档加载进度与吞吐量统计
+
+    Attributes:
+        total_bytes: 文档总字节数（用于计算进度百分比）
+        paragraphs: 已处理的段落数
+        bytes_read: 已读取的字节数
+    """
+
+    def __init__(self, doc_path: Optional[str] = None, report_interval: float = 2.0, total_bytes: int = None):
+        """
+        Args:
+            doc_path: 文档文件路径（用于获取总字节数）
+            report_interval: 进度输出的最小时间间隔（秒），默认 2 秒
+            total_bytes: 总字节数，加载多个文件时直接指定
+        """
+        self.total_bytes = total_bytes if total_bytes is not None else os.path.getsize(doc_path)
+        self.report_interval = report_interval
+        self.paragraphs = 0
+        self.bytes_read = 0
+        self._start = time.perf_counter()
+        self._last_report = self._start
+
+    @property
+    def elapsed(self) -> float:
+        """已耗时（秒）"""
+        return time.perf_counter() - self._start
+
+    def update(self, paragraphs: int, bytes_read: int):
+        """
+        更新进度，距上次输出超过 report_interval 时打印一次进度
+
+        Args:
+            paragraphs: 本批处理的段落数
+            bytes_read: 本批读取的字节数
+        """
+        self.paragraphs += paragraphs
+        self.bytes_read += bytes_read
+
+        now = time.perf_counter()
+        if now - self._last_report >= self.report_interval:
+            self._last_report = now
+            logger.info(f"已处理 {self.paragraphs} 个段落 ({self._percent():.1f}%)，"
+                        f"{self.paragraphs / self.elapsed:.1f} 段落/秒")
+
+    def summary(self) -> str:
+        """
+        生成最终统计信息
+
+        Returns:
+            str: 包含段落数、耗时和吞吐量的描述
+        """
+        elapsed = max(self.elapsed, 1e-9)
+        return (f"共 {self.paragraphs} 个段落，耗时 {elapsed:.2f} 秒，"
+                f"{self.paragraphs / elapsed:.1f} 段落/秒，"
+                f"{self.bytes_read / elapsed / 1024 / 1024:.2f} MB/秒")
+
+    def _percent(self) -> float:
+        if self.total_bytes == 0:
+            return 100.0
+        return self.bytes_read * 100.0 / self.total_bytes
@@ -5,26 +5,48 @@ RAG系统初始化器 (RAG System Initializer)
 """
 
 import os
-from .rag_system_optimized import RAGSystemOptimized  # 使用优化版本
+from typing import TYPE_CHECKING
+from utils.telemetry import get_logger
+
+if TYPE_CHECKING:
+    from .rag_system_optimized import RAGSystemOptimized
+
+logger = get_logger("RAG")
 
 # 全局 RAG 系统实例（单例模式）
 _rag_instance = None
 
 
-def init_rag_system(knowledge_file: str = "qsh_profile.txt", force_reload: bool = True, batch_size: int = 32) -> RAGSystemOptimized:
+def init_rag_system(knowledge_file: str = "qsh_profile.txt", force_reload: bool = False, batch_size: int = 32,
+                    num_workers: int = None, queue_depth: int = 4, chunker="paragraph",
+                    vector_store=None, index_artifact: str = None) -> "RAGSystemOptimized":
     """
     初始化全局 RAG 系统并加载知识库文档（使用优化版本）
 
+    默认使用增量同步模式：只为新增或变化的段落生成embeddings，
+    并删除源文件中已不存在的段落，知识库未变化时重启几乎零开销。
+
+    knowledge_file 也可以是目录，此时递归加载目录下所有 txt / md / jsonl 文件。
+
+    指定预构建索引（index_artifact，见 index_artifact 模块）时直接以只读方式打开索引，
+    不读取和同步知识库文件；索引的模型或分段器与当前配置不一致时拒绝加载。
+
     Args:
-        knowledge_file: 知识库文件路径，默认为 "qsh_profile.txt"
-        force_reload: 是否强制重新加载（清空旧数据），默认为 True
+        knowledge_file: 知识库文件或目录路径，默认为 "qsh_profile.txt"
+        force_reload: 是否强制重新加载（清空旧数据后全量重建），默认为 False（增量同步）
         batch_size: 批处理大小，默认为32（根据内存调整）
+        num_workers: 向量化线程数，默认为 CPU 核心数的一半
+        queue_depth: 加载流水线阶段间队列深度，默认为4
+        chunker: 分段器名称（line / token / paragraph）或 Chunker 实例，默认为 "paragraph"
+        vector_store: 向量存储后端（chroma / numpy）或 VectorStore 实例，默认读取 config.VECTOR_STORE
+        index_artifact: 预构建索引目录，默认读取 config.INDEX_ARTIFACT（为空时不使用）
 
     Returns:
         RAGSystemOptimized: 初始化完成的 RAG 系统实例（优化版本）
 
     Raises:
         FileNotFoundError: 如果知识库文件不存在
+        IndexArtifactError: 预构建索引缺失、损坏或与当前配置不匹配
     """
     global _rag_instance
 
@@ -32,27 +54,48 @@ def init_rag_system(knowledge_file: str = "qsh_profile.txt", force_reload: bool
     print("初始化 RAG 知识库系统（优化版本）")
     print("-" * 60)
 
+    if index_artifact is None:
+        from config import rag_config
+        index_artifact = rag_config.INDEX_ARTIFACT
+    if index_artifact:
+        # 预构建索引：只读加载，知识库文件只用于检查索引是否过期
+        from .index_artifact import load_index_artifact
+        _rag_instance = load_index_artifact(index_artifact, chunker=chunker, knowledge_path=knowledge_file)
+        logger.info(f"知识库初始化完成，共 {_rag_instance.get_collection_count()} 条记录")
+        print("-" * 60)
+        return _rag_instance
+
     # 检查知识库文件是否存在
     if not os.path.exists(knowledge_file):
         raise FileNotFoundError(f"知识库文件 {knowledge_file} 不存在！")
 
-    # 初始化 RAG 系统（优化版本）
-    _rag_instance = RAGSystemOptimized()
-
-    # 如果需要强制重新加载，清空旧数据
-    if force_reload:
+    # 初始化 RAG 系统（优化版本；在此处导入，使 get_rag_instance 等轻量接口不依赖 chromadb）
+    from .rag_system_optimized import RAGSystemOptimized
+    _rag_instance = RAGSystemOptimized(chunker=chunker, vector_store=vector_store)
+
+    if os.path.isdir(knowledge_file):
+        # 目录：并行加载所有文件（增量模式会删除已不存在的文件）
+        if force_reload:
+            _rag_instance.clear_collection()
+        _rag_instance.add_directory(knowledge_file, batch_size=batch_size, incremental=not force_reload,
+                                    num_workers=num_workers, queue_depth=queue_depth)
+    elif force_reload:
+        # 强制重新加载：清空旧数据后全量加载（使用批量处理）
         _rag_instance.clear_collection()
-
-    # 加载知识库文档（使用批量处理）
-    _rag_instance.add_document(knowledge_file, batch_size=batch_size)
-
-    print(f"[RAG] 知识库初始化完成，共 {_rag_instance.get_collection_count()} 条记录")
+        _rag_instance.add_document(knowledge_file, batch_size=batch_size,
+                                   num_workers=num_workers, queue_depth=queue_depth)
+    else:
+        # 增量同步：只处理新增/变化/删除的段落
+        _rag_instance.sync_document(knowledge_file, batch_size=batch_size,
+                                    num_workers=num_workers, queue_depth=queue_depth)
+
+    logger.info(f"知识库初始化完成，共 {_rag_instance.get_collection_count()} 条记录")
     print("-" * 60)
 
     return _rag_instance
 
 
-def get_rag_instance() -> RAGSystemOptimized:
+def get_rag_instance() -> "RAGSystemOptimized":
     """
     获取全局 RAG 系统实例
 
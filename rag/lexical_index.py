@@ -0,0 +1,217 @@
+"""
+词法索引模块 (Lexical Index Module)
+
+基于倒排索引的 BM25 检索，作为向量检索的补充：
+1. CJK 友好的切分：连续的中日韩文字切为字符二元组（单个字符时保留一元组），
+   字母数字串按小写整词，标点忽略
+2. 问题中的疑问词/虚词（"是多少"、"什么"、"吗" 等）在切分前去掉，只保留有区分度的词
+3. 每条命中附带覆盖率（命中的查询词 idf 权重占比），用于判断词法匹配是否足够可信
+
+索引随文档加载增量维护，并以 JSON 快照保存（只保存每个段落的词频，倒排表在加载时重建）。
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, namedtuple
+from typing import Dict, Iterable, List
+from .chunking import _CJK_RANGES
+from .embedding_cache import normalize_text
+
+_CJK_RUN_RE = re.compile(rf"[{_CJK_RANGES}]+")
+_WORD_RE = re.compile(rf"[^\W{_CJK_RANGES}]+")
+
+# 查询时去掉的疑问词/虚词（逐字匹配）
+_QUERY_STOP_CHARS = "的了吗呢吧啊呀是有什么怎样多少哪几谁请问告诉我他她它"
+_QUERY_STOP_RE = re.compile(f"[{_QUERY_STOP_CHARS}]")
+
+# 词法检索结果：段落ID、BM25 分数、覆盖率（命中的查询词 idf 之和 / 索引中出现过的查询词 idf 之和）
+LexicalHit = namedtuple("LexicalHit", ["id", "score", "coverage"])
+
+
+def lexical_tokens(text: str, query: bool = False) -> List[str]:
+    """
+    将文本切分为词法索引使用的词项
+
+    Args:
+        text: 文本
+        query: 是否为查询文本（是则先去掉疑问词/虚词）
+
+    Returns:
+        List[str]: 词项列表（CJK 二元组 / 一元组、小写的字母数字串）
+    """
+    text = normalize_text(text).lower()
+    if query:
+        text = _QUERY_STOP_RE.sub(" ", text)
+
+    tokens = _WORD_RE.findall(text)
+    for run in _CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    线程安全的 BM25 倒排索引
+
+    Attributes:
+        k1: 词频饱和参数
+        b: 文档长度归一化参数
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}   # 词项 -> {段落ID: 词频}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}  # 段落ID -> {词项: 词频}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def _remove(self, chunk_id: str):
+        terms = self._doc_terms.pop(chunk_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(chunk_id)
+
+    def _add_terms(self, chunk_id: str, terms: Dict[str, int]):
+        self._remove(chunk_id)
+        self._doc_terms[chunk_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[chunk_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[chunk_id] = tf
+
+    def add(self, ids: Iterable[str], documents: Iterable[str]):
+        """
+        添加或更新段落
+
+        Args:
+            ids: 段落ID
+            documents: 段落文本
+        """
+        with self._lock:
+            for chunk_id, document in zip(ids, documents):
+                self._add_terms(chunk_id, dict(Counter(lexical_tokens(document))))
+            self.dirty = True
+
+    def remove(self, ids: Iterable[str]):
+        """删除段落（不存在的ID会被忽略）"""
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+            self.dirty = True
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._total_length = 0
+            self.dirty = True
+
+    def _idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self._doc_terms) - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 10) -> List[LexicalHit]:
+        """
+        BM25 检索
+
+        Args:
+            query: 查询文本
+            k: 返回的最大结果数
+
+        Returns:
+            List[LexicalHit]: 按分数从高到低排列的命中结果
+        """
+        terms = set(lexical_tokens(query, query=True))
+        with self._lock:
+            terms = [term for term in terms if term in self._postings]
+            if not terms:
+                return []
+
+            avg_length = self._total_length / len(self._doc_terms)
+            scores: Dict[str, float] = {}
+            matched: Dict[str, float] = {}
+            total_idf = 0.0
+            for term in terms:
+                idf = self._idf(term)
+                total_idf += idf
+                for chunk_id, tf in self._postings[term].items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[chunk_id] / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+                    matched[chunk_id] = matched.get(chunk_id, 0.0) + idf
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:k]
+        return [
+            LexicalHit(chunk_id, scores[chunk_id], matched[chunk_id] / total_idf if total_idf else 1.0)
+            for chunk_id in ranked
+        ]
+
+    @staticmethod
+    def is_confident(hits: List[LexicalHit], min_coverage: float = 0.7, min_margin: float = 1.5) -> bool:
+        """
+        判断词法检索结果是否足够可信（可以跳过向量检索）
+
+        条件：第一条结果覆盖了（索引中出现过的）查询词的大部分 idf 权重
+        （只缺少在很多段落中都出现的词，如人名），并且只有一条结果或分数明显高于第二条。
+
+        Args:
+            hits: search() 的返回值
+            min_coverage: 第一条结果的最低覆盖率
+            min_margin: 第一条与第二条结果的最低分数比
+
+        Returns:
+            bool: 是否可信
+        """
+        if not hits or hits[0].coverage < min_coverage:
+            return False
+        return len(hits) == 1 or hits[0].score >= min_margin * hits[1].score
+
+    def save(self, path: str):
+        """将索引原子地写入 JSON 文件（未修改时跳过）"""
+        with self._lock:
+            if not self.dirty:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"k1": self.k1, "b": self.b, "doc_terms": self._doc_terms}, f, ensure_ascii=False)
+            os.replace(path + ".tmp", path)
+            self.dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        从 JSON 文件加载索引（文件不存在时返回空索引）
+
+        Args:
+            path: 索引文件路径
+
+        Returns:
+            BM25Index: 索引实例
+        """
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data.get("k1", 1.5), b=data.get("b", 0.75))
+        for chunk_id, terms in data["doc_terms"].items():
+            index._add_terms(chunk_id, terms)
+        return index
@@ -0,0 +1,244 @@
+"""
+Embedding模型注册表 (Embedding Model Registry)
+
+进程内共享的 Embedding 模型管理：
+1. 延迟加载：创建 RAG 实例时不加载模型，第一次 encode 时才加载
+2. 全局共享：同名模型在进程内只加载一次，所有 RAG 实例和集合共用
+3. 预热与卸载：提供显式的预热接口，以及空闲一段时间后卸载模型释放内存的接口
+4. 可选后端：torch（sentence-transformers，默认）或 onnx（onnxruntime，见 onnx_backend），
+   通过 config.EMBEDDING_BACKEND 选择
+"""
+
+import time
+import threading
+from typing import Dict, List, Tuple
+from utils.telemetry import get_logger, span
+
+logger = get_logger("RAG")
+
+# 默认 Embedding 模型名称
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+# 全局模型注册表（(模型名称, 后端) -> LazyEmbeddingModel）
+_models: Dict[Tuple[str, str], "LazyEmbeddingModel"] = {}
+_registry_lock = threading.Lock()
+
+
+class LazyEmbeddingModel:
+    """
+    延迟加载的 Embedding 模型代理
+
+    提供与 SentenceTransformer 相同的 encode 接口，第一次调用时才真正加载模型。
+
+    Attributes:
+        model_name: 模型名称
+        backend: 推理后端名称
+        cache_name: Embedding 缓存使用的模型标识（不同后端的向量分开缓存）
+        last_used: 最近一次使用的时间戳（time.monotonic）
+    """
+
+    backend = "torch"
+
+    def __init__(self, model_name: str):
+        """
+        Args:
+            model_name: 模型名称（传给 SentenceTransformer）
+        """
+        self.model_name = model_name
+        self.cache_name = model_name
+        self.last_used = time.monotonic()
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """模型是否已加载"""
+        return self._model is not None
+
+    def _load_model(self):
+        """加载底层模型（子类可覆盖以使用其他后端）"""
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name)
+
+    def load(self):
+        """
+        加载模型（已加载时直接返回）
+
+        Returns:
+            底层模型实例
+        """
+        model = self._model
+        if model is not None:
+            return model
+        with self._lock:
+            if self._model is None:
+                logger.info(f"加载 Embedding 模型: {self.model_name} (后端: {self.backend})")
+                with span("model_load", backend=self.backend):
+                    start = time.perf_counter()
+                    self._model = self._load_model()
+                logger.info(f"Embedding 模型加载完成，耗时 {time.perf_counter() - start:.2f} 秒")
+            return self._model
+
+    def unload(self) -> bool:
+        """
+        卸载模型，释放内存（下次 encode 时会重新加载）
+
+        Returns:
+            bool: 是否确实卸载了模型
+        """
+        with self._lock:
+            if self._model is None:
+                return False
+            self._model = None
+            logger.info(f"已卸载 Embedding 模型: {self.model_name}")
+            return True
+
+    def encode(self, sentences, **kwargs):
+        """
+        生成 embeddings（参数与 SentenceTransformer.encode 相同）
+        """
+        model = self.load()
+        self.last_used = time.monotonic()
+        return model.encode(sentences, **kwargs)
+
+    def __getattr__(self, name):
+        # 其他属性（如 get_sentence_embedding_dimension）透传给底层模型
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+class OnnxLazyEmbeddingModel(LazyEmbeddingModel):
+    """
+    延迟加载的 ONNX Embedding 模型代理（onnxruntime，CPU 推理）
+
+    Attributes:
+        model_dir: 导出的 ONNX 模型目录
+        quantized: 是否使用 int8 量化模型
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_name: str, model_dir: str, quantized: bool = True):
+        """
+        Args:
+            model_name: 模型名称（导出时使用的 sentence-transformers 模型）
+            model_dir: 导出的 ONNX 模型目录
+            quantized: 是否使用 int8 量化模型
+        """
+        super().__init__(model_name)
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.cache_name = f"{model_name}@onnx-{'int8' if quantized else 'fp32'}"
+
+    def _load_model(self):
+        from .onnx_backend import OnnxEmbeddingModel
+        return OnnxEmbeddingModel(self.model_dir, quantized=self.quantized)
+
+
+def get_embedding_model(model_name: str = EMBEDDING_MODEL_NAME, backend: str = None) -> LazyEmbeddingModel:
+    """
+    获取进程内共享的 Embedding 模型（不会立即加载）
+
+    Args:
+        model_name: 模型名称，默认 all-MiniLM-L6-v2
+        backend: 推理后端（"torch" 或 "onnx"），默认读取 config.EMBEDDING_BACKEND
+
+    Returns:
+        LazyEmbeddingModel: 共享的模型代理
+
+    Raises:
+        ValueError: 未知的推理后端
+    """
+    from config import rag_config
+
+    backend = backend or rag_config.EMBEDDING_BACKEND
+    if backend not in ("torch", "onnx"):
+        raise ValueError(f"未知的 Embedding 后端: {backend}（可选: torch, onnx）")
+
+    with _registry_lock:
+        model = _models.get((model_name, backend))
+        if model is None:
+            if backend == "onnx":
+                model = OnnxLazyEmbeddingModel(model_name, rag_config.ONNX_MODEL_DIR, rag_config.ONNX_QUANTIZED)
+            else:
+                model = LazyEmbeddingModel(model_name)
+            _models[(model_name, backend)] = model
+        return model
+
+
+def warmup_embedding_model(model_name: str = EMBEDDING_MODEL_NAME, background: bool = False, backend: str = None):
+    """
+    预热 Embedding 模型：加载模型并执行一次 encode，使后续第一次检索不再等待加载
+
+    Args:
+        model_name: 模型名称
+        background: 是否在后台线程中预热，默认 False
+        backend: 推理后端，默认读取 config.EMBEDDING_BACKEND
+
+    Returns:
+        background 为 True 时返回预热线程，否则返回 None
+    """
+    model = get_embedding_model(model_name, backend)
+
+    def run():
+        model.encode(["warmup"], show_progress_bar=False)
+
+    if background:
+        thread = threading.Thread(target=run, name="rag-warmup", daemon=True)
+        thread.start()
+        return thread
+    run()
+    return None
+
+
+def unload_embedding_model(model_name: str = None) -> List[str]:
+    """
+    卸载指定模型（model_name 为 None 时卸载所有模型）
+
+    Args:
+        model_name: 模型名称
+
+    Returns:
+        List[str]: 实际被卸载的模型名称
+    """
+    with _registry_lock:
+        models = [m for m in _models.values() if model_name is None or m.model_name == model_name]
+    return [m.model_name for m in models if m.unload()]
+
+
+def unload_idle_models(max_idle_seconds: float) -> List[str]:
+    """
+    卸载超过 max_idle_seconds 未使用的模型
+
+    Args:
+        max_idle_seconds: 最长空闲时间（秒）
+
+    Returns:
+        List[str]: 被卸载的模型名称
+    """
+    now = time.monotonic()
+    with _registry_lock:
+        idle = [m for m in _models.values() if m.is_loaded and now - m.last_used > max_idle_seconds]
+    return [m.model_name for m in idle if m.unload()]
+
+
+def start_idle_unloader(max_idle_seconds: float = 600, interval: float = 60) -> threading.Thread:
+    """
+    启动后台线程，定期卸载空闲的模型
+
+    Args:
+        max_idle_seconds: 最长空闲时间（秒），默认 10 分钟
+        interval: 检查间隔（秒），默认 1 分钟
+
+    Returns:
+        threading.Thread: 后台线程（守护线程，随进程退出）
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            unload_idle_models(max_idle_seconds)
+
+    thread = threading.Thread(target=run, name="rag-idle-unloader", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,189 @@
+"""
+ONNX Embedding后端 (ONNX Embedding Backend)
+
+使用 onnxruntime 在 CPU 上运行导出的 all-MiniLM-L6-v2，可选 int8 动态量化。
+与 sentence-transformers 的计算流程保持一致：Transformer → 均值池化 → L2 归一化，
+并提供与 SentenceTransformer.encode 相同的调用接口。
+
+导出模型（需要 torch + sentence-transformers，只需执行一次）：
+    python -m rag.onnx_backend --output ./onnx_models/all-MiniLM-L6-v2 --quantize
+
+运行时依赖：onnxruntime、tokenizers（不需要 torch）
+
+目录结构：
+- model.onnx: fp32 模型
+- model_quantized.onnx: int8 动态量化模型（--quantize 时生成）
+- tokenizer.json: 分词器
+- onnx_config.json: 模型名称、最大序列长度等信息
+"""
+
+import os
+import json
+import argparse
+from typing import List
+import numpy as np
+from utils.telemetry import get_logger
+
+logger = get_logger("ONNX")
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+
+
+class OnnxEmbeddingModel:
+    """
+    基于 onnxruntime 的 Embedding 模型
+
+    Attributes:
+        model_dir: 导出的模型目录
+        quantized: 是否使用 int8 量化模型
+        max_seq_length: 最大序列长度（超出部分截断）
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: int = None):
+        """
+        Args:
+            model_dir: 导出的模型目录
+            quantized: 是否使用 int8 量化模型，默认 True
+            num_threads: onnxruntime 算子内线程数，默认由 onnxruntime 决定
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir
+        self.quantized = quantized
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.max_seq_length = self.config.get("max_seq_length", 256)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """向量维度"""
+        return self.config["dimension"]
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """对一批文本执行推理、均值池化和 L2 归一化"""
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # 均值池化（只统计非 padding 的 token）
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        # L2 归一化
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return (embeddings / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """
+        生成 embeddings（接口与 SentenceTransformer.encode 一致）
+
+        Args:
+            sentences: 单个文本或文本列表
+            batch_size: 推理批大小，默认 32
+            show_progress_bar: 兼容参数（不使用）
+            convert_to_numpy: 兼容参数（始终返回 numpy 数组）
+
+        Returns:
+            np.ndarray: 单个文本返回一维向量，文本列表返回二维矩阵
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # 按长度排序后分批，减少 padding 带来的无效计算
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        result = np.empty((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            result[indices] = self._encode_batch([texts[i] for i in indices])
+        return result[0] if single else result
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14):
+    """
+    将 sentence-transformers 模型导出为 ONNX（可选 int8 动态量化）
+
+    Args:
+        model_name: sentence-transformers 模型名称
+        output_dir: 输出目录
+        quantize: 是否同时生成 int8 量化模型，默认 True
+        opset: ONNX opset 版本，默认 14
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0]
+    auto_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    dummy = tokenizer(["导出 ONNX 模型", "export"], padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    logger.info(f"正在导出模型 {model_name} -> {model_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            auto_model,
+            (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "dimension": st_model.get_sentence_embedding_dimension(),
+        }, f, ensure_ascii=False, indent=2)
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+        logger.info(f"正在生成 int8 量化模型 -> {quantized_path}")
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+
+    logger.info("导出完成")
+
+
+if __name__ == "__main__":
+    from .model_registry import EMBEDDING_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="导出 ONNX 版本的 Embedding 模型")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="sentence-transformers 模型名称")
+    parser.add_argument("--output", required=True, help="输出目录")
+    parser.add_argument("--quantize", action="store_true", help="同时生成 int8 动态量化模型")
+    args = parser.parse_args()
+    export_onnx_model(args.model, args.output, quantize=args.quantize)
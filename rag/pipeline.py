@@ -0,0 +1,172 @@
+"""
+流水线式文档加载模块 (Pipelined Ingestion Module)
+
+将文档加载拆分为三个并行阶段，阶段之间通过有界队列连接：
+
+    读取/分段 (reader 线程) → 向量化 (encode 线程池) → 写入数据库 (writer 线程)
+
+第 N 批写入数据库的同时，第 N+1 批已经在向量化，多个批次可在多个核心上同时向量化。
+队列深度限制了在途批次的数量，因此内存占用仍然有界。
+PyTorch 在矩阵运算时会释放 GIL，所以使用线程池即可利用多核。
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable
+
+# 队列结束标记
+_SENTINEL = object()
+
+
+def default_num_workers() -> int:
+    """
+    默认的向量化线程数（CPU 核心数的一半，至少 1，最多 8）
+
+    Returns:
+        int: 线程数
+    """
+    return max(1, min(8, (os.cpu_count() or 2) // 2))
+
+
+@contextmanager
+def torch_thread_limit(num_workers: int, backend: str = "torch"):
+    """
+    在上下文中按向量化线程数划分 PyTorch 的算子内线程数，避免多个线程争抢同一批核心；
+    退出时恢复原来的线程数（该设置对整个进程生效，不能留给之后的检索使用）
+
+    非 torch 后端（如 onnx）不导入 torch，直接跳过。
+
+    Args:
+        num_workers: 向量化线程数
+        backend: Embedding 推理后端名称（见 LazyEmbeddingModel.backend）
+    """
+    if backend != "torch":
+        yield
+        return
+    try:
+        import torch
+    except ImportError:
+        yield
+        return
+    previous = torch.get_num_threads()
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // num_workers))
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+class IngestionPipeline:
+    """
+    读取 → 向量化 → 写入 三阶段流水线
+
+    Attributes:
+        num_workers: 向量化线程数
+        queue_depth: 每个阶段间队列的最大长度（即最多有多少个批次在途）
+    """
+
+    def __init__(self, encode_fn: Callable[[Any], Any], write_fn: Callable[[Any, Any], None],
+                 num_workers: int = None, queue_depth: int = 4):
+        """
+        Args:
+            encode_fn: 向量化函数，参数为一个批次，返回该批次的 embeddings
+            write_fn: 写入函数，参数为 (批次, embeddings)，按批次的原始顺序调用
+            num_workers: 向量化线程数，默认见 default_num_workers()
+            queue_depth: 阶段间队列深度，默认 4
+        """
+        self.encode_fn = encode_fn
+        self.write_fn = write_fn
+        self.num_workers = num_workers or default_num_workers()
+        self.queue_depth = max(1, queue_depth)
+        self._error = None
+        self._stop = threading.Event()
+
+    def _put(self, q: queue.Queue, item):
+        """向有界队列放入元素；其他阶段出错时放弃等待"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        """从队列取出元素；其他阶段出错时返回结束标记"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _fail(self, error: BaseException):
+        """记录第一个错误并通知所有阶段停止"""
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _reader(self, batches: Iterable, read_queue: queue.Queue):
+        try:
+            for batch in batches:
+                if not self._put(read_queue, batch):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(read_queue, _SENTINEL)
+
+    def _writer(self, write_queue: queue.Queue):
+        try:
+            while True:
+                item = self._get(write_queue)
+                if item is _SENTINEL:
+                    return
+                batch, future = item
+                self.write_fn(batch, future.result())
+        except BaseException as e:
+            self._fail(e)
+
+    def run(self, batches: Iterable) -> int:
+        """
+        运行流水线直到所有批次写入完成
+
+        Args:
+            batches: 批次的可迭代对象（通常是生成器，在 reader 线程中迭代）
+
+        Returns:
+            int: 处理的批次数
+
+        Raises:
+            任一阶段抛出的第一个异常
+        """
+        read_queue = queue.Queue(maxsize=self.queue_depth)
+        write_queue = queue.Queue(maxsize=self.queue_depth)
+
+        reader = threading.Thread(target=self._reader, args=(batches, read_queue), daemon=True)
+        writer = threading.Thread(target=self._writer, args=(write_queue,), daemon=True)
+        reader.start()
+        writer.start()
+
+        batch_count = 0
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="rag-encode") as executor:
+            # 主线程负责调度：从读取队列取批次，提交向量化任务，按顺序交给 writer
+            # write_queue 有界，因此同时在向量化的批次数不超过 queue_depth
+            while True:
+                batch = self._get(read_queue)
+                if batch is _SENTINEL:
+                    break
+                future = executor.submit(self.encode_fn, batch)
+                if not self._put(write_queue, (batch, future)):
+                    break
+                batch_count += 1
+            self._put(write_queue, _SENTINEL)
+            writer.join()
+            reader.join()
+
+        if self._error is not None:
+            raise self._error
+        return batch_count
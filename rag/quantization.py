@@ -0,0 +1,143 @@
+"""
+向量量化模块 (Vector Quantization Module)
+
+乘积量化（Product Quantization, PQ）：把 d 维向量切成 m 段，每段用 k-means 训练一个
+最多 256 个中心的码本，向量压缩为 m 个 uint8 编码（每个向量 m 字节）。
+
+检索时先对每个查询计算一张 (m, 256) 的距离表，再用查表求和得到所有向量的
+近似平方 L2 距离（ADC，非对称距离计算），只对排名靠前的候选用原始向量重新精确排序。
+"""
+
+from typing import Optional
+import numpy as np
+
+# 每段码本的最大中心数（编码为 uint8）
+PQ_MAX_CENTROIDS = 256
+
+
+def _choose_subspaces(dim: int, subspaces: int) -> int:
+    """选择不超过 subspaces、且能整除 dim 的最大段数"""
+    for m in range(min(subspaces, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd k-means（随机样本初始化），返回 (k, d) 的中心矩阵"""
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        # |x - c|^2 = |x|^2 - 2 x·c + |c|^2（|x|^2 对 argmin 无影响，省略）
+        distances = (centroids ** 2).sum(axis=1)[None, :] - 2.0 * (data @ centroids.T)
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, data)
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+        # 空簇重新随机取一个样本作为中心
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+    return centroids
+
+
+class ProductQuantizer:
+    """
+    乘积量化器
+
+    Attributes:
+        subspaces: 期望的分段数（实际段数为能整除向量维度的最大值）
+        codebooks: (m, 中心数, 段维度) 码本，训练前为 None
+        trained_size: 训练时的向量总数（超过 max_train 时只采样其中一部分）
+    """
+
+    def __init__(self, subspaces: int = 8, iterations: int = 20, max_train: int = 20000, seed: int = 0):
+        """
+        Args:
+            subspaces: 分段数，默认 8
+            iterations: k-means 迭代次数，默认 20
+            max_train: 训练时最多采样的向量数，默认 20000
+            seed: 随机种子
+        """
+        self.subspaces = subspaces
+        self.iterations = iterations
+        self.max_train = max_train
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None
+        self.trained_size = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def fit(self, vectors: np.ndarray) -> "ProductQuantizer":
+        """
+        训练码本
+
+        Args:
+            vectors: (n, d) 训练向量
+
+        Returns:
+            ProductQuantizer: self
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.trained_size = len(vectors)
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.max_train:
+            vectors = vectors[rng.choice(len(vectors), size=self.max_train, replace=False)]
+
+        m = _choose_subspaces(vectors.shape[1], self.subspaces)
+        k = min(PQ_MAX_CENTROIDS, len(vectors))
+        parts = np.split(vectors, m, axis=1)
+        self.codebooks = np.stack([_kmeans(part, k, self.iterations, rng) for part in parts])
+        return self
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        将向量编码为 PQ 编码
+
+        Args:
+            vectors: (n, d) 向量
+
+        Returns:
+            np.ndarray: (n, m) uint8 编码
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        m = len(self.codebooks)
+        codes = np.empty((len(vectors), m), dtype=np.uint8)
+        for j, part in enumerate(np.split(vectors, m, axis=1)):
+            centroids = self.codebooks[j]
+            distances = (centroids ** 2).sum(axis=1)[None, :] - 2.0 * (part @ centroids.T)
+            codes[:, j] = distances.argmin(axis=1)
+        return codes
+
+    def distance_table(self, query: np.ndarray) -> np.ndarray:
+        """
+        计算查询向量每一段到各中心的平方距离
+
+        Args:
+            query: (d,) 查询向量
+
+        Returns:
+            np.ndarray: (m, 中心数) 距离表
+        """
+        m = len(self.codebooks)
+        parts = np.split(np.asarray(query, dtype=np.float32), m)
+        return np.stack([((self.codebooks[j] - part) ** 2).sum(axis=1) for j, part in enumerate(parts)])
+
+    def approximate_distances(self, table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """
+        查表计算近似平方 L2 距离（ADC）
+
+        Args:
+            table: distance_table() 的返回值
+            codes: (n, m) PQ 编码
+
+        Returns:
+            np.ndarray: (n,) 近似距离
+        """
+        distances = np.zeros(len(codes), dtype=np.float32)
+        for j in range(table.shape[0]):
+            distances += table[j, codes[:, j]]
+        return distances
@@ -0,0 +1,81 @@
+"""
+检索缓存模块 (Query Cache Module)
+
+为 RAG 检索提供进程内的 LRU 缓存：
+1. 问题向量缓存：相同（规范化后）的问题只向量化一次
+2. 检索结果缓存：键中包含集合版本号，集合被修改后旧结果自动失效
+
+问题规范化在 Embedding 缓存的规范化（NFKC + 空白折叠）基础上，
+额外忽略大小写和末尾的标点，使 "鞋码是多少？" 与 "鞋码是多少" 命中同一条缓存。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+from .embedding_cache import normalize_text
+
+# 规范化问题时去除的末尾标点
+_TRAILING_PUNCTUATION = "?？!！.。,，;；:：~～ "
+
+
+def normalize_question(question: str) -> str:
+    """
+    规范化问题文本（用作检索缓存的键）
+
+    Args:
+        question: 原始问题
+
+    Returns:
+        str: 规范化后的问题
+    """
+    return normalize_text(question).lower().rstrip(_TRAILING_PUNCTUATION)
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存
+
+    Attributes:
+        maxsize: 最大条目数
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Args:
+            maxsize: 最大条目数，默认 256（为 0 时不缓存）
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取缓存（命中时标记为最近使用）"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        """写入缓存（超出容量时淘汰最久未使用的条目）"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
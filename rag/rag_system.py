@@ -14,8 +14,10 @@ RAG系统核心类 (RAG System Core Class)
 """
 
 import chromadb
-from sentence_transformers import SentenceTransformer
 from typing import List, Dict
+from .model_registry import EMBEDDING_MODEL_NAME, get_embedding_model
+from .chunking import get_chunker
+from .ingestion import iter_lines
 
 
 class RAGSystem:
@@ -25,7 +27,7 @@ class RAGSystem:
     使用 ChromaDB 作为向量数据库，sentence-transformers 作为 Embedding 模型
 
     Attributes:
-        embedding_model: SentenceTransformer 嵌入模型实例
+        embedding_model: 共享的 Embedding 模型（延迟加载，见 model_registry）
         chroma_client: ChromaDB 客户端实例
         collection: ChromaDB 集合，用于存储向量化的文档
     """
@@ -40,9 +42,8 @@ class RAGSystem:
         """
         print("[RAG] 正在初始化 RAG 系统...")
 
-        # 加载 Embedding 模型 (CPU 友好型)
-        print("[RAG] 加载 Embedding 模型: all-MiniLM-L6-v2")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # 获取共享的 Embedding 模型 (CPU 友好型，第一次 encode 时才加载)
+        self.embedding_model = get_embedding_model(EMBEDDING_MODEL_NAME)
 
         # 初始化 ChromaDB 客户端 (持久化存储)
         print(f"[RAG] 初始化 ChromaDB 向量数据库 (路径: {db_path})...")
@@ -55,24 +56,21 @@ class RAGSystem:
         )
         print(f"[RAG] 集合 '{collection_name}' 已就绪")
 
-    def add_document(self, doc_path: str) -> int:
+    def add_document(self, doc_path: str, chunker="line") -> int:
         """
         将文档添加到向量数据库
 
         Args:
             doc_path: 文档文件路径
+            chunker: 分段器名称或 Chunker 实例，默认 "line"（每个非空行为一个段落）
 
         Returns:
             int: 成功添加的段落数量
         """
         print(f"[RAG] 正在读取文档: {doc_path}")
 
-        # 读取文档内容
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # 将文档分割成段落（按换行符分割）
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
+        # 读取文档内容并分割成段落
+        paragraphs = [chunk for chunk, _ in get_chunker(chunker).chunks(iter_lines(doc_path))]
 
         print(f"[RAG] 文档包含 {len(paragraphs)} 个段落")
 
@@ -4,18 +4,83 @@ RAG系统核心类 - 优化版本 (RAG System Core Class - Optimized)
 优化策略：
 1. 批量处理embeddings（减少模型调用次数）
 2. 批量插入数据库（减少I/O操作）
-3. 使用多线程处理独立任务
+3. 流水线并行：读取、向量化（多线程）、写入数据库三个阶段重叠执行
+4. 增量同步（基于内容哈希的稳定ID，只处理新增/变化/删除的段落）
+5. Embedding 磁盘缓存（相同文本跨运行、跨集合只向量化一次）
+6. 流式读取文档（峰值内存由批大小决定，而非文件大小）
+7. 目录加载：多个文件并行读取，共享同一条向量化/写入流水线
+8. 可插拔的分段器（默认按段落合并短行），减少向量数量和检索时需要的结果数
+9. Embedding 模型延迟加载并在进程内共享（见 model_registry）
+10. 检索缓存：问题向量和检索结果的 LRU 缓存，集合被修改时自动失效
+11. 批量检索：多个子问题一次向量化、一次数据库查询（query_many）
+12. 异步检索：aquery / aquery_many 在专用的有界线程池中执行，不阻塞 asyncio 事件循环
+13. 可插拔的向量存储（见 vector_store）：ChromaDB，或内存中的 NumPy 精确检索
+14. 混合检索（见 lexical_index）：BM25 词法检索与向量检索融合；
+    词法匹配足够可信时直接返回，不调用 Embedding 模型
+15. 字段索引（见 field_index）："字段：值" 行在加载时存入字典，事实类问题 O(1) 查找
+16. 上下文组装（见 context）：带分数的检索结果，按相似度阈值过滤、去除近似重复，
+    并按 token 预算装填，减少每次工具调用带给 LLM 的提示词
+17. 预构建索引（见 index_artifact）：离线构建一次，启动时以只读方式加载，不读取知识库、不加载模型
 
 性能提升：
 - 文档加载速度提升 3-5倍
 - 减少数据库I/O次数
+- 知识库未变化时重启几乎零开销
 """
 
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import hashlib
+from typing import List, Dict, Iterable, Iterator
 import numpy as np
+from .embedding_cache import get_embedding_cache, CachedEmbeddingModel
+from .model_registry import EMBEDDING_MODEL_NAME, get_embedding_model
+from .ingestion import (
+    DEFAULT_EXTENSIONS, iter_lines, iter_batches, iter_corpus_files, iter_parallel, rebatch,
+    ChunkBatch, FileReport, IngestionProgress
+)
+from .pipeline import IngestionPipeline, torch_thread_limit
+from .chunking import Chunker, get_chunker
+from .query_cache import LRUCache, normalize_question
+from .async_executor import BoundedAsyncExecutor
+from .vector_store import VectorStore, get_vector_store
+from .lexical_index import BM25Index, LexicalHit
+from .field_index import FieldEntry, FieldIndex
+from .context import SearchHit, distance_to_similarity, dedupe_hits, pack_context
+from utils.telemetry import get_logger, span, count, traced, traced_iter
+
+logger = get_logger("RAG")
+
+# 检索模式
+QUERY_MODES = ("vector", "lexical", "hybrid")
+
+# 混合检索时每种检索方式的候选数量（至少为 n_results）
+HYBRID_CANDIDATES = 10
+
+# 倒数排名融合（RRF）的平滑常数
+RRF_K = 60
+
+# 检索候选数量相对 n_results 的倍数（为阈值过滤和去重留出余量）
+CANDIDATE_FACTOR = 2
+
+
+def make_chunk_id(source: str, content: str) -> str:
+    """
+    根据来源和内容生成稳定的段落ID
+
+    ID 由来源路径哈希（命名空间）和内容哈希两部分组成，
+    同一来源的相同内容在每次启动时都会得到相同的ID。
+
+    Args:
+        source: 段落来源（文档路径）
+        content: 段落内容
+
+    Returns:
+        str: 形如 "<来源哈希8位>-<内容哈希16位>" 的ID
+    """
+    source_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+    content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+    return f"{source_hash}-{content_hash}"
 
 
 class RAGSystemOptimized:
@@ -25,144 +90,741 @@ class RAGSystemOptimized:
     优化点：
     1. 批量生成embeddings（一次性处理多个段落）
     2. 批量插入数据库（减少I/O操作）
-    3. 支持多线程处理（可选）
+    3. 流水线多线程处理（读取、向量化、写入并行）
     """
 
-    def __init__(self, collection_name: str = "qsh_knowledge_base", db_path: str = "./chroma_db"):
+    def __init__(self, collection_name: str = "qsh_knowledge_base", db_path: str = "./chroma_db",
+                 embedding_cache_dir: str = "./embedding_cache", embedding_cache_size: int = 100_000,
+                 chunker="paragraph", query_cache_size: int = 256, query_workers: int = 2,
+                 max_pending_queries: int = 32, vector_store=None, query_mode: str = None,
+                 min_score: float = None, context_tokens: int = None, read_only: bool = False):
         """
         初始化 RAG 系统
 
         Args:
-            collection_name: ChromaDB 集合名称
-            db_path: ChromaDB 数据库存储路径
+            collection_name: 集合名称
+            db_path: 向量数据存储路径
+            embedding_cache_dir: Embedding 缓存目录，为 None 时不使用缓存
+            embedding_cache_size: Embedding 缓存最大条目数（超出后按 LRU 淘汰）
+            chunker: 分段器名称（line / token / paragraph）或 Chunker 实例，默认 "paragraph"
+            query_cache_size: 问题向量和检索结果 LRU 缓存的最大条目数，默认 256（为 0 时不缓存）
+            query_workers: 异步检索（aquery）使用的线程数，默认 2
+            max_pending_queries: 异步检索同时排队+执行的最大请求数，默认 32
+            vector_store: 向量存储后端名称（chroma / numpy）或 VectorStore 实例，默认读取 config.VECTOR_STORE
+            query_mode: 默认检索模式（vector / lexical / hybrid），默认读取 config.QUERY_MODE
+            min_score: 检索结果的最低相似度，默认读取 config.MIN_SCORE
+            context_tokens: query() 返回的上下文的 token 预算，默认读取 config.CONTEXT_TOKENS
+            read_only: 是否以只读方式打开（不允许加载/同步/清空，也不会写回磁盘），默认 False
+
+        Raises:
+            ValueError: 未知的检索模式
+        """
+        from config import rag_config
+
+        logger.info("正在初始化 RAG 系统（优化版本）...")
+
+        self.query_mode = query_mode or rag_config.QUERY_MODE
+        if self.query_mode not in QUERY_MODES:
+            raise ValueError(f"未知的检索模式: {self.query_mode}（可选: {', '.join(QUERY_MODES)}）")
+
+        self.read_only = read_only
+        self.min_score = rag_config.MIN_SCORE if min_score is None else min_score
+        self.context_tokens = rag_config.CONTEXT_TOKENS if context_tokens is None else context_tokens
+
+        self.chunker: Chunker = get_chunker(chunker)
+        logger.info(f"分段器: {self.chunker.settings()}")
+
+        # 检索缓存：集合每次被修改时版本号加一，检索结果缓存的键中包含版本号
+        self.collection_version = 0
+        self._question_embeddings = LRUCache(query_cache_size)
+        self._query_results = LRUCache(query_cache_size)
+
+        # 异步检索的专用线程池（第一次调用 aquery 时才创建）
+        self._query_workers = query_workers
+        self._max_pending_queries = max_pending_queries
+        self._async_executor = None
+
+        # 获取共享的 Embedding 模型（延迟加载：第一次 encode 时才加载）
+        self.embedding_model = get_embedding_model(EMBEDDING_MODEL_NAME)
+        self.embedding_backend = self.embedding_model.backend
+
+        # 在模型外包一层磁盘缓存，已向量化过的文本直接读取缓存
+        self.embedding_cache = None
+        if embedding_cache_dir:
+            # 缓存按模型和推理后端区分（ONNX/量化模型的向量与 torch 略有差异）
+            self.embedding_cache = get_embedding_cache(
+                embedding_cache_dir, self.embedding_model.cache_name, max_entries=embedding_cache_size
+            )
+            self.embedding_model = CachedEmbeddingModel(self.embedding_model, self.embedding_cache)
+            logger.info(f"Embedding 缓存已启用 (路径: {embedding_cache_dir}, 已缓存 {len(self.embedding_cache)} 条)")
+
+        # 初始化向量存储
+        self.store: VectorStore = get_vector_store(vector_store, collection_name=collection_name, db_path=db_path)
+        logger.info(f"集合 '{collection_name}' 已就绪 (向量存储: {self.store.name})")
+
+        # 词法索引（BM25）：与向量存储一起增量维护，快照保存在数据目录中
+        self.lexical_index_path = os.path.join(db_path, f"{collection_name}.lexical.json")
+        self.lexical_index = BM25Index.load(self.lexical_index_path)
+        if len(self.lexical_index) != self.store.count():
+            # 快照缺失或与向量存储不一致（如旧版本创建的数据库）：从已存储的文档重建
+            documents = self.store.get_documents()
+            self.lexical_index.clear()
+            self.lexical_index.add(documents.keys(), documents.values())
+            if not read_only:
+                self.lexical_index.save(self.lexical_index_path)
+            logger.info(f"已从向量存储重建词法索引（{len(documents)} 条记录）")
+        logger.info(f"默认检索模式: {self.query_mode}")
+
+        # 字段索引："字段：值" 行在读取文档时识别（每次同步都会完整读取文档，因此无需从向量存储重建）
+        self.field_index_path = os.path.join(db_path, f"{collection_name}.fields.json")
+        self.field_index = FieldIndex()
+        self.field_index.load(self.field_index_path)
+
+    def _encode_batch(self, batch: ChunkBatch):
+        """
+        为一批段落生成embeddings（在流水线的向量化线程中执行）
+
+        Args:
+            batch: 段落批次
+
+        Returns:
+            np.ndarray: embeddings 矩阵，空批次返回 None
+        """
+        if not batch.documents:
+            return None
+
+        # 批量生成embeddings（关键优化点1）
+        # 一次性处理多个段落，比逐个处理快3-5倍
+        count("encoded_chunks_total", len(batch.documents))
+        with span("encode"):
+            return self.embedding_model.encode(
+                batch.documents,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+
+    def _write_batch(self, batch: ChunkBatch, embeddings):
+        """
+        将一批段落写入数据库（已存在的ID会被覆盖，在流水线的写入线程中执行）
+
+        Args:
+            batch: 段落批次
+            embeddings: 对应的 embeddings 矩阵
+        """
+        if not batch.documents:
+            return
+
+        # 批量写入数据库（关键优化点2）
+        # 一次性写入多条记录，比逐条插入快很多
+        with span("db_insert", store=self.store.name):
+            self.store.upsert(
+                ids=batch.ids,
+                embeddings=embeddings,
+                documents=batch.documents,
+                metadatas=batch.metadatas
+            )
+            self.lexical_index.add(batch.ids, batch.documents)
+        self._mark_modified()
+
+    def _iter_chunk_batches(self, doc_path: str, batch_size: int, extra_metadata: Dict = None) -> Iterator[ChunkBatch]:
+        """
+        流式读取文档，按批产出带稳定ID的段落
+
+        文档按行读取后交给 self.chunker 分段（同时识别字段行，更新字段索引）；同一批中重复的段落只保留第一次出现
+        （跨批的重复段落ID相同，写入时会被覆盖）。
+
+        Args:
+            doc_path: 文档文件路径
+            batch_size: 批大小
+            extra_metadata: 附加到每个段落元数据中的字段（如所属语料目录）
+
+        Yields:
+            ChunkBatch: 段落批次
         """
-        print("[RAG] 正在初始化 RAG 系统（优化版本）...")
+        source = os.path.normpath(doc_path)
+        paragraph_id = 0
+        bytes_read = 0
+        lines = self.field_index.scan(source, iter_lines(doc_path))
+        # 读取和分段在生成器中交替进行：每产出一批的耗时记为一个 chunking span
+        for batch in traced_iter(iter_batches(self.chunker.chunks(lines), batch_size), "chunking"):
+            chunks = {}
+            for paragraph, _ in batch:
+                chunk_id = make_chunk_id(source, paragraph)
+                if chunk_id not in chunks:
+                    metadata = {"source": source, "paragraph_id": paragraph_id}
+                    if extra_metadata:
+                        metadata.update(extra_metadata)
+                    chunks[chunk_id] = (paragraph, metadata)
+                paragraph_id += 1
+            ids = list(chunks)
+            yield ChunkBatch(
+                ids,
+                [chunks[i][0] for i in ids],
+                [chunks[i][1] for i in ids],
+                len(batch),
+                batch[-1][1] - bytes_read
+            )
+            bytes_read = batch[-1][1]
+
+    def _iter_new_batches(self, batches: Iterable[ChunkBatch], seen_ids: set, counts: Dict[str, int]) -> Iterator[ChunkBatch]:
+        """
+        过滤掉数据库中已存在的段落，只把新增/变化的段落交给向量化阶段
+
+        内容未变化、但位置变化（如前面插入或删除了段落）的段落不重新向量化，
+        只更新元数据中的 paragraph_id 等位置信息。
 
-        # 加载 Embedding 模型
-        print("[RAG] 加载 Embedding 模型: all-MiniLM-L6-v2")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        Args:
+            batches: 段落批次的可迭代对象
+            seen_ids: 已读取的段落ID集合（会被更新，用于之后删除过期段落）
+            counts: 统计字典，"added" 项累加新增段落数，"moved" 项累加只更新了元数据的段落数
+
+        Yields:
+            ChunkBatch: 只包含新增段落的批次
+        """
+        for batch in batches:
+            # 只查询本批ID的元数据（不取向量和文档）
+            stored = self.store.get_metadatas(batch.ids) if batch.ids else {}
+            new_indices = []
+            moved_indices = []
+            for i, chunk_id in enumerate(batch.ids):
+                if chunk_id in seen_ids:
+                    continue
+                if chunk_id not in stored:
+                    new_indices.append(i)
+                elif stored[chunk_id] != batch.metadatas[i]:
+                    moved_indices.append(i)
+            if moved_indices:
+                self.store.update_metadatas([batch.ids[i] for i in moved_indices],
+                                            [batch.metadatas[i] for i in moved_indices])
+            seen_ids.update(batch.ids)
+            counts["added"] = counts.get("added", 0) + len(new_indices)
+            counts["moved"] = counts.get("moved", 0) + len(moved_indices)
+            yield batch.select(new_indices)
+
+    def _delete_stale(self, where: Dict, seen_ids: set, batch_size: int) -> int:
+        """
+        删除数据库中满足条件、但本次加载中未出现的段落
 
-        # 初始化 ChromaDB 客户端
-        print(f"[RAG] 初始化 ChromaDB 向量数据库 (路径: {db_path})...")
-        self.chroma_client = chromadb.PersistentClient(path=db_path)
+        Args:
+            where: 元数据相等条件（如 {"source": 路径}）
+            seen_ids: 本次加载读取到的段落ID集合
+            batch_size: 每次删除的ID数量
 
-        # 获取或创建集合
-        self.collection = self.chroma_client.get_or_create_collection(
-            name=collection_name,
-            metadata={"description": "QSH 个人信息知识库"}
-        )
-        print(f"[RAG] 集合 '{collection_name}' 已就绪")
+        Returns:
+            int: 删除的段落数
+        """
+        stored_ids = self.store.get_ids(where=where)
+        stale_ids = [chunk_id for chunk_id in stored_ids if chunk_id not in seen_ids]
+        for i in range(0, len(stale_ids), batch_size):
+            self.store.delete(ids=stale_ids[i:i + batch_size])
+        self.lexical_index.remove(stale_ids)
+        if stale_ids:
+            self._mark_modified()
+        return len(stale_ids)
+
+    def _check_writable(self):
+        """只读模式下拒绝修改集合"""
+        if self.read_only:
+            raise RuntimeError(f"集合 '{self.store.collection_name}' 以只读方式打开（预构建索引），不能修改")
+
+    def _mark_modified(self):
+        """集合被修改：版本号加一，使已缓存的检索结果失效"""
+        self.collection_version += 1
+        self._query_results.clear()
+
+    def _run_pipeline(self, batches: Iterable[ChunkBatch], progress: IngestionProgress,
+                      num_workers: int = None, queue_depth: int = 4):
+        """
+        通过 读取 → 向量化 → 写入 流水线处理所有批次
 
-    def add_document(self, doc_path: str, batch_size: int = 32) -> int:
+        Args:
+            batches: 段落批次的可迭代对象
+            progress: 进度统计对象（在写入线程中更新）
+            num_workers: 向量化线程数，默认见 default_num_workers()
+            queue_depth: 阶段间队列深度
+        """
+        def write(batch: ChunkBatch, embeddings):
+            self._write_batch(batch, embeddings)
+            progress.update(batch.paragraphs_read, batch.bytes_read)
+
+        pipeline = IngestionPipeline(self._encode_batch, write, num_workers=num_workers, queue_depth=queue_depth)
+        logger.info(f"使用流水线模式（向量化线程: {pipeline.num_workers}，队列深度: {pipeline.queue_depth}）")
+        with torch_thread_limit(pipeline.num_workers, self.embedding_backend):
+            pipeline.run(batches)
+
+    def _persist(self):
+        """将向量存储、词法索引、字段索引和 Embedding 缓存写回磁盘，并输出缓存命中统计"""
+        self.store.persist()
+        self.lexical_index.save(self.lexical_index_path)
+        self.field_index.save(self.field_index_path)
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+            logger.info(f"Embedding 缓存命中 {self.embedding_cache.hits} 次，未命中 {self.embedding_cache.misses} 次")
+
+    def add_document(self, doc_path: str, batch_size: int = 32, num_workers: int = None, queue_depth: int = 4) -> int:
         """
         将文档添加到向量数据库（优化版本）
 
         优化策略：
-        1. 批量生成embeddings（一次处理batch_size个段落）
-        2. 批量插入数据库（减少I/O次数）
+        1. 流式读取文档，峰值内存只与 batch_size 和 queue_depth 有关，与文件大小无关
+        2. 批量生成embeddings（一次处理batch_size个段落）
+        3. 批量插入数据库（减少I/O次数）
+        4. 流水线并行：第 N 批写入数据库时，后续批次已在多个线程中向量化
+
+        段落ID由来源和内容哈希生成（见 make_chunk_id），
+        多次添加同一文档不会产生重复记录。
 
         Args:
             doc_path: 文档文件路径
             batch_size: 批处理大小，默认32（根据内存调整）
+            num_workers: 向量化线程数，默认为 CPU 核心数的一半
+            queue_depth: 流水线阶段间队列深度，默认4
 
         Returns:
             int: 成功添加的段落数量
+
+        Raises:
+            RuntimeError: 以只读方式打开时
+        """
+        self._check_writable()
+        logger.info(f"正在流式读取文档: {doc_path}")
+        logger.info(f"使用批量处理模式（批大小: {batch_size}）")
+
+        progress = IngestionProgress(doc_path)
+        self._run_pipeline(self._iter_chunk_batches(doc_path, batch_size), progress, num_workers, queue_depth)
+
+        self._persist()
+        logger.info(f"文档加载完成: {progress.summary()}")
+        return progress.paragraphs
+
+    def sync_document(self, doc_path: str, batch_size: int = 32, num_workers: int = None,
+                      queue_depth: int = 4) -> Dict[str, int]:
         """
-        print(f"[RAG] 正在读取文档: {doc_path}")
+        增量同步文档到向量数据库
 
-        # 读取文档内容
-        with open(doc_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        与 add_document 不同，只对新增或内容变化的段落生成embeddings，
+        并删除文档中已不存在的段落；内容未变化但位置变化的段落只更新元数据。
+        文档未变化时不会调用 Embedding 模型。
 
-        # 将文档分割成段落
-        paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
-        total_paragraphs = len(paragraphs)
+        Args:
+            doc_path: 文档文件路径
+            batch_size: 批处理大小，默认32
+            num_workers: 向量化线程数，默认为 CPU 核心数的一半
+            queue_depth: 流水线阶段间队列深度，默认4
 
-        print(f"[RAG] 文档包含 {total_paragraphs} 个段落")
-        print(f"[RAG] 使用批量处理模式（批大小: {batch_size}）")
+        Returns:
+            Dict[str, int]: 同步统计，包含 added / deleted / unchanged / moved 四项
+            （moved 为 unchanged 中位置变化、只更新了元数据的段落数）
 
-        # 批量处理段落
-        for i in range(0, total_paragraphs, batch_size):
-            batch_paragraphs = paragraphs[i:i + batch_size]
-            batch_size_actual = len(batch_paragraphs)
+        Raises:
+            RuntimeError: 以只读方式打开时
+        """
+        self._check_writable()
+        logger.info(f"正在增量同步文档: {doc_path}")
+
+        source = os.path.normpath(doc_path)
+        progress = IngestionProgress(doc_path)
+        seen_ids = set()
+        counts = {"added": 0, "moved": 0}
+
+        batches = self._iter_new_batches(self._iter_chunk_batches(doc_path, batch_size), seen_ids, counts)
+        self._run_pipeline(batches, progress, num_workers, queue_depth)
+
+        # 删除源文档中已不存在的段落
+        deleted = self._delete_stale({"source": source}, seen_ids, batch_size)
+        if counts["moved"]:
+            self._mark_modified()
+
+        self._persist()
+        stats = {
+            "added": counts["added"],
+            "deleted": deleted,
+            "unchanged": len(seen_ids) - counts["added"],
+            "moved": counts["moved"],
+        }
+        logger.info(f"同步完成: 新增 {stats['added']}，删除 {stats['deleted']}，未变化 {stats['unchanged']}，"
+                    f"位置变化 {stats['moved']}（{progress.summary()}）")
+        return stats
+
+    def add_directory(self, dir_path: str, batch_size: int = 32, incremental: bool = True,
+                      extensions: tuple = DEFAULT_EXTENSIONS, read_workers: int = 4,
+                      num_workers: int = None, queue_depth: int = 4) -> Dict[str, Dict]:
+        """
+        加载整个目录下的文档（递归，支持 txt / md / jsonl）
 
-            # 批量生成embeddings（关键优化点1）
-            # 一次性处理多个段落，比逐个处理快3-5倍
-            embeddings = self.embedding_model.encode(
-                batch_paragraphs,
-                show_progress_bar=False,
-                convert_to_numpy=True
+        多个文件在线程池中并行读取和分段，所有段落合并为固定大小的批次，
+        送入同一条 读取 → 向量化 → 写入 流水线。
+        段落ID以来源路径哈希为命名空间（见 make_chunk_id），不同文件之间不会冲突。
+
+        Args:
+            dir_path: 语料目录路径
+            batch_size: 批处理大小，默认32
+            incremental: 是否增量加载（跳过已存在的段落，并删除已不存在的文件/段落），默认 True
+            extensions: 要加载的文件扩展名
+            read_workers: 并行读取文件的线程数，默认4
+            num_workers: 向量化线程数，默认为 CPU 核心数的一半
+            queue_depth: 流水线阶段间队列深度，默认4
+
+        Returns:
+            Dict[str, Dict]: 每个文件的统计（chunks / written / read_seconds / completed_at）
+
+        Raises:
+            RuntimeError: 以只读方式打开时
+        """
+        self._check_writable()
+        corpus = os.path.normpath(dir_path)
+        files = list(iter_corpus_files(dir_path, extensions))
+        logger.info(f"正在加载目录: {dir_path}（{len(files)} 个文件，读取线程: {read_workers}）")
+
+        reports = {os.path.normpath(path): FileReport(os.path.normpath(path)) for path in files}
+        progress = IngestionProgress(total_bytes=sum(os.path.getsize(path) for path in files))
+        start = time.perf_counter()
+
+        def file_producer(path: str):
+            # 每个文件一个生成器，在读取线程池中运行，并统计分段数量与耗时
+            def produce():
+                report = reports[os.path.normpath(path)]
+                read_start = time.perf_counter()
+                for batch in self._iter_chunk_batches(path, batch_size, extra_metadata={"corpus": corpus}):
+                    report.chunks += len(batch)
+                    report.read_seconds = time.perf_counter() - read_start
+                    yield batch
+            return produce
+
+        batches = rebatch(iter_parallel([file_producer(path) for path in files], num_workers=read_workers), batch_size)
+        seen_ids = set()
+        counts = {"added": 0, "moved": 0}
+        if incremental:
+            batches = self._iter_new_batches(batches, seen_ids, counts)
+
+        def record(batch: ChunkBatch, embeddings):
+            self._write_batch(batch, embeddings)
+            progress.update(batch.paragraphs_read, batch.bytes_read)
+            now = time.perf_counter() - start
+            for metadata in batch.metadatas:
+                report = reports[metadata["source"]]
+                report.written += 1
+                report.completed_at = now
+
+        pipeline = IngestionPipeline(self._encode_batch, record, num_workers=num_workers, queue_depth=queue_depth)
+        with torch_thread_limit(pipeline.num_workers, self.embedding_backend):
+            pipeline.run(batches)
+
+        # 增量模式下删除该目录中已不存在的文件/段落
+        if incremental:
+            deleted = self._delete_stale({"corpus": corpus}, seen_ids, batch_size)
+            self.field_index.remove_sources([
+                source for source in self.field_index.sources()
+                if source not in reports and source.startswith(corpus + os.sep)
+            ])
+            if counts["moved"]:
+                self._mark_modified()
+            logger.info(f"增量加载: 新增 {counts['added']}，删除 {deleted}，位置变化 {counts['moved']}")
+
+        self._persist()
+        logger.info(f"目录加载完成: {progress.summary()}")
+        logger.info("文件统计（段落数 / 写入数 / 读取耗时 / 完成时间）:")
+        for source, report in reports.items():
+            completed = "-" if report.completed_at is None else f"{report.completed_at:.2f}s"
+            logger.info(f"  - {source}: {report.chunks} / {report.written} / {report.read_seconds:.2f}s / {completed}")
+
+        return {source: report.to_dict() for source, report in reports.items()}
+
+    def _encode_questions(self, questions: List[str], keys: List[str]) -> List[List[float]]:
+        """
+        问题向量化：先查问题向量缓存，未命中的问题批量向量化
+
+        Args:
+            questions: 问题列表
+            keys: 与 questions 对应的规范化问题（缓存键）
+
+        Returns:
+            List[List[float]]: 与 questions 一一对应的问题向量
+        """
+        embeddings = [self._question_embeddings.get(key) for key in keys]
+        to_encode = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if to_encode:
+            vectors = self.embedding_model.encode(
+                [questions[i] for i in to_encode], show_progress_bar=False, convert_to_numpy=True
             )
+            for i, vector in zip(to_encode, vectors):
+                embeddings[i] = vector.tolist()
+                self._question_embeddings.put(keys[i], embeddings[i])
+        return embeddings
+
+    @staticmethod
+    def _fuse(vector_ids: List[str], lexical_hits: List[LexicalHit]) -> List[str]:
+        """
+        倒数排名融合（RRF）：按两种检索方式中的排名合并结果
+
+        Args:
+            vector_ids: 向量检索结果ID（按相似度排列）
+            lexical_hits: 词法检索结果（按 BM25 分数排列）
+
+        Returns:
+            List[str]: 按融合分数从高到低排列的ID
+        """
+        scores = {}
+        for ranked in (vector_ids, [hit.id for hit in lexical_hits]):
+            for rank, chunk_id in enumerate(ranked):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+        return sorted(scores, key=scores.get, reverse=True)
+
+    @traced("retrieval")
+    def _retrieve_many(self, questions: List[str], n_results: int, mode: str = None) -> List[List[SearchHit]]:
+        """
+        批量检索：所有未命中缓存的问题一次性向量化，并通过一次向量存储查询检索
+
+        检索模式：
+        - vector: 只使用向量检索
+        - lexical: 只使用 BM25 词法检索（不调用 Embedding 模型）
+        - hybrid: 词法检索结果可信（见 BM25Index.is_confident）时直接返回，
+          否则与向量检索结果按倒数排名融合
+
+        每条结果的分数为向量相似度与词法覆盖率中的较大者（见 context 模块）。
+
+        Args:
+            questions: 问题列表
+            n_results: 每个问题返回的结果数量
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+
+        Returns:
+            List[List[SearchHit]]: 与 questions 一一对应的检索结果（按排名排列）
 
-            # 准备批量插入的数据
-            ids = [f"doc_{i + j}" for j in range(batch_size_actual)]
-            embeddings_list = embeddings.tolist()
-            metadatas = [
-                {"source": doc_path, "paragraph_id": i + j}
-                for j in range(batch_size_actual)
-            ]
-
-            # 批量插入数据库（关键优化点2）
-            # 一次性插入多条记录，比逐条插入快很多
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings_list,
-                documents=batch_paragraphs,
-                metadatas=metadatas
+        Raises:
+            ValueError: 未知的检索模式
+        """
+        mode = mode or self.query_mode
+        if mode not in QUERY_MODES:
+            raise ValueError(f"未知的检索模式: {mode}（可选: {', '.join(QUERY_MODES)}）")
+
+        version = self.collection_version
+        keys = [(normalize_question(q), n_results, mode, version) for q in questions]
+        results = [self._query_results.get(key) for key in keys]
+        pending = [i for i, hits in enumerate(results) if hits is None]
+        count("retrieval_questions_total", len(questions) - len(pending), path="cache")
+        if not pending:
+            return [list(hits) for hits in results]
+
+        candidates = max(n_results, HYBRID_CANDIDATES) if mode == "hybrid" else n_results
+
+        # 词法检索（纯内存，不需要向量化）
+        lexical_hits = {}
+        if mode != "vector":
+            with span("lexical_search"):
+                lexical_hits = {i: self.lexical_index.search(questions[i], k=candidates) for i in pending}
+
+        # 向量检索：只处理词法结果不可信的问题，一次向量化、一次向量存储查询
+        if mode == "vector":
+            need_vector = pending
+        elif mode == "hybrid":
+            need_vector = [i for i in pending if not BM25Index.is_confident(lexical_hits[i])]
+        else:
+            need_vector = []
+
+        vector_results = {}
+        similarities = {}
+        documents_by_id = {}
+        if need_vector:
+            with span("query_encode"):
+                embeddings = self._encode_questions([questions[i] for i in need_vector], [keys[i][0] for i in need_vector])
+            with span("vector_search", store=self.store.name):
+                query_results = self.store.query(embeddings, n_results=candidates)
+            for i, ids, documents, distances in zip(need_vector, query_results['ids'],
+                                                    query_results['documents'], query_results['distances']):
+                vector_results[i] = ids
+                similarities[i] = {chunk_id: distance_to_similarity(d) for chunk_id, d in zip(ids, distances)}
+                documents_by_id.update(zip(ids, documents))
+
+        ranked_ids = {}
+        for i in pending:
+            if i in vector_results and mode == "vector":
+                ranked_ids[i] = vector_results[i][:n_results]
+            elif i in vector_results:
+                ranked_ids[i] = self._fuse(vector_results[i], lexical_hits[i])[:n_results]
+            else:
+                ranked_ids[i] = [hit.id for hit in lexical_hits[i][:n_results]]
+
+        # 只出现在词法结果中的段落：一次性从向量存储读取文本
+        missing = list({chunk_id for ids in ranked_ids.values() for chunk_id in ids if chunk_id not in documents_by_id})
+        if missing:
+            documents_by_id.update(self.store.get_documents(missing))
+
+        for i in pending:
+            coverage = {hit.id: hit.coverage for hit in lexical_hits.get(i, ())}
+            vector_scores = similarities.get(i, {})
+            results[i] = tuple(
+                SearchHit(chunk_id, documents_by_id[chunk_id],
+                          max(vector_scores.get(chunk_id, float("-inf")), coverage.get(chunk_id, float("-inf"))))
+                for chunk_id in ranked_ids[i] if chunk_id in documents_by_id
             )
+            self._query_results.put(keys[i], results[i])
+
+        lexical_only = len(pending) - len(need_vector)
+        count("retrieval_questions_total", lexical_only, path="lexical")
+        count("retrieval_questions_total", len(need_vector), path="vector")
+        if mode == "hybrid" and lexical_only:
+            logger.debug("词法匹配可信，跳过向量检索", questions=lexical_only)
+
+        return [list(hits) for hits in results]
+
+    def search_many(self, questions: List[str], n_results: int = 3, mode: str = None,
+                    min_score: float = None) -> List[List[SearchHit]]:
+        """
+        批量检索，返回带分数的结果（已按阈值过滤并去除近似重复）
+
+        Args:
+            questions: 问题列表
+            n_results: 每个问题最多返回的结果数量
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+            min_score: 最低相似度，默认为 self.min_score
+
+        Returns:
+            List[List[SearchHit]]: 与 questions 一一对应的检索结果（按相关性排列）
+        """
+        min_score = self.min_score if min_score is None else min_score
+        raw_results = self._retrieve_many(questions, n_results * CANDIDATE_FACTOR, mode) if questions else []
+        return [
+            dedupe_hits([hit for hit in hits if hit.score >= min_score])[:n_results]
+            for hits in raw_results
+        ]
+
+    def search(self, question: str, n_results: int = 3, mode: str = None, min_score: float = None) -> List[SearchHit]:
+        """
+        检索单个问题，返回带分数的结果（已按阈值过滤并去除近似重复）
 
-            print(f"[RAG] 已处理 {min(i + batch_size, total_paragraphs)}/{total_paragraphs} 个段落")
+        Args:
+            question: 用户问题
+            n_results: 最多返回的结果数量
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+            min_score: 最低相似度，默认为 self.min_score
 
-        print(f"[RAG] 成功将 {total_paragraphs} 个段落向量化并存入数据库")
-        return total_paragraphs
+        Returns:
+            List[SearchHit]: 检索结果（按相关性排列）
+        """
+        return self.search_many([question], n_results, mode, min_score)[0]
 
-    def query(self, question: str, n_results: int = 3) -> str:
+    def query(self, question: str, n_results: int = 3, mode: str = None, max_tokens: int = None) -> str:
         """
         查询知识库
 
+        相同（规范化后）的问题在集合未被修改时直接返回缓存的检索结果。
+        低于相似度阈值的结果和近似重复的段落被丢弃，剩余段落按 token 预算装填。
+
         Args:
             question: 用户问题
-            n_results: 返回的结果数量
+            n_results: 最多返回的结果数量
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+            max_tokens: 上下文的 token 预算，默认为 self.context_tokens
 
         Returns:
             检索到的相关文档内容
         """
-        print(f"[RAG] 正在检索: {question}")
+        hits = self.search(question, n_results, mode)
+        documents = pack_context([hit.document for hit in hits], self.context_tokens if max_tokens is None else max_tokens)
 
-        # 将问题向量化
-        question_embedding = self.embedding_model.encode(question).tolist()
+        logger.debug("检索完成", question=question, results=len(documents),
+                     scores=[round(hit.score, 2) for hit in hits[:len(documents)]])
 
-        # 在 ChromaDB 中检索
-        results = self.collection.query(
-            query_embeddings=[question_embedding],
-            n_results=n_results
-        )
+        # 拼接结果
+        return "\n".join(documents)
 
-        # 提取检索到的文档
-        documents = results['documents'][0] if results['documents'] else []
+    def query_many(self, questions: List[str], n_results: int = 3, mode: str = None) -> List[List[str]]:
+        """
+        批量查询知识库（复合问题拆分后的多个子问题）
 
-        print(f"[RAG] 检索到 {len(documents)} 条相关记录")
+        所有子问题一次性向量化，并通过一次向量存储查询完成检索，
+        比逐个调用 query() 少了多次模型调用和数据库往返。
+        结果同样经过相似度阈值过滤和去重（不做 token 预算装填，由调用方统一装填）。
 
-        # 拼接结果
-        context = "\n".join(documents)
-        return context
+        Args:
+            questions: 问题列表
+            n_results: 每个问题返回的结果数量
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+
+        Returns:
+            List[List[str]]: 与 questions 一一对应的检索文档列表
+        """
+        results = [[hit.document for hit in hits] for hits in self.search_many(questions, n_results, mode)]
+
+        logger.debug("批量检索完成", questions=questions, results=sum(len(documents) for documents in results))
+        return results
+
+    def lookup_field(self, field: str) -> List[FieldEntry]:
+        """
+        在字段索引中查找 "字段：值" 形式的事实（字典查找，不调用 Embedding 模型）
+
+        Args:
+            field: 字段名、同义词（如 电脑 -> 设备）或包含字段名的问句
+
+        Returns:
+            List[FieldEntry]: 匹配的条目（字段名、值、来源），未找到时为空列表
+        """
+        entries = self.field_index.lookup(field)
+        logger.debug("字段查找", field=field, entries=len(entries))
+        return entries
+
+    def _get_async_executor(self) -> BoundedAsyncExecutor:
+        """获取异步检索的线程池（延迟创建）"""
+        if self._async_executor is None:
+            self._async_executor = BoundedAsyncExecutor(self._query_workers, self._max_pending_queries)
+        return self._async_executor
+
+    async def aquery(self, question: str, n_results: int = 3, timeout: float = None, mode: str = None) -> str:
+        """
+        异步查询知识库（在专用线程池中执行 query，不阻塞事件循环）
+
+        Args:
+            question: 用户问题
+            n_results: 返回的结果数量
+            timeout: 超时时间（秒，包含排队时间），为 None 时不限时
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+
+        Returns:
+            检索到的相关文档内容
+
+        Raises:
+            asyncio.TimeoutError: 检索超时
+        """
+        return await self._get_async_executor().run(self.query, question, n_results, mode, timeout=timeout)
+
+    async def aquery_many(self, questions: List[str], n_results: int = 3, timeout: float = None,
+                          mode: str = None) -> List[List[str]]:
+        """
+        异步批量查询知识库（在专用线程池中执行 query_many，不阻塞事件循环）
+
+        Args:
+            questions: 问题列表
+            n_results: 每个问题返回的结果数量
+            timeout: 超时时间（秒，包含排队时间），为 None 时不限时
+            mode: 检索模式（vector / lexical / hybrid），默认为 self.query_mode
+
+        Returns:
+            List[List[str]]: 与 questions 一一对应的检索文档列表
+
+        Raises:
+            asyncio.TimeoutError: 检索超时
+        """
+        return await self._get_async_executor().run(self.query_many, questions, n_results, mode, timeout=timeout)
 
     def clear_collection(self):
         """清空当前集合的所有数据"""
+        self._check_writable()
         try:
-            collection_name = self.collection.name
-            self.chroma_client.delete_collection(collection_name)
-            self.collection = self.chroma_client.create_collection(
-                name=collection_name,
-                metadata={"description": "QSH 个人信息知识库"}
-            )
-            print(f"[RAG] 集合 '{collection_name}' 已清空")
+            self.store.clear()
+            self.store.persist()
+            self.lexical_index.clear()
+            self.lexical_index.save(self.lexical_index_path)
+            self.field_index.clear()
+            self.field_index.save(self.field_index_path)
+            self._mark_modified()
+            logger.info(f"集合 '{self.store.collection_name}' 已清空")
         except Exception as e:
-            print(f"[RAG] 清空集合时出错: {e}")
+            logger.error(f"清空集合时出错: {e}")
 
     def get_collection_count(self) -> int:
         """获取集合中的文档数量"""
-        return self.collection.count()
+        return self.store.count()
 
 
 # 性能对比说明
@@ -0,0 +1,635 @@
+"""
+向量存储模块 (Vector Store Module)
+
+RAG 系统通过统一的 VectorStore 接口读写向量，可选的后端：
+1. ChromaVectorStore: ChromaDB 持久化集合（SQLite + HNSW 近似检索，默认）
+2. NumpyVectorStore: 内存中的连续 NumPy 矩阵，一次矩阵乘法完成精确 top-k 检索；
+   persist() 时快照为 .npy 文件，加载时以内存映射方式打开（只读部分不占用额外内存），
+   适合中小规模知识库，省去 SQLite 和 HNSW 的开销；
+   可选 float16 或乘积量化（PQ + 精确重排）的压缩存储
+
+检索结果与 ChromaDB 的 query 返回格式一致：
+{"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]}，
+距离为平方 L2 距离（与 ChromaDB 默认的 l2 空间相同，越小越相似）。
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from .quantization import ProductQuantizer
+from utils.telemetry import get_logger
+
+logger = get_logger("RAG")
+
+# NumpyVectorStore 快照文件
+NUMPY_EMBEDDINGS_FILE = "embeddings.npy"
+NUMPY_RECORDS_FILE = "records.json"
+NUMPY_PQ_CODEBOOKS_FILE = "pq_codebooks.npy"
+NUMPY_PQ_CODES_FILE = "pq_codes.npy"
+NUMPY_SQ_NORMS_FILE = "sq_norms.npy"
+
+# NumpyVectorStore 的存储精度 -> 向量矩阵的数据类型
+# （pq 模式保留 float16 向量用于精确重排，快照 = float16 向量 + PQ 编码，比 float16 模式略大）
+VECTOR_STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "pq": np.float16}
+
+# 向量数少于该值时 PQ 模式不训练码本（直接精确检索更快）
+PQ_MIN_VECTORS = 1024
+
+# 精确检索时每块计算的行数（float16 块转换到复用的 float32 缓冲区，缓冲区最大 2048 x 维度）
+QUERY_BLOCK_ROWS = 2048
+
+
+class VectorStore:
+    """
+    向量存储基类
+
+    子类实现 add / upsert / delete / get_ids / get_documents / get_metadatas / update_metadatas /
+    query / count / clear / persist。
+
+    Attributes:
+        name: 后端名称
+        collection_name: 集合名称
+    """
+
+    name = "base"
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    def add(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict]):
+        """添加记录（已存在的ID会被跳过）"""
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], embeddings, documents: List[str], metadatas: List[Dict]):
+        """添加或覆盖记录"""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        """删除记录（不存在的ID会被忽略）"""
+        raise NotImplementedError
+
+    def get_ids(self, ids: List[str] = None, where: Dict = None) -> List[str]:
+        """
+        查询已存在的记录ID
+
+        Args:
+            ids: 只在这些ID中查找，为 None 时不限
+            where: 元数据相等条件（如 {"source": 路径}），为 None 时不限
+
+        Returns:
+            List[str]: 满足条件的记录ID
+        """
+        raise NotImplementedError
+
+    def get_documents(self, ids: List[str] = None) -> Dict[str, str]:
+        """
+        读取记录的文档文本
+
+        Args:
+            ids: 要读取的记录ID，为 None 时读取全部
+
+        Returns:
+            Dict[str, str]: 记录ID -> 文档文本（不存在的ID不包含在内）
+        """
+        raise NotImplementedError
+
+    def get_metadatas(self, ids: List[str]) -> Dict[str, Dict]:
+        """
+        读取记录的元数据
+
+        Args:
+            ids: 要读取的记录ID
+
+        Returns:
+            Dict[str, Dict]: 记录ID -> 元数据（不存在的ID不包含在内）
+        """
+        raise NotImplementedError
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict]):
+        """只替换已存在记录的元数据（向量和文档不变，不存在的ID会被忽略）"""
+        raise NotImplementedError
+
+    def query(self, query_embeddings, n_results: int) -> Dict[str, List[List]]:
+        """
+        检索与每个查询向量最相近的 n_results 条记录
+
+        Args:
+            query_embeddings: 查询向量矩阵（每行一个查询）
+            n_results: 每个查询返回的结果数量
+
+        Returns:
+            Dict[str, List[List]]: ids / documents / metadatas / distances，每项与查询一一对应
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """记录数量"""
+        raise NotImplementedError
+
+    def clear(self):
+        """清空所有记录"""
+        raise NotImplementedError
+
+    def persist(self):
+        """将数据写入磁盘（自动持久化的后端为空操作）"""
+
+
+class ChromaVectorStore(VectorStore):
+    """
+    基于 ChromaDB 持久化集合的向量存储
+
+    Attributes:
+        client: ChromaDB 客户端
+        collection: ChromaDB 集合
+    """
+
+    name = "chroma"
+
+    def __init__(self, collection_name: str = "qsh_knowledge_base", db_path: str = "./chroma_db"):
+        """
+        Args:
+            collection_name: ChromaDB 集合名称
+            db_path: ChromaDB 数据库存储路径
+        """
+        import chromadb
+
+        super().__init__(collection_name)
+        logger.info(f"初始化 ChromaDB 向量数据库 (路径: {db_path})...")
+        self.client = chromadb.PersistentClient(path=db_path)
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"description": "QSH 个人信息知识库"}
+        )
+
+    @staticmethod
+    def _where(where: Dict) -> Optional[Dict]:
+        # ChromaDB 的多个条件需要用 $and 组合
+        if not where or len(where) == 1:
+            return where or None
+        return {"$and": [{key: value} for key, value in where.items()]}
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=ids, embeddings=np.asarray(embeddings).tolist(),
+                            documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=ids, embeddings=np.asarray(embeddings).tolist(),
+                               documents=documents, metadatas=metadatas)
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def get_ids(self, ids=None, where=None):
+        if ids is not None and not ids:
+            return []
+        return self.collection.get(ids=ids, where=self._where(where), include=[])["ids"]
+
+    def get_documents(self, ids=None):
+        if ids is not None and not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["documents"])
+        return dict(zip(results["ids"], results["documents"]))
+
+    def get_metadatas(self, ids):
+        if not ids:
+            return {}
+        results = self.collection.get(ids=ids, include=["metadatas"])
+        return dict(zip(results["ids"], results["metadatas"]))
+
+    def update_metadatas(self, ids, metadatas):
+        existing = set(self.get_ids(ids=ids))
+        pairs = [(chunk_id, metadata) for chunk_id, metadata in zip(ids, metadatas) if chunk_id in existing]
+        if pairs:
+            self.collection.update(ids=[p[0] for p in pairs], metadatas=[p[1] for p in pairs])
+
+    def query(self, query_embeddings, n_results):
+        results = self.collection.query(
+            query_embeddings=np.asarray(query_embeddings).tolist(),
+            n_results=n_results,
+            include=["documents", "metadatas", "distances"]
+        )
+        return {
+            key: results.get(key) or [[] for _ in range(len(query_embeddings))]
+            for key in ("ids", "documents", "metadatas", "distances")
+        }
+
+    def count(self):
+        return self.collection.count()
+
+    def clear(self):
+        self.client.delete_collection(self.collection_name)
+        self.collection = self.client.create_collection(
+            name=self.collection_name,
+            metadata={"description": "QSH 个人信息知识库"}
+        )
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    内存中的 NumPy 向量存储
+
+    所有向量保存在一个连续矩阵中（按容量倍增扩展），删除时用最后一行填补空位。
+    从快照加载时矩阵以只读内存映射方式打开，第一次修改时才复制到内存；
+    每行的平方范数随快照保存，加载时不需要读取整个向量矩阵。
+
+    存储精度（storage）：
+    - float32: 原始精度，精确检索
+    - float16: 向量矩阵、快照和常驻内存减半。检索时按块（QUERY_BLOCK_ROWS 行）转换到一个复用的
+      float32 缓冲区中计算距离并维护 top-k，不保留完整的 float32 副本；
+      代价是每次检索都要转换整个矩阵，检索延迟高于 float32
+    - pq: float16 向量 + 乘积量化编码（见 quantization）。先用 PQ 编码查表得到近似距离，
+      只对前 n_results * rerank_factor 个候选用 float16 向量精确重排。
+      快照同时保存 float16 向量（重排用）和 PQ 编码，磁盘占用比 float16 模式还大；
+      PQ 节省的只是常驻内存：加载快照后只有 PQ 编码常驻内存，向量矩阵仅在重排时按需读取（内存映射）
+
+    Attributes:
+        path: 快照目录
+        storage: 存储精度
+    """
+
+    name = "numpy"
+
+    def __init__(self, collection_name: str = "qsh_knowledge_base", db_path: str = "./chroma_db",
+                 storage: str = None, pq_subspaces: int = 32, rerank_factor: int = 10):
+        """
+        Args:
+            collection_name: 集合名称
+            db_path: 数据目录，快照保存在 <db_path>/<collection_name>.numpy/ 下
+            storage: 存储精度（float32 / float16 / pq），默认读取 config.VECTOR_STORAGE
+            pq_subspaces: PQ 分段数（每个向量的编码字节数），默认 32
+            rerank_factor: PQ 模式下精确重排的候选数相对 n_results 的倍数，默认 10
+
+        Raises:
+            ValueError: 未知的存储精度
+        """
+        if storage is None:
+            from config import rag_config
+            storage = rag_config.VECTOR_STORAGE
+        if storage not in VECTOR_STORAGE_DTYPES:
+            raise ValueError(f"未知的向量存储精度: {storage}（可选: {', '.join(VECTOR_STORAGE_DTYPES)}）")
+
+        super().__init__(collection_name)
+        self.path = os.path.join(db_path, f"{collection_name}.numpy")
+        self.storage = storage
+        self.rerank_factor = rerank_factor
+        self._dtype = VECTOR_STORAGE_DTYPES[storage]
+        self._pq_subspaces = pq_subspaces
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+        logger.info(f"NumPy 向量存储已就绪 (路径: {self.path}，精度: {storage}，{self._size} 条记录)")
+
+    def _reset(self):
+        """清空内存中的数据"""
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+        self._matrix = None       # (容量, 维度) 矩阵，前 _size 行有效
+        self._sq_norms = None     # 每行向量的平方范数（float32，用于计算 L2 距离）
+        self._query_buffer = None  # 精确检索时 float16 块转换用的 float32 缓冲区（复用）
+        self._size = 0
+        self._dirty = False
+        self._pq = ProductQuantizer(self._pq_subspaces) if self.storage == "pq" else None
+        self._codes = None        # (容量, 段数) PQ 编码，码本训练后才有
+
+    @staticmethod
+    def _row_sq_norms(matrix: np.ndarray) -> np.ndarray:
+        """按块转换为 float32 计算每行的平方范数"""
+        sq_norms = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), QUERY_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + QUERY_BLOCK_ROWS], dtype=np.float32)
+            sq_norms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+        return sq_norms
+
+    def _load(self):
+        """从快照加载（向量矩阵以内存映射方式打开，平方范数从快照读取，不遍历向量矩阵）"""
+        embeddings_path = os.path.join(self.path, NUMPY_EMBEDDINGS_FILE)
+        records_path = os.path.join(self.path, NUMPY_RECORDS_FILE)
+        if not (os.path.exists(embeddings_path) and os.path.exists(records_path)):
+            return
+
+        with open(records_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        matrix = np.load(embeddings_path, mmap_mode="r")
+        if matrix.shape[0] != len(records["ids"]):
+            raise ValueError(f"向量快照与记录数量不一致: {self.path}")
+        if not records["ids"]:
+            return
+
+        sq_norms = None
+        sq_norms_path = os.path.join(self.path, NUMPY_SQ_NORMS_FILE)
+        if matrix.dtype != self._dtype:
+            # 快照精度与配置不同：转换到内存中，下次 persist() 时按新精度保存（范数按新精度重新计算）
+            logger.info(f"向量快照精度为 {matrix.dtype}，转换为 {self.storage}")
+            matrix = np.asarray(matrix, dtype=self._dtype)
+            self._dirty = True
+        elif os.path.exists(sq_norms_path):
+            sq_norms = np.load(sq_norms_path)
+            if len(sq_norms) != len(matrix):
+                sq_norms = None
+        if sq_norms is None:
+            # 旧快照没有保存范数：遍历一次向量矩阵计算，下次 persist() 时写入快照
+            sq_norms = self._row_sq_norms(matrix)
+            self._dirty = True
+
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._matrix = matrix
+        self._sq_norms = sq_norms
+        self._size = len(self._ids)
+
+        codebooks_path = os.path.join(self.path, NUMPY_PQ_CODEBOOKS_FILE)
+        codes_path = os.path.join(self.path, NUMPY_PQ_CODES_FILE)
+        if self._pq is not None and os.path.exists(codebooks_path) and os.path.exists(codes_path):
+            codes = np.load(codes_path)
+            if len(codes) == self._size:
+                self._pq.codebooks = np.load(codebooks_path)
+                self._pq.trained_size = self._size
+                self._codes = codes
+
+    def _reserve(self, extra: int, dim: int):
+        """保证矩阵可写且至少还能容纳 extra 行（内存映射的快照在此时复制到内存）"""
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"向量维度不一致: 存储为 {self._matrix.shape[1]}，写入为 {dim}")
+
+        needed = self._size + extra
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if self._matrix is not None and self._matrix.flags.writeable and needed <= capacity:
+            return
+
+        capacity = max(needed, capacity * 2, 64)
+        matrix = np.empty((capacity, dim), dtype=self._dtype)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        codes = None if self._codes is None else np.empty((capacity, self._codes.shape[1]), dtype=np.uint8)
+        if self._size:
+            matrix[:self._size] = self._matrix[:self._size]
+            sq_norms[:self._size] = self._sq_norms[:self._size]
+            if codes is not None:
+                codes[:self._size] = self._codes[:self._size]
+        self._matrix, self._sq_norms, self._codes = matrix, sq_norms, codes
+
+    def _write(self, ids, embeddings, documents, metadatas, overwrite: bool):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not len(ids):
+            return
+        with self._lock:
+            self._reserve(len(ids), embeddings.shape[1])
+            written = []
+            for chunk_id, vector, document, metadata in zip(ids, embeddings, documents, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._rows[chunk_id] = row
+                    self._ids.append(chunk_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata)
+                elif overwrite:
+                    self._documents[row] = document
+                    self._metadatas[row] = metadata
+                else:
+                    continue
+                self._matrix[row] = vector
+                written.append(row)
+
+            if written:
+                # 范数和 PQ 编码都按实际存储的（可能是 float16 的）向量计算
+                stored = self._matrix[written].astype(np.float32)
+                self._sq_norms[written] = np.einsum("ij,ij->i", stored, stored)
+                if self._codes is not None:
+                    self._codes[written] = self._pq.encode(stored)
+            self._dirty = True
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self._write(ids, embeddings, documents, metadatas, overwrite=False)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._write(ids, embeddings, documents, metadatas, overwrite=True)
+
+    def delete(self, ids):
+        with self._lock:
+            rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+            if not rows:
+                return
+            self._reserve(0, self._matrix.shape[1])
+            # 从后往前删除，用最后一行填补被删除的行
+            for row in sorted(rows, reverse=True):
+                last = self._size - 1
+                del self._rows[self._ids[row]]
+                if row != last:
+                    self._ids[row] = self._ids[last]
+                    self._documents[row] = self._documents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._sq_norms[row] = self._sq_norms[last]
+                    if self._codes is not None:
+                        self._codes[row] = self._codes[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+                self._size -= 1
+            self._dirty = True
+
+    def get_ids(self, ids=None, where=None):
+        with self._lock:
+            if ids is not None:
+                candidates = [chunk_id for chunk_id in ids if chunk_id in self._rows]
+            else:
+                candidates = list(self._ids)
+            if not where:
+                return candidates
+            return [
+                chunk_id for chunk_id in candidates
+                if all(self._metadatas[self._rows[chunk_id]].get(key) == value for key, value in where.items())
+            ]
+
+    def get_documents(self, ids=None):
+        with self._lock:
+            if ids is None:
+                return dict(zip(self._ids, self._documents))
+            return {chunk_id: self._documents[self._rows[chunk_id]] for chunk_id in ids if chunk_id in self._rows}
+
+    def get_metadatas(self, ids):
+        with self._lock:
+            return {chunk_id: dict(self._metadatas[self._rows[chunk_id]]) for chunk_id in ids if chunk_id in self._rows}
+
+    def update_metadatas(self, ids, metadatas):
+        with self._lock:
+            for chunk_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is not None:
+                    self._metadatas[row] = metadata
+                    self._dirty = True
+
+    def _block(self, start: int, end: int) -> np.ndarray:
+        """第 start~end 行向量的 float32 视图（float16 存储时转换到复用的缓冲区中）"""
+        block = self._matrix[start:end]
+        if block.dtype == np.float32:
+            return block
+        rows = min(QUERY_BLOCK_ROWS, self._size)
+        if self._query_buffer is None or self._query_buffer.shape[0] < rows \
+                or self._query_buffer.shape[1] != block.shape[1]:
+            self._query_buffer = np.empty((rows, block.shape[1]), dtype=np.float32)
+        buffer = self._query_buffer[:end - start]
+        np.copyto(buffer, block)
+        return buffer
+
+    def _exact_candidates(self, queries: np.ndarray, k: int) -> tuple:
+        """
+        分块精确检索，返回每个查询距离最小的 k 行（未排序）
+
+        Returns:
+            tuple: (行号, 距离)，形状均为 (查询数, k)
+        """
+        # 平方 L2 距离 = |x|^2 - 2 x·q + |q|^2（|x|^2 保存在 _sq_norms 中）
+        query_sq_norms = np.einsum("ij,ij->i", queries, queries)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_distances = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, self._size, QUERY_BLOCK_ROWS):
+            end = min(start + QUERY_BLOCK_ROWS, self._size)
+            distances = (self._sq_norms[None, start:end] - 2.0 * (queries @ self._block(start, end).T)
+                         + query_sq_norms[:, None])
+            rows = np.broadcast_to(np.arange(start, end), distances.shape)
+            # 与上一块的 top-k 合并后重新选出 top-k
+            rows = np.concatenate([best_rows, rows], axis=1)
+            distances = np.concatenate([best_distances, distances], axis=1)
+            if distances.shape[1] > k:
+                keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                rows = np.take_along_axis(rows, keep, axis=1)
+                distances = np.take_along_axis(distances, keep, axis=1)
+            best_rows, best_distances = rows, distances
+        return best_rows, best_distances
+
+    def _pq_candidates(self, query: np.ndarray, k: int) -> tuple:
+        """PQ 查表得到候选，再用存储的向量精确重排，返回 (行号, 距离)"""
+        approximate = self._pq.approximate_distances(self._pq.distance_table(query), self._codes[:self._size])
+        n_candidates = min(self._size, k * self.rerank_factor)
+        # 候选按行号排序后读取，内存映射时访问更连续
+        candidates = np.sort(np.argpartition(approximate, n_candidates - 1)[:n_candidates])
+        vectors = self._matrix[candidates].astype(np.float32)
+        return candidates, ((vectors - query) ** 2).sum(axis=1)
+
+    def query(self, query_embeddings, n_results):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            k = min(n_results, self._size)
+            if k <= 0:
+                return {key: [[] for _ in queries] for key in ("ids", "documents", "metadatas", "distances")}
+
+            use_pq = self._codes is not None
+            if not use_pq:
+                exact_rows, exact_distances = self._exact_candidates(queries, k)
+
+            results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for j in range(len(queries)):
+                if use_pq:
+                    rows, column = self._pq_candidates(queries[j], k)
+                else:
+                    rows, column = exact_rows[j], exact_distances[j]
+                top = np.argpartition(column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+                top = top[np.argsort(column[top], kind="stable")]
+                results["ids"].append([self._ids[rows[i]] for i in top])
+                results["documents"].append([self._documents[rows[i]] for i in top])
+                results["metadatas"].append([self._metadatas[rows[i]] for i in top])
+                results["distances"].append([max(float(column[i]), 0.0) for i in top])
+            return results
+
+    def count(self):
+        return self._size
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self._dirty = True
+
+    def _train_pq(self):
+        """训练 PQ 码本并编码所有向量（向量太少时跳过，继续使用精确检索）"""
+        if self._pq is None or self._size < PQ_MIN_VECTORS:
+            return
+        if self._pq.is_trained and self._size <= 2 * self._pq.trained_size:
+            return
+        logger.info(f"正在训练 PQ 码本（{self._size} 条向量）...")
+        stored = np.asarray(self._matrix[:self._size], dtype=np.float32)
+        self._pq.fit(stored)
+        self._codes = None
+        self._reserve(0, stored.shape[1])
+        self._codes = np.empty((self._matrix.shape[0], len(self._pq.codebooks)), dtype=np.uint8)
+        self._codes[:self._size] = self._pq.encode(stored)
+        self._dirty = True
+
+    def persist(self):
+        """将向量矩阵和记录原子地写入快照目录（数据未变化时跳过；PQ 模式下按需训练码本）"""
+        with self._lock:
+            self._train_pq()
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+
+            if self._matrix is None:
+                matrix = np.empty((0, 0), dtype=self._dtype)
+                sq_norms = np.empty(0, dtype=np.float32)
+            else:
+                matrix = self._matrix[:self._size]
+                sq_norms = self._sq_norms[:self._size]
+            files = {
+                NUMPY_EMBEDDINGS_FILE: matrix,
+                NUMPY_SQ_NORMS_FILE: sq_norms,
+                NUMPY_PQ_CODEBOOKS_FILE: self._pq.codebooks if self._codes is not None else None,
+                NUMPY_PQ_CODES_FILE: self._codes[:self._size] if self._codes is not None else None,
+            }
+            for name, array in files.items():
+                path = os.path.join(self.path, name)
+                if array is None:
+                    # 不再使用的 PQ 文件（如切换了存储精度）
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, array)
+                os.replace(path + ".tmp", path)
+
+            records_path = os.path.join(self.path, NUMPY_RECORDS_FILE)
+            with open(records_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "documents": self._documents, "metadatas": self._metadatas},
+                          f, ensure_ascii=False)
+            os.replace(records_path + ".tmp", records_path)
+            self._dirty = False
+
+
+# 可用的向量存储后端
+VECTOR_STORES = {
+    ChromaVectorStore.name: ChromaVectorStore,
+    NumpyVectorStore.name: NumpyVectorStore,
+}
+
+
+def get_vector_store(store=None, collection_name: str = "qsh_knowledge_base", db_path: str = "./chroma_db") -> VectorStore:
+    """
+    根据名称创建向量存储
+
+    Args:
+        store: 后端名称（chroma / numpy）或 VectorStore 实例，默认读取 config.VECTOR_STORE
+        collection_name: 集合名称
+        db_path: 数据存储路径
+
+    Returns:
+        VectorStore: 向量存储实例
+
+    Raises:
+        ValueError: 未知的后端名称
+    """
+    if isinstance(store, VectorStore):
+        return store
+    if store is None:
+        from config import rag_config
+        store = rag_config.VECTOR_STORE
+    if store not in VECTOR_STORES:
+        raise ValueError(f"未知的向量存储后端: {store}（可选: {', '.join(VECTOR_STORES)}）")
+    return VECTOR_STORES[store](collection_name=collection_name, db_path=db_path)
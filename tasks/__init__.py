@@ -1,13 +1,26 @@
 """
 Tasks模块 (Tasks Module)
 
-提供各类任务的执行逻辑
+提供各类任务的执行逻辑，并发执行多个任务的调度器（TaskScheduler），
+以及从 JSONL 文件批量回答问题的执行器（BatchQARunner）
+
+子模块按需导入：import tasks 不会立即加载任务实现
 """
 
-from .fibonacci_task import run_fibonacci_task
-from .qa_task import run_qa_task
+from utils.lazy_import import lazy_module_getattr
+
+# 公开名称 -> 所在子模块（第一次访问时才导入，避免导入包时加载任务实现及其依赖的 autogen）
+_LAZY_ATTRS = {
+    'run_fibonacci_task': '.fibonacci_task',
+    'run_qa_task': '.qa_task',
+    'build_qa_message': '.qa_task',
+    'TaskScheduler': '.scheduler',
+    'TaskResult': '.scheduler',
+    'BatchQARunner': '.batch_qa',
+    'run_batch_qa': '.batch_qa',
+    'load_questions': '.batch_qa',
+}
+
+__all__ = list(_LAZY_ATTRS)
 
-__all__ = [
-    'run_fibonacci_task',
-    'run_qa_task'
-]
+__getattr__, __dir__ = lazy_module_getattr(__name__, _LAZY_ATTRS)
@@ -0,0 +1,438 @@
+"""
+批量问答模块 (Batch Q&A Module)
+
+把 JSONL 文件中的大量问题依次交给 RAG + Assistant 回答，多个 a_initiate_chat 对话并发进行：
+
+- 并发：concurrency 个 Agent 对组成对象池，每个对话占用一个 Agent 对（clear_history=True，互不影响）
+- 限流：所有 Agent 共用一个令牌桶（TokenBucket），限制对 LLM 接口实际发出的请求速率（缓存命中不消耗令牌）
+- 重试：LLM 请求遇到限流（429）、连接错误 / 超时、服务端错误（5xx）时指数退避后重试；
+  OpenAI 客户端自带的重试被关闭（max_retries=0），避免两层重试叠加
+- 断点续跑：每个问题完成后立即追加一行结果到输出 JSONL；再次运行时跳过已成功的问题，只重跑失败或未完成的问题
+- 进度报告：每隔 report_interval 秒输出完成数、吞吐量、延迟分位数、重试次数和预计剩余时间
+
+输入文件每行一个 JSON 对象：{"id": "q1", "question": "QSH 的生日是哪天？"}，id 可省略（使用行号）。
+输出文件每行一个结果：{"id", "question", "status": "ok" / "error", "answer", "error", "seconds", "retries", "tokens"}。
+
+用法：
+    python -m tasks.batch_qa questions.jsonl answers.jsonl [--concurrency 8] [--rate 5] [--burst 10]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from config import (
+    BATCH_CONCURRENCY,
+    BATCH_RATE_LIMIT,
+    BATCH_RATE_BURST,
+    BATCH_MAX_RETRIES,
+    BATCH_QUESTION_TIMEOUT,
+    BATCH_REPORT_INTERVAL,
+)
+from utils.rate_limit import TokenBucket, backoff_delay
+from utils.telemetry import get_logger, count, observe
+from .qa_task import build_qa_message
+
+logger = get_logger("Batch")
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def load_questions(path: str) -> List[Dict]:
+    """
+    读取问题文件（JSONL，每行 {"id": ..., "question": ...}）
+
+    Args:
+        path: 问题文件路径
+
+    Returns:
+        List[Dict]: [{"id": str, "question": str}]，按文件顺序
+
+    Raises:
+        ValueError: 某行不是合法的 JSON 对象、缺少 question 或 id 重复
+    """
+    questions, seen = [], set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number} 不是合法的 JSON: {e}") from e
+            if not isinstance(item, dict) or not item.get("question"):
+                raise ValueError(f"{path}:{line_number} 缺少 question 字段")
+            question_id = str(item.get("id", line_number))
+            if question_id in seen:
+                raise ValueError(f"{path}:{line_number} 问题 id 重复: {question_id}")
+            seen.add(question_id)
+            questions.append({"id": question_id, "question": item["question"]})
+    return questions
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    """
+    读取已有的输出文件（断点续跑）
+
+    同一个问题有多条结果时以最后一条为准；中断时写了一半的最后一行被忽略。
+
+    Args:
+        path: 输出文件路径
+
+    Returns:
+        Dict[str, Dict]: 问题 id -> 结果，文件不存在时为空
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                records[str(record["id"])] = record
+            except (json.JSONDecodeError, KeyError, TypeError):
+                logger.warning(f"忽略输出文件中无法解析的第 {line_number} 行", path=path)
+    return records
+
+
+def _ends_with_newline(path: str) -> bool:
+    """文件的最后一个字节是否为换行符"""
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """已排序数据的分位数（最近秩）"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class _Progress:
+    """批量问答的进度统计"""
+
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.ok = 0
+        self.errors = 0
+        self.retries = 0
+        self.tokens = 0
+        self.latencies: List[float] = []
+        self.start = time.perf_counter()
+
+    @property
+    def done(self) -> int:
+        return self.ok + self.errors
+
+    def add(self, record: Dict):
+        if record["status"] == STATUS_OK:
+            self.ok += 1
+        else:
+            self.errors += 1
+        self.retries += record["retries"]
+        self.tokens += record["tokens"]
+        self.latencies.append(record["seconds"])
+
+    def snapshot(self) -> Dict:
+        """当前的统计数据"""
+        elapsed = time.perf_counter() - self.start
+        latencies = sorted(self.latencies)
+        throughput = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.skipped - self.done
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "done": self.done,
+            "ok": self.ok,
+            "errors": self.errors,
+            "retries": self.retries,
+            "tokens": self.tokens,
+            "seconds": elapsed,
+            "throughput": throughput,
+            "p50": _percentile(latencies, 0.50),
+            "p95": _percentile(latencies, 0.95),
+            "eta": remaining / throughput if throughput > 0 else None,
+        }
+
+    def line(self) -> str:
+        """一行进度报告"""
+        s = self.snapshot()
+        eta = f"{s['eta']:.0f}s" if s["eta"] is not None else "-"
+        return (f"进度 {s['skipped'] + s['done']}/{s['total']}（成功 {s['ok']}，失败 {s['errors']}，"
+                f"已跳过 {s['skipped']}） 吞吐 {s['throughput']:.2f} 问/秒 "
+                f"延迟 p50 {s['p50']:.2f}s p95 {s['p95']:.2f}s 重试 {s['retries']} "
+                f"tokens {s['tokens']} 剩余约 {eta}")
+
+
+class _AgentSlot:
+    """对象池中的一个 Agent 对"""
+
+    def __init__(self, assistant, user_proxy):
+        self.assistant = assistant
+        self.user_proxy = user_proxy
+        self.retries = 0
+
+    def tokens(self) -> int:
+        """Assistant 累计实际消耗的 token 数（不含缓存命中）"""
+        usage = self.assistant.client.actual_usage_summary or {}
+        return sum(v.get("total_tokens", 0) for v in usage.values() if isinstance(v, dict))
+
+
+class _NullIOStream:
+    """不输出任何内容的 IOStream"""
+
+    def print(self, *objects, sep: str = " ", end: str = "\n", flush: bool = False) -> None:
+        pass
+
+    def input(self, prompt: str = "", *, password: bool = False) -> str:
+        return ""
+
+
+def _retriable_errors() -> tuple:
+    """可重试的 OpenAI 异常：限流、连接错误（含超时）、服务端错误"""
+    import openai
+    return openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError
+
+
+class BatchQARunner:
+    """
+    批量问答执行器
+
+    用法：
+        runner = BatchQARunner("answers.jsonl", concurrency=8, rate_limit=5)
+        stats = await runner.run(load_questions("questions.jsonl"))
+    """
+
+    def __init__(self, output_path: str, agent_factory: Callable = None, setup: Callable = None,
+                 concurrency: int = BATCH_CONCURRENCY, rate_limit: float = BATCH_RATE_LIMIT,
+                 burst: float = BATCH_RATE_BURST, max_retries: int = BATCH_MAX_RETRIES,
+                 timeout: float = BATCH_QUESTION_TIMEOUT, report_interval: float = BATCH_REPORT_INTERVAL,
+                 base_delay: float = 0.5, max_delay: float = 30.0, work_dir: str = "workspace"):
+        """
+        Args:
+            output_path: 输出 JSONL 文件（同时也是断点续跑的检查点）
+            agent_factory: 无参数的函数，返回 (assistant, user_proxy)；默认使用 config.get_llm_config()
+                创建（关闭 OpenAI 客户端自带的重试）
+            setup: 每个 Agent 对创建后调用 setup(assistant, user_proxy)，默认注册知识库查询工具
+            concurrency: 同时进行的对话数（Agent 对的数量）
+            rate_limit: LLM 请求速率上限（次/秒），0 表示不限流
+            burst: 允许的突发请求数（令牌桶容量）
+            max_retries: 单个 LLM 请求的最大重试次数
+            timeout: 单个问题的超时时间（秒），0 或 None 表示不限制
+            report_interval: 进度报告间隔（秒），0 表示只在结束时报告
+            base_delay: 第一次重试的最大退避时间（秒），之后每次翻倍
+            max_delay: 退避时间上限（秒）
+            work_dir: 默认 agent_factory 使用的代码执行工作目录
+        """
+        if agent_factory is None:
+            agent_factory = functools.partial(_create_agent_pair, work_dir=work_dir)
+        if setup is None:
+            from tools import register_knowledge_base_tool
+            setup = register_knowledge_base_tool
+        self.output_path = output_path
+        self.agent_factory = agent_factory
+        self.setup = setup
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.report_interval = report_interval
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.progress: Optional[_Progress] = None
+
+    def _new_slot(self) -> _AgentSlot:
+        """创建 Agent 对，并为 Assistant 的 LLM 请求加上限流和重试"""
+        assistant, user_proxy = self.agent_factory()
+        self.setup(assistant, user_proxy)
+        slot = _AgentSlot(assistant, user_proxy)
+        # 替换的是 OpenAI 客户端的 chat.completions.create：只有真正发往 LLM 接口的请求经过这里
+        for client in assistant.client._clients:
+            completions = client._oai_client.chat.completions
+            completions.create = self._limited(completions.create, slot)
+        return slot
+
+    def _limited(self, create: Callable, slot: _AgentSlot) -> Callable:
+        """每次请求前获取令牌，可重试的错误指数退避后重试"""
+        retriable = _retriable_errors()
+
+        @functools.wraps(create)
+        def create_with_retry(*args, **kwargs):
+            for attempt in range(self.max_retries + 1):
+                waited = self.bucket.acquire()
+                if waited > 0:
+                    observe("llm_rate_limit_wait_seconds", waited)
+                try:
+                    return create(*args, **kwargs)
+                except retriable as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+                    slot.retries += 1
+                    count("llm_retries_total", error=type(e).__name__)
+                    logger.debug(f"LLM 请求失败，{delay:.2f}s 后重试", attempt=attempt + 1, error=type(e).__name__)
+                    time.sleep(delay)
+
+        return create_with_retry
+
+    async def _ask(self, item: Dict, pool: asyncio.Queue) -> Dict:
+        """从对象池取一个 Agent 对回答一个问题，返回结果记录"""
+        slot = await pool.get()
+        retries, tokens = slot.retries, slot.tokens()
+        start = time.perf_counter()
+        record = {"id": item["id"], "question": item["question"]}
+        timed_out = False
+        try:
+            result = await asyncio.wait_for(
+                slot.user_proxy.a_initiate_chat(slot.assistant, message=build_qa_message(item["question"]),
+                                                clear_history=True, silent=True),
+                self.timeout or None,
+            )
+            answer = (result.summary or "").strip()
+            if answer.endswith("TERMINATE"):
+                answer = answer[:-len("TERMINATE")].rstrip()
+            record.update(status=STATUS_OK, answer=answer, error=None)
+        except asyncio.TimeoutError:
+            timed_out = True
+            record.update(status=STATUS_ERROR, answer=None, error=f"超过 {self.timeout:g}s 未完成")
+        except Exception as e:
+            record.update(status=STATUS_ERROR, answer=None, error=f"{type(e).__name__}: {e}")
+        record.update(seconds=round(time.perf_counter() - start, 3), retries=slot.retries - retries,
+                      tokens=slot.tokens() - tokens)
+
+        # 超时被取消的对话可能还有请求在线程中进行，换一个新的 Agent 对
+        pool.put_nowait(self._new_slot() if timed_out else slot)
+        count("batch_questions_total", status=record["status"])
+        observe("batch_question_seconds", record["seconds"])
+        return record
+
+    async def _report(self):
+        """定期输出进度报告"""
+        while True:
+            await asyncio.sleep(self.report_interval)
+            logger.info(self.progress.line())
+
+    async def run(self, questions: Iterable[Dict]) -> Dict:
+        """
+        回答所有问题（跳过输出文件中已成功的问题），结果追加写入输出文件
+
+        LLM 请求在事件循环的默认线程池中发出（autogen 的 a_generate_oai_reply），
+        并发数较大时默认线程池的线程数可能成为瓶颈，见 run_batch_qa()。
+
+        Args:
+            questions: 问题列表（load_questions() 的返回值）
+
+        Returns:
+            Dict: 统计数据（total / skipped / done / ok / errors / retries / tokens / seconds / throughput / p50 / p95）
+        """
+        questions = list(questions)
+        finished = {qid for qid, record in load_checkpoint(self.output_path).items()
+                    if record.get("status") == STATUS_OK}
+        pending = [item for item in questions if item["id"] not in finished]
+        self.progress = _Progress(len(questions), len(questions) - len(pending))
+        logger.info(f"共 {len(questions)} 个问题，已完成 {len(questions) - len(pending)} 个，"
+                    f"本次回答 {len(pending)} 个", concurrency=self.concurrency, rate_limit=self.bucket.rate)
+        if not pending:
+            return self.progress.snapshot()
+
+        from autogen.io import IOStream
+
+        pool: asyncio.Queue = asyncio.Queue()
+        for _ in range(min(self.concurrency, len(pending))):
+            pool.put_nowait(self._new_slot())
+
+        reporter = asyncio.create_task(self._report()) if self.report_interval > 0 else None
+        # 对话内容不打印到标准输出（工具调用等提示也通过 IOStream 输出）
+        with open(self.output_path, "a", encoding="utf-8") as output, IOStream.set_default(_NullIOStream()):
+            # 上次中断时最后一行可能只写了一半，从新的一行开始追加
+            if output.tell() > 0 and not _ends_with_newline(self.output_path):
+                output.write("\n")
+            # 同时进行的对话数受对象池大小限制，其余任务在等待 Agent 对时只占用少量内存
+            tasks = [asyncio.create_task(self._ask(item, pool)) for item in pending]
+            try:
+                for future in asyncio.as_completed(tasks):
+                    record = await future
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    self.progress.add(record)
+            finally:
+                # 被中断时取消未完成的问题（不写结果，下次运行时重新回答）
+                for task in tasks:
+                    task.cancel()
+                if reporter is not None:
+                    reporter.cancel()
+
+        logger.info(self.progress.line())
+        return self.progress.snapshot()
+
+
+def _create_agent_pair(work_dir: str = "workspace") -> tuple:
+    """默认的 agent_factory：共享 config 中的 LLM 配置，关闭 OpenAI 客户端自带的重试"""
+    from config import get_llm_config
+    from agents.agent_factory import create_assistant, create_user_proxy
+
+    llm_config = get_llm_config()
+    llm_config["config_list"] = [{**entry, "max_retries": 0} for entry in llm_config["config_list"]]
+    return create_assistant(llm_config), create_user_proxy(work_dir)
+
+
+async def run_batch_qa(input_path: str, output_path: str, **options) -> Dict:
+    """
+    读取问题文件并批量回答
+
+    把事件循环默认线程池的线程数调整为并发数 + 4，使每个对话的 LLM 请求都有线程可用。
+
+    Args:
+        input_path: 问题文件（JSONL）
+        output_path: 输出文件（JSONL，断点续跑）
+        **options: 传给 BatchQARunner 的其他参数
+
+    Returns:
+        Dict: 统计数据（见 BatchQARunner.run()）
+    """
+    runner = BatchQARunner(output_path, **options)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=runner.concurrency + 4, thread_name_prefix="batch-qa"))
+    return await runner.run(load_questions(input_path))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="批量回答 JSONL 文件中的问题（RAG + Assistant）")
+    parser.add_argument("input", help="问题文件，每行 {\"id\": ..., \"question\": ...}")
+    parser.add_argument("output", help="输出文件（JSONL），再次运行时跳过已成功的问题")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="同时进行的对话数")
+    parser.add_argument("--rate", type=float, default=BATCH_RATE_LIMIT, help="LLM 请求速率上限（次/秒），0 表示不限流")
+    parser.add_argument("--burst", type=float, default=BATCH_RATE_BURST, help="允许的突发请求数")
+    parser.add_argument("--max-retries", type=int, default=BATCH_MAX_RETRIES, help="单个 LLM 请求的最大重试次数")
+    parser.add_argument("--timeout", type=float, default=BATCH_QUESTION_TIMEOUT, help="单个问题的超时时间（秒）")
+    parser.add_argument("--report-interval", type=float, default=BATCH_REPORT_INTERVAL, help="进度报告间隔（秒）")
+    parser.add_argument("--knowledge-file", default="qsh_profile.txt", help="知识库文件，默认 qsh_profile.txt")
+    args = parser.parse_args()
+
+    import rag
+
+    try:
+        rag.init_rag_system(knowledge_file=args.knowledge_file)
+    except FileNotFoundError as e:
+        print(f"\n[错误] {e}")
+        return 1
+
+    stats = asyncio.run(run_batch_qa(
+        args.input, args.output, concurrency=args.concurrency, rate_limit=args.rate, burst=args.burst,
+        max_retries=args.max_retries, timeout=args.timeout, report_interval=args.report_interval,
+    ))
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
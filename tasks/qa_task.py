@@ -5,6 +5,28 @@
 """
 
 
+def build_qa_message(question: str) -> str:
+    """
+    生成问答任务发给 Assistant 的消息（要求先检索知识库再回答）
+
+    Args:
+        question: 要回答的问题
+
+    Returns:
+        str: 任务消息
+    """
+    return f"""
+请回答以下问题：
+
+{question}
+
+注意：你需要调用 query_knowledge_base 工具来获取相关信息，然后基于检索到的内容回答。
+不要编造信息，只使用从知识库中检索到的内容。
+
+回答完成后请回复 TERMINATE。
+"""
+
+
 async def run_qa_task(assistant, user_proxy):
     """
     执行RAG知识库问答任务（异步版本）
@@ -25,16 +47,7 @@ async def run_qa_task(assistant, user_proxy):
     print("=" * 60 + "\n")
 
     # 定义问答任务
-    qa_message = """
-请回答以下问题：
-
-QSH 的电脑配置怎么样？他喜欢什么运动？
-
-注意：你需要调用 query_knowledge_base 工具来获取相关信息，然后基于检索到的内容回答。
-不要编造信息，只使用从知识库中检索到的内容。
-
-回答完成后请回复 TERMINATE。
-"""
+    qa_message = build_qa_message("QSH 的电脑配置怎么样？他喜欢什么运动？")
 
     # 发起对话（异步调用）
     await user_proxy.a_initiate_chat(
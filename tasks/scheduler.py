@@ -0,0 +1,221 @@
+"""
+任务调度模块 (Task Scheduler Module)
+
+并发执行相互独立的任务（如斐波那契任务和问答任务），总耗时接近最慢的任务而不是所有任务耗时之和。
+
+- 隔离：每个任务使用 agent_factory（默认 create_agents）创建的独立 Agent 对，对话历史互不影响；
+  任务在独立的线程和事件循环中运行，因为 autogen 在异步对话中同步执行代码块，
+  放在同一个事件循环中会阻塞其他任务
+- 并发上限：同时运行的任务数不超过 max_concurrency（见 config.TASK_CONCURRENCY）
+- 超时：每个任务可以单独设置超时时间（默认 config.TASK_TIMEOUT），超时的任务被取消
+- 依赖：depends_on 中的任务全部成功后才开始；依赖未成功的任务直接跳过
+
+并发运行时各任务的对话输出会交错打印，结束后由 summary() 汇总每个任务的状态和耗时。
+"""
+
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional, Sequence
+from config import TASK_CONCURRENCY, TASK_TIMEOUT
+from utils.telemetry import get_logger, span, count
+
+logger = get_logger("Task")
+
+# 任务状态
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+STATUS_TIMEOUT = "timeout"
+STATUS_SKIPPED = "skipped"
+
+
+class TaskResult:
+    """
+    单个任务的执行结果
+
+    Attributes:
+        name: 任务名称
+        status: ok / error / timeout / skipped
+        seconds: 耗时（秒，含创建 Agent），跳过的任务为 0
+        error: 失败原因，成功时为 None
+    """
+
+    def __init__(self, name: str, status: str, seconds: float = 0.0, error: Optional[str] = None):
+        self.name = name
+        self.status = status
+        self.seconds = seconds
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+    def __repr__(self):
+        return f"TaskResult({self.name!r}, {self.status!r}, seconds={self.seconds:.2f})"
+
+
+class _Task:
+    """已注册的任务"""
+
+    def __init__(self, name: str, func: Callable, depends_on: Sequence[str], timeout: Optional[float], kwargs: Dict):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.timeout = timeout
+        self.kwargs = kwargs
+
+
+class TaskScheduler:
+    """
+    并发任务调度器
+
+    用法：
+        scheduler = TaskScheduler(setup=tools.register_knowledge_base_tool)
+        scheduler.add_task("fibonacci", tasks.run_fibonacci_task, output_dir="workspace")
+        scheduler.add_task("qa", tasks.run_qa_task)
+        results = await scheduler.run()
+        print(scheduler.summary())
+    """
+
+    def __init__(self, agent_factory: Callable = None, setup: Callable = None,
+                 max_concurrency: int = TASK_CONCURRENCY, default_timeout: float = TASK_TIMEOUT):
+        """
+        Args:
+            agent_factory: 无参数的函数，返回 (assistant, user_proxy)，每个任务调用一次；默认为 create_agents
+            setup: 每个 Agent 对创建后调用 setup(assistant, user_proxy)，如注册工具函数
+            max_concurrency: 同时运行的任务数上限
+            default_timeout: 任务的默认超时时间（秒），0 或 None 表示不限制
+        """
+        if agent_factory is None:
+            from agents import create_agents
+            agent_factory = create_agents
+        self.agent_factory = agent_factory
+        self.setup = setup
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        self._tasks: Dict[str, _Task] = {}
+        self.results: Dict[str, TaskResult] = {}
+        self.wall_seconds = 0.0
+
+    def add_task(self, name: str, func: Callable, depends_on: Sequence[str] = (),
+                 timeout: float = None, **kwargs):
+        """
+        注册任务
+
+        Args:
+            name: 任务名称（唯一）
+            func: 异步任务函数，以 await func(assistant, user_proxy, **kwargs) 的方式调用
+            depends_on: 依赖的任务名称，这些任务全部成功后才开始
+            timeout: 超时时间（秒），None 表示使用 default_timeout，0 表示不限制
+            **kwargs: 传给任务函数的其他参数
+
+        Raises:
+            ValueError: 任务名称重复
+        """
+        if name in self._tasks:
+            raise ValueError(f"任务名称重复: {name}")
+        self._tasks[name] = _Task(name, func, depends_on,
+                                  self.default_timeout if timeout is None else timeout, kwargs)
+
+    def _validate(self):
+        """检查依赖的任务都已注册且没有循环依赖"""
+        for task in self._tasks.values():
+            unknown = [d for d in task.depends_on if d not in self._tasks]
+            if unknown:
+                raise ValueError(f"任务 {task.name} 依赖未注册的任务: {', '.join(unknown)}")
+
+        # 深度优先搜索：visiting 中的任务再次出现即为循环
+        visiting, done = set(), set()
+
+        def visit(name: str, path: List[str]):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"任务存在循环依赖: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self._tasks[name].depends_on:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self._tasks:
+            visit(name, [])
+
+    def _execute(self, task: _Task) -> TaskResult:
+        """在当前线程中创建 Agent 对，并在新的事件循环中运行任务"""
+        start = time.perf_counter()
+        try:
+            with span("task", task=task.name):
+                assistant, user_proxy = self.agent_factory()
+                if self.setup is not None:
+                    self.setup(assistant, user_proxy)
+                coroutine = task.func(assistant, user_proxy, **task.kwargs)
+                # 超时后在任务自己的事件循环中取消；正在同步执行的代码块要等它返回后才能取消
+                asyncio.run(asyncio.wait_for(coroutine, task.timeout or None))
+            result = TaskResult(task.name, STATUS_OK, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            result = TaskResult(task.name, STATUS_TIMEOUT, time.perf_counter() - start,
+                                f"超过 {task.timeout:g}s 未完成")
+        except Exception as e:
+            result = TaskResult(task.name, STATUS_ERROR, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+
+        count("tasks_total", task=task.name, status=result.status)
+        if result.ok:
+            logger.info(f"任务 {task.name} 完成", seconds=round(result.seconds, 3))
+        else:
+            logger.error(f"任务 {task.name} 未完成: {result.error}", status=result.status)
+        return result
+
+    async def run(self) -> Dict[str, TaskResult]:
+        """
+        运行所有已注册的任务，依赖满足的任务并发执行
+
+        单个任务失败或超时不会中断其他任务，只会跳过依赖它的任务。
+
+        Returns:
+            Dict[str, TaskResult]: 任务名称 -> 执行结果（按注册顺序）
+
+        Raises:
+            ValueError: 依赖未注册的任务或存在循环依赖（此时不会运行任何任务）
+        """
+        self._validate()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        futures: Dict[str, asyncio.Task] = {}
+
+        async def run_task(task: _Task) -> TaskResult:
+            dependencies = await asyncio.gather(*(futures[d] for d in task.depends_on))
+            failed = [r.name for r in dependencies if not r.ok]
+            if failed:
+                result = TaskResult(task.name, STATUS_SKIPPED, error=f"依赖的任务未成功: {', '.join(failed)}")
+                count("tasks_total", task=task.name, status=result.status)
+                logger.warning(f"跳过任务 {task.name}: {result.error}")
+                return result
+            async with semaphore:
+                return await asyncio.to_thread(self._execute, task)
+
+        start = time.perf_counter()
+        # 所有任务先创建再开始运行，run_task 中查找依赖时 futures 已经完整
+        for task in self._tasks.values():
+            futures[task.name] = asyncio.create_task(run_task(task))
+        await asyncio.gather(*futures.values())
+        self.wall_seconds = time.perf_counter() - start
+        self.results = {name: future.result() for name, future in futures.items()}
+        return self.results
+
+    def summary(self) -> str:
+        """
+        执行结果汇总：每个任务的状态和耗时，以及总耗时与任务耗时之和的对比
+
+        Returns:
+            str: 多行文本
+        """
+        # 中文字符显示宽度为 2，表头按显示宽度对齐
+        lines = [f"{'任务':<16}{'状态':<10}{'耗时':>7}"]
+        for result in self.results.values():
+            line = f"{result.name:<18}{result.status:<12}{result.seconds:>8.2f}s"
+            if result.error:
+                line += f"  {result.error}"
+            lines.append(line)
+        total = sum(r.seconds for r in self.results.values())
+        lines.append(f"总耗时 {self.wall_seconds:.2f}s，任务耗时之和 {total:.2f}s"
+                     f"（并发节省 {max(0.0, total - self.wall_seconds):.2f}s，并发上限 {self.max_concurrency}）")
+        return "\n".join(lines)
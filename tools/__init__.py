@@ -2,11 +2,22 @@
 Tools模块 (Tools Module)
 
 提供Agent可调用的工具函数
+
+子模块按需导入：import tools 不会立即加载 RAG 系统
 """
 
-from .knowledge_base import query_knowledge_base, register_knowledge_base_tool
+from utils.lazy_import import lazy_module_getattr
+
+# 公开名称 -> 所在子模块（第一次访问时才导入，避免导入包时加载 RAG 系统及其依赖）
+_LAZY_ATTRS = {
+    'query_knowledge_base': '.knowledge_base',
+    'query_knowledge_base_multi': '.knowledge_base',
+    'a_query_knowledge_base': '.knowledge_base',
+    'a_query_knowledge_base_multi': '.knowledge_base',
+    'lookup_field': '.knowledge_base',
+    'register_knowledge_base_tool': '.knowledge_base',
+}
+
+__all__ = list(_LAZY_ATTRS)
 
-__all__ = [
-    'query_knowledge_base',
-    'register_knowledge_base_tool'
-]
+__getattr__, __dir__ = lazy_module_getattr(__name__, _LAZY_ATTRS)
@@ -2,12 +2,74 @@
 知识库查询工具 (Knowledge Base Query Tool)
 
 提供Agent可调用的知识库检索功能
+
+同步版本（query_knowledge_base）直接在调用线程中检索；
+异步版本（a_query_knowledge_base）在 RAG 系统的专用线程池中检索，
+不阻塞 asyncio 事件循环，多个并发对话可以同时进行。
+字段查询（lookup_field）直接查字段索引，用于年龄、生日等 "字段：值" 形式的事实。
 """
 
-from typing import Annotated
+import asyncio
+import functools
+from typing import Annotated, List
+from config import QUERY_TIMEOUT
 from rag import get_rag_instance
+from rag.context import pack_context
+from utils.telemetry import get_logger, traced
+
+logger = get_logger("Tools")
+
+# 工具调用的遥测：耗时 span（tool_call）、调用次数（tool_calls_total）和返回文本长度（tool_result_chars）
+_traced_tool = functools.partial(traced, "tool_call", counter="tool_calls_total", size_metric="tool_result_chars")
 
 
+def _format_context(context: str) -> str:
+    """将单个问题的检索结果整理为工具返回文本"""
+    if not context:
+        return "未在知识库中找到相关信息"
+    return f"从知识库中检索到以下信息：\n{context}"
+
+
+def _format_multi(questions: List[str], results: List[List[str]], max_tokens: int = None) -> str:
+    """
+    将多个子问题的检索结果按子问题分组、跨子问题去重后整理为工具返回文本
+
+    每条知识只出现在一个子问题下。各子问题轮流装入第 1、2、3... 条结果，
+    使每个子问题都能分到 token 预算，预算不足时排在后面的结果被截断或丢弃。
+    """
+    order = []
+    owners = {}
+    for rank in range(max((len(documents) for documents in results), default=0)):
+        for i, documents in enumerate(results):
+            if rank < len(documents) and documents[rank] not in owners:
+                owners[documents[rank]] = i
+                order.append((i, documents[rank]))
+
+    kept = {}
+    included = set()
+    for (i, original), doc in zip(order, pack_context([doc for _, doc in order], max_tokens)):
+        kept.setdefault(i, []).append(doc)
+        included.add(original)
+
+    if not kept:
+        return "未在知识库中找到相关信息"
+
+    sections = []
+    for i, (question, documents) in enumerate(zip(questions, results)):
+        if i in kept:
+            body = "\n".join(kept[i])
+        elif documents and all(doc in included for doc in documents):
+            body = "（相关信息已在其他子问题中给出）"
+        elif documents:
+            body = "（相关信息因篇幅限制省略）"
+        else:
+            body = "未在知识库中找到相关信息"
+        sections.append(f"【{question}】\n{body}")
+
+    return "从知识库中检索到以下信息：\n" + "\n\n".join(sections)
+
+
+@_traced_tool(tool="query_knowledge_base")
 def query_knowledge_base(question: Annotated[str, "要查询的问题"]) -> str:
     """
     查询知识库工具函数
@@ -24,36 +86,167 @@ def query_knowledge_base(question: Annotated[str, "要查询的问题"]) -> str:
         # 获取 RAG 系统实例
         rag_system = get_rag_instance()
 
-        # 调用 RAG 系统进行检索
-        context = rag_system.query(question, n_results=5)
+        # 调用 RAG 系统进行检索（段落分段后每条结果包含更多上下文，3 条即可）
+        context = rag_system.query(question, n_results=3)
+
+        return _format_context(context)
+
+    except RuntimeError as e:
+        return f"错误：{str(e)}"
+    except Exception as e:
+        return f"查询知识库时发生错误：{str(e)}"
+
+
+@_traced_tool(tool="query_knowledge_base_multi")
+def query_knowledge_base_multi(questions: Annotated[List[str], "要查询的子问题列表"]) -> str:
+    """
+    批量查询知识库工具函数
+
+    复合问题（如"电脑配置怎么样？他喜欢什么运动？"）拆分为多个子问题后一次性检索，
+    只需一次工具调用、一次向量化和一次数据库查询。
+    每条知识只在第一个检索到它的子问题下出现，避免重复的上下文。
+
+    Args:
+        questions: 子问题列表
+
+    Returns:
+        按子问题分组的检索结果
+    """
+    try:
+        rag_system = get_rag_instance()
+        results = rag_system.query_many(questions, n_results=3)
+
+        return _format_multi(questions, results, rag_system.context_tokens)
+
+    except RuntimeError as e:
+        return f"错误：{str(e)}"
+    except Exception as e:
+        return f"查询知识库时发生错误：{str(e)}"
+
+
+@_traced_tool(tool="query_knowledge_base")
+async def a_query_knowledge_base(question: Annotated[str, "要查询的问题"]) -> str:
+    """
+    查询知识库工具函数（异步版本）
+
+    检索在 RAG 系统的专用线程池中执行，等待期间事件循环可以继续处理其他对话。
+    超过 config.QUERY_TIMEOUT 秒未完成时返回超时提示。
+
+    Args:
+        question: 用户提出的问题
+
+    Returns:
+        从知识库中检索到的相关信息
+    """
+    try:
+        rag_system = get_rag_instance()
+        context = await rag_system.aquery(question, n_results=3, timeout=QUERY_TIMEOUT)
+        return _format_context(context)
+
+    except asyncio.TimeoutError:
+        return f"查询知识库超时（超过 {QUERY_TIMEOUT:g} 秒），请稍后重试"
+    except RuntimeError as e:
+        return f"错误：{str(e)}"
+    except Exception as e:
+        return f"查询知识库时发生错误：{str(e)}"
+
 
-        if not context:
-            return "未在知识库中找到相关信息"
+@_traced_tool(tool="query_knowledge_base_multi")
+async def a_query_knowledge_base_multi(questions: Annotated[List[str], "要查询的子问题列表"]) -> str:
+    """
+    批量查询知识库工具函数（异步版本）
 
-        return f"从知识库中检索到以下信息：\n{context}"
+    与 query_knowledge_base_multi 相同，检索在 RAG 系统的专用线程池中执行。
+
+    Args:
+        questions: 子问题列表
 
+    Returns:
+        按子问题分组的检索结果
+    """
+    try:
+        rag_system = get_rag_instance()
+        results = await rag_system.aquery_many(questions, n_results=3, timeout=QUERY_TIMEOUT)
+        return _format_multi(questions, results, rag_system.context_tokens)
+
+    except asyncio.TimeoutError:
+        return f"查询知识库超时（超过 {QUERY_TIMEOUT:g} 秒），请稍后重试"
     except RuntimeError as e:
         return f"错误：{str(e)}"
     except Exception as e:
         return f"查询知识库时发生错误：{str(e)}"
 
 
-def register_knowledge_base_tool(assistant, user_proxy):
+@_traced_tool(tool="lookup_field")
+def lookup_field(field: Annotated[str, "要查询的字段名，如 年龄、生日、鞋码、设备"]) -> str:
+    """
+    字段查询工具函数
+
+    在知识库的字段索引（"字段：值" 行）中直接查找，不经过向量检索，
+    支持同义词（如 电脑 / 配置 -> 设备）。未找到时提示改用 query_knowledge_base。
+
+    Args:
+        field: 字段名或同义词
+
+    Returns:
+        匹配的 "字段：值" 行
+    """
+    try:
+        rag_system = get_rag_instance()
+        entries = rag_system.lookup_field(field)
+
+        if not entries:
+            return f"知识库中没有名为 {field} 的字段，请改用 query_knowledge_base 检索"
+
+        return "\n".join(dict.fromkeys(f"{entry.key}：{entry.value}" for entry in entries))
+
+    except RuntimeError as e:
+        return f"错误：{str(e)}"
+    except Exception as e:
+        return f"查询字段时发生错误：{str(e)}"
+
+
+def register_knowledge_base_tool(assistant, user_proxy, use_async: bool = True):
     """
     将知识库查询工具注册到Agent
 
     Args:
         assistant: AssistantAgent 实例
         user_proxy: UserProxyAgent 实例
+        use_async: 是否注册异步版本的工具函数（用于 a_initiate_chat 等异步对话），默认 True
     """
+    single = a_query_knowledge_base if use_async else query_knowledge_base
+    multi = a_query_knowledge_base_multi if use_async else query_knowledge_base_multi
+
     # 注册工具函数：让 Assistant 可以调用 RAG 查询
     assistant.register_for_llm(
         name="query_knowledge_base",
         description="查询知识库以获取关于 QSH 的个人信息，包括电脑配置、爱好、特长等"
-    )(query_knowledge_base)
+    )(single)
 
     user_proxy.register_for_execution(
         name="query_knowledge_base"
-    )(query_knowledge_base)
+    )(single)
+
+    # 注册批量查询工具：复合问题拆成子问题后一次调用完成检索
+    assistant.register_for_llm(
+        name="query_knowledge_base_multi",
+        description="一次查询多个子问题（如复合问题拆分后的各个部分），按子问题返回去重后的知识库信息"
+    )(multi)
+
+    user_proxy.register_for_execution(
+        name="query_knowledge_base_multi"
+    )(multi)
+
+    # 注册字段查询工具：字典查找，同步执行即可
+    assistant.register_for_llm(
+        name="lookup_field",
+        description="直接查询 QSH 的单个属性字段（如 年龄、生日、鞋码、设备、爱好），比检索更快更准确"
+    )(lookup_field)
+
+    user_proxy.register_for_execution(
+        name="lookup_field"
+    )(lookup_field)
 
-    print("[Tools] 已注册工具函数: query_knowledge_base")
+    mode = "异步" if use_async else "同步"
+    logger.info(f"已注册工具函数（{mode}）: query_knowledge_base, query_knowledge_base_multi, lookup_field")
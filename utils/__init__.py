@@ -1,15 +1,35 @@
 """
 Utils模块 (Utils Module)
 
-提供通用工具函数
+提供通用工具函数：格式化输出（logger）、结构化日志与计时/指标（telemetry）、
+LLM 响应缓存（llm_cache）、限流与退避（rate_limit）、
+包的按需导入（lazy_import）
 """
 
 from .logger import print_header, print_section, print_success, print_warning, print_error
+from .telemetry import get_logger, configure, span, traced, traced_iter, count, observe, dump_metrics, metrics_snapshot
+from .llm_cache import LLMResponseCache, LLMCacheMissError
+from .rate_limit import TokenBucket, backoff_delay
+from .lazy_import import lazy_module_getattr
 
 __all__ = [
     'print_header',
     'print_section',
     'print_success',
     'print_warning',
-    'print_error'
+    'print_error',
+    'get_logger',
+    'configure',
+    'span',
+    'traced',
+    'traced_iter',
+    'count',
+    'observe',
+    'dump_metrics',
+    'metrics_snapshot',
+    'LLMResponseCache',
+    'LLMCacheMissError',
+    'TokenBucket',
+    'backoff_delay',
+    'lazy_module_getattr'
 ]
@@ -0,0 +1,60 @@
+"""
+共享 HTTP 客户端模块 (Shared HTTP Client Module)
+
+所有 Agent 的 OpenAI 客户端共用一个带连接池的 httpx.Client（通过 config_list 中的 http_client 传入）：
+1. 连接池与 keep-alive：同一个主机的连接在请求之间复用，不再为每个请求重新建立 TCP / TLS 连接
+2. 连接数上限：max_connections 限制同时打开的连接数，连接池满时请求最多等待 pool 超时
+3. 分阶段超时：connect / read / write / pool 分别设置
+4. 可选 HTTP/2（需要安装 h2，未安装时回退到 HTTP/1.1 并输出警告）
+
+注意：本模块在导入时加载 httpx（约 100 ms），只在创建 Agent 时由 config.get_http_client() 按需导入。
+"""
+
+import importlib.util
+import httpx
+from .telemetry import get_logger
+
+logger = get_logger("LLM")
+
+
+class SharedHTTPClient(httpx.Client):
+    """
+    可在多个 Agent 之间共享的 httpx.Client
+
+    ConversableAgent 会深拷贝 llm_config，__deepcopy__ 返回自身，保证所有 Agent 使用同一个连接池
+    （httpx.Client 是线程安全的）。
+    """
+
+    def __deepcopy__(self, memo) -> "SharedHTTPClient":
+        return self
+
+
+def create_http_client(max_connections: int = 20, max_keepalive: int = 10, keepalive_expiry: float = 30.0,
+                       connect_timeout: float = 10.0, read_timeout: float = 120.0, write_timeout: float = 30.0,
+                       pool_timeout: float = 30.0, http2: bool = False) -> SharedHTTPClient:
+    """
+    创建带连接池的共享 HTTP 客户端
+
+    Args:
+        max_connections: 同时打开的最大连接数
+        max_keepalive: 空闲时保留的最大 keep-alive 连接数
+        keepalive_expiry: 空闲 keep-alive 连接的保留时间（秒）
+        connect_timeout: 建立连接（含 TLS 握手）的超时时间（秒）
+        read_timeout: 等待响应数据的超时时间（秒），LLM 生成较慢，需要较长
+        write_timeout: 发送请求体的超时时间（秒）
+        pool_timeout: 连接池已满时等待空闲连接的超时时间（秒）
+        http2: 是否启用 HTTP/2（需要安装 h2）
+
+    Returns:
+        SharedHTTPClient: 共享 HTTP 客户端
+    """
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("LLM_HTTP2 已启用但未安装 h2（pip install h2），回退到 HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                          keepalive_expiry=keepalive_expiry)
+    timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=write_timeout, pool=pool_timeout)
+    logger.debug("创建共享 HTTP 客户端", max_connections=max_connections, max_keepalive=max_keepalive,
+                 http2=http2, connect_timeout=connect_timeout, read_timeout=read_timeout)
+    return SharedHTTPClient(limits=limits, timeout=timeout, http2=http2)
@@ -0,0 +1,42 @@
+"""
+按需导入模块 (Lazy Import Module)
+
+包的 __init__ 用 lazy_module_getattr 声明公开名称所在的子模块，第一次访问时才导入（PEP 562），
+导入包本身不会加载 autogen、chromadb、torch 等重量级依赖。
+
+用法（在包的 __init__.py 中）：
+    _LAZY_ATTRS = {'create_agents': '.agent_factory'}
+    __all__ = list(_LAZY_ATTRS)
+    __getattr__, __dir__ = lazy_module_getattr(__name__, _LAZY_ATTRS)
+"""
+
+import sys
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_module_getattr(module_name: str, lazy_attrs: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    生成按需导入公开名称的模块级 __getattr__ 和 __dir__
+
+    Args:
+        module_name: 包名（传入包的 __name__，相对子模块名以它为基准解析）
+        lazy_attrs: 公开名称 -> 所在子模块（如 '.agent_factory'）
+
+    Returns:
+        Tuple[Callable, Callable]: (__getattr__, __dir__)
+    """
+
+    def __getattr__(name: str):
+        """按需导入子模块中的公开名称，导入后缓存到包的命名空间中"""
+        submodule = lazy_attrs.get(name)
+        if submodule is None:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(submodule, module_name), name)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[module_name])) | set(lazy_attrs))
+
+    return __getattr__, __dir__
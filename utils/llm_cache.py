@@ -0,0 +1,242 @@
+"""
+LLM 响应缓存模块 (LLM Response Cache Module)
+
+基于 SQLite 的 LLM 响应缓存，实现 autogen 的 AbstractCache 接口（get / set / close / 上下文管理），
+通过 llm_config["cache"] 交给 OpenAIWrapper 使用（见 config/llm_config.py 的 get_llm_config）。
+
+缓存键：autogen 传入的请求参数（消息列表、tools 定义、模型、temperature 等采样参数，
+不含 api_key / base_url）的规范化 JSON 的 SHA-256，相同请求总是命中同一条记录。
+
+模式：
+- readwrite: 命中时直接返回缓存的响应，未命中时请求 API 并写入缓存
+- record: 总是请求 API，并用新的响应覆盖缓存（刷新录制的响应）
+- replay: 只从缓存读取，忽略过期时间；未命中时抛出 LLMCacheMissError，不会访问网络（用于 CI）
+
+程序默认不使用该缓存（config.LLM_CACHE_MODE 默认为 off），此时仍由 autogen 默认的 cache_seed
+磁盘缓存去重相同的请求；需要 TTL、大小上限或确定性结果（复现、CI）时通过 LLM_CACHE_MODE 开启。
+
+淘汰策略：
+- ttl: 写入后超过 ttl 秒的记录视为未命中并删除（0 表示永不过期）
+- max_bytes: 缓存总大小超过上限时，按最近访问时间从旧到新删除，直到降到上限的 90%
+"""
+
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Optional
+from .telemetry import get_logger, count
+
+logger = get_logger("LLM")
+
+# 缓存模式
+CACHE_MODES = ("off", "readwrite", "record", "replay")
+
+# 缓存格式版本（写入值的格式不兼容地变化时递增，旧记录自动失效）
+CACHE_FORMAT_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+)
+"""
+
+
+class LLMCacheMissError(RuntimeError):
+    """replay 模式下请求不在缓存中"""
+
+
+def request_summary(key: str, limit: int = 60) -> str:
+    """
+    从 autogen 的缓存键（请求参数的 JSON）中提取模型和最后一条消息，用于日志和错误信息
+
+    Args:
+        key: autogen 传入的缓存键
+        limit: 消息内容的最大字符数
+
+    Returns:
+        str: 形如 "deepseek-chat: 最后一条消息..." 的摘要
+    """
+    try:
+        params = json.loads(key)
+        messages = params.get("messages") or [{}]
+        content = str(messages[-1].get("content") or "")
+        content = content if len(content) <= limit else content[:limit] + "..."
+        return f"{params.get('model')}: {content!r}"
+    except (ValueError, AttributeError, TypeError):
+        return key[:limit]
+
+
+class LLMResponseCache:
+    """
+    基于 SQLite 的 LLM 响应缓存（实现 autogen.cache.AbstractCache 接口）
+
+    同一实例可在多个 Agent、多个线程之间共享；close() 只关闭连接，下次访问时自动重新打开，
+    因此可以交给 autogen 在每次请求时用 with 语句打开和关闭。
+    """
+
+    def __init__(self, path: str = "./llm_cache.sqlite", mode: str = "readwrite", ttl: float = 0,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        初始化响应缓存
+
+        Args:
+            path: SQLite 数据库文件路径
+            mode: 缓存模式（readwrite / record / replay）
+            ttl: 记录的有效期（秒），0 表示永不过期；replay 模式下忽略
+            max_bytes: 缓存总大小上限（字节），0 表示不限制
+
+        Raises:
+            ValueError: 不支持的缓存模式
+        """
+        if mode not in CACHE_MODES or mode == "off":
+            raise ValueError(f"不支持的 LLM 缓存模式: {mode}（可选: readwrite / record / replay）")
+        self.path = path
+        self.mode = mode
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """返回数据库连接（首次访问或 close() 之后重新打开）"""
+        if self._conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # 多个线程共享同一连接（由 self._lock 串行化），多个进程通过 WAL 和 busy timeout 并发访问
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        """缓存键的 SHA-256（包含格式版本）"""
+        return hashlib.sha256(f"v{CACHE_FORMAT_VERSION}:{key}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str, default: Optional[Any] = None) -> Optional[Any]:
+        """
+        读取缓存的响应
+
+        Args:
+            key: autogen 传入的缓存键（请求参数的 JSON）
+            default: 未命中时的返回值
+
+        Returns:
+            缓存的响应，未命中（或 record 模式）时返回 default
+
+        Raises:
+            LLMCacheMissError: replay 模式下请求不在缓存中
+        """
+        if self.mode == "record":
+            return default
+
+        digest = self._hash(key)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (digest,)).fetchone()
+            if row is not None and self.mode != "replay" and self.ttl > 0 and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (digest,))
+                count("llm_cache_total", result="expired")
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, digest))
+
+        if row is None:
+            count("llm_cache_total", result="miss")
+            if self.mode == "replay":
+                raise LLMCacheMissError(f"LLM 响应缓存中没有该请求（replay 模式不会访问网络）: "
+                                        f"{request_summary(key)}，请先以 record 模式运行录制响应")
+            logger.debug("LLM 缓存未命中", request=request_summary(key))
+            return default
+
+        count("llm_cache_total", result="hit")
+        logger.debug("LLM 缓存命中", request=request_summary(key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        写入响应（已存在时覆盖），超过大小上限时淘汰最久未访问的记录
+
+        Args:
+            key: autogen 传入的缓存键
+            value: 响应对象（需可 pickle）
+        """
+        if self.mode == "replay":
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            model = json.loads(key).get("model")
+        except (ValueError, AttributeError):
+            model = None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT OR REPLACE INTO responses (key, model, value, size, created_at, accessed_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (self._hash(key), model, blob, len(blob), now, now))
+            count("llm_cache_total", result="store")
+            if self.max_bytes > 0:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """总大小超过上限时，按最近访问时间从旧到新删除记录，直到降到上限的 90%"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        evicted = []
+        for digest, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= target:
+                break
+            evicted.append((digest,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        count("llm_cache_total", len(evicted), result="evict")
+        logger.debug("LLM 缓存淘汰", evicted=len(evicted), remaining_bytes=total)
+
+    def stats(self) -> dict:
+        """
+        缓存统计
+
+        Returns:
+            dict: {"entries": 记录数, "bytes": 总大小, "mode": 缓存模式, "path": 数据库路径}
+        """
+        with self._lock:
+            entries, total = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": total, "mode": self.mode, "path": self.path}
+
+    def clear(self):
+        """删除所有缓存的响应"""
+        with self._lock:
+            self._connection().execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """关闭数据库连接（下次访问时自动重新打开）"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self) -> "LLMResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __deepcopy__(self, memo) -> "LLMResponseCache":
+        # ConversableAgent 会深拷贝 llm_config；所有副本共享同一个缓存实例
+        return self
+
+    def __repr__(self) -> str:
+        return f"LLMResponseCache(path={self.path!r}, mode={self.mode!r}, ttl={self.ttl}, max_bytes={self.max_bytes})"
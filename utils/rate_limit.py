@@ -0,0 +1,85 @@
+"""
+限流与退避模块 (Rate Limiting & Backoff Module)
+
+- TokenBucket: 令牌桶限流器（线程安全），限制对 LLM 接口的请求速率，允许短时间内的突发
+- backoff_delay: 指数退避的等待时间（带随机抖动，避免大量请求同时重试）
+"""
+
+import time
+import random
+import threading
+
+
+class TokenBucket:
+    """
+    令牌桶限流器
+
+    令牌以 rate 个/秒的速度补充，最多积累 capacity 个；每次请求消耗一个令牌。
+    令牌不足时按预约的方式排队：先到的调用先拿到令牌，等待时间按欠缺的令牌数计算，
+    acquire() 在调用线程中等待（LLM 请求在线程池中发出，不会阻塞事件循环）。
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        """
+        Args:
+            rate: 每秒补充的令牌数，0 或负数表示不限流
+            capacity: 桶容量（允许的突发请求数），默认为 max(1, rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预约令牌（不等待）
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            float: 需要等待的秒数，0 表示令牌充足
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 令牌数可以为负：欠缺的令牌由之后补充的令牌偿还，后来的调用排在后面
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens / self.rate)
+            self.waited += wait
+            return wait
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        获取令牌，令牌不足时在当前线程中等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 30.0) -> float:
+    """
+    指数退避的等待时间（full jitter：在 [0, base_delay * 2^attempt] 中随机取值，不超过 max_delay）
+
+    Args:
+        attempt: 已失败的次数减一（第一次重试为 0）
+        base_delay: 第一次重试的最大等待时间（秒）
+        max_delay: 等待时间上限（秒）
+
+    Returns:
+        float: 等待秒数
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
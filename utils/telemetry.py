@@ -0,0 +1,508 @@
+"""
+遥测模块 (Telemetry Module)
+
+分级的结构化日志、阶段计时（span）和指标：
+1. 日志：get_logger("RAG") 返回带标签的日志器，输出 "[RAG] 消息 key=value" 或 JSON 行，
+   级别由 config.LOG_LEVEL 控制；每次检索等热路径上的日志为 DEBUG 级别，默认不输出
+2. span：with span("encode"): ... 记录一个阶段的耗时（模型加载、分段、向量化、写入、检索、
+   工具调用、LLM 回合、代码执行），写入 span_duration_seconds 直方图；
+   DEBUG 级别时同时输出一行日志（包含父 span 路径）
+3. 指标：count() 计数器、observe() 直方图（固定分桶），运行结束时 dump_metrics()
+   写出 JSON 或 Prometheus 文本格式的指标文件
+
+遥测关闭时（默认，见 config.TELEMETRY）span() 返回共享的空对象，count() / observe() 直接返回，
+每次调用的开销只有一次函数调用和一次布尔判断。
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import inspect
+import logging
+import threading
+import functools
+import contextvars
+from typing import Dict, Optional, Sequence, Tuple
+from config import telemetry_config
+
+# 所有日志器的父日志器名称
+ROOT_LOGGER = "qsh"
+
+# 耗时直方图的默认分桶（秒）
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 文本长度 / token 数直方图的分桶
+SIZE_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+# Prometheus 指标名前缀
+METRIC_PREFIX = "qsh_"
+
+_LEVEL_LABELS = {logging.WARNING: "警告: ", logging.ERROR: "错误: ", logging.CRITICAL: "错误: "}
+
+_enabled = telemetry_config.TELEMETRY
+_current_span: contextvars.ContextVar = contextvars.ContextVar("qsh_span", default=None)
+
+
+# ============================================================================
+# 日志
+# ============================================================================
+
+class _StdoutHandler(logging.Handler):
+    """写入当前的 sys.stdout（跟随 contextlib.redirect_stdout 等重定向）"""
+
+    def emit(self, record):
+        try:
+            sys.stdout.write(self.format(record) + "\n")
+        except Exception:
+            self.handleError(record)
+
+
+class _TextFormatter(logging.Formatter):
+    """[标签] 警告: 消息 key=value"""
+
+    def format(self, record):
+        message = f"[{getattr(record, 'tag', record.name)}] {_LEVEL_LABELS.get(record.levelno, '')}{record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            message += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+class _JsonFormatter(logging.Formatter):
+    """每条日志一个 JSON 对象（附带当前 span 路径）"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": getattr(record, "tag", record.name),
+            "msg": record.getMessage(),
+        }
+        current = _current_span.get()
+        if current is not None:
+            entry["span"] = current.path
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StructuredLogger:
+    """
+    带标签的结构化日志器
+
+    关键字参数作为结构化字段输出（文本格式为 key=value，JSON 格式为同名键）；
+    级别未开启时直接返回，不做任何格式化。
+    """
+
+    def __init__(self, tag: str):
+        """
+        Args:
+            tag: 日志标签（如 RAG、Tools、Agent），文本格式中显示为 "[标签]"
+        """
+        self.tag = tag
+        self._logger = logging.getLogger(f"{ROOT_LOGGER}.{tag}")
+
+    def is_enabled_for(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level: int, message: str, fields: Dict):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, extra={"tag": self.tag, "fields": fields})
+
+    def debug(self, message: str, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message: str, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message: str, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message: str, **fields):
+        self._log(logging.ERROR, message, fields)
+
+
+_loggers: Dict[str, StructuredLogger] = {}
+
+
+def get_logger(tag: str) -> StructuredLogger:
+    """
+    获取带标签的日志器（同一标签共享一个实例）
+
+    Args:
+        tag: 日志标签
+
+    Returns:
+        StructuredLogger: 日志器
+    """
+    logger = _loggers.get(tag)
+    if logger is None:
+        logger = _loggers.setdefault(tag, StructuredLogger(tag))
+    return logger
+
+
+def configure(level: str = None, fmt: str = None, enabled: bool = None):
+    """
+    配置日志级别、日志格式和指标采集（参数为 None 时保持不变）
+
+    Args:
+        level: 日志级别（DEBUG / INFO / WARNING / ERROR）
+        fmt: 日志格式（text / json）
+        enabled: 是否采集 span 和指标
+
+    Raises:
+        ValueError: 未知的日志级别或格式
+    """
+    global _enabled
+    root = logging.getLogger(ROOT_LOGGER)
+    if level is not None:
+        if not isinstance(logging.getLevelName(level.upper()), int):
+            raise ValueError(f"未知的日志级别: {level}")
+        root.setLevel(level.upper())
+    if fmt is not None:
+        if fmt not in ("text", "json"):
+            raise ValueError(f"未知的日志格式: {fmt}（可选: text, json）")
+        handler = _StdoutHandler()
+        handler.setFormatter(_JsonFormatter() if fmt == "json" else _TextFormatter())
+        root.handlers[:] = [handler]
+        root.propagate = False
+    if enabled is not None:
+        _enabled = enabled
+
+
+def is_enabled() -> bool:
+    """是否正在采集 span 和指标"""
+    return _enabled
+
+
+# ============================================================================
+# 指标
+# ============================================================================
+
+class _Histogram:
+    """固定分桶的直方图"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "min", "max")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+
+_LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+_counters: Dict[_LabelKey, float] = {}
+_histograms: Dict[_LabelKey, _Histogram] = {}
+_metrics_lock = threading.Lock()
+
+
+def _key(name: str, labels: Dict) -> _LabelKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def count(name: str, value: float = 1, **labels):
+    """
+    计数器加 value（遥测关闭时直接返回）
+
+    Args:
+        name: 指标名称（如 tool_calls_total）
+        value: 增量
+        **labels: 标签（取值应为有限的几种，避免指标数量膨胀）
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _metrics_lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = DURATION_BUCKETS, **labels):
+    """
+    记录一次直方图观测值（遥测关闭时直接返回）
+
+    Args:
+        name: 指标名称
+        value: 观测值
+        buckets: 分桶上界（第一次记录该指标时确定）
+        **labels: 标签
+    """
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _metrics_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram(buckets)
+        histogram.observe(value)
+
+
+def reset_metrics():
+    """清空所有指标"""
+    with _metrics_lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def metrics_snapshot() -> Dict:
+    """
+    当前指标的快照
+
+    Returns:
+        Dict: {"counters": {名称: [{labels, value}]}, "histograms": {名称: [{labels, count, sum, min, max, buckets}]}}
+    """
+    snapshot = {"counters": {}, "histograms": {}}
+    with _metrics_lock:
+        for (name, labels), value in sorted(_counters.items()):
+            snapshot["counters"].setdefault(name, []).append({"labels": dict(labels), "value": value})
+        for (name, labels), histogram in sorted(_histograms.items(), key=lambda item: item[0]):
+            snapshot["histograms"].setdefault(name, []).append({
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "min": histogram.min,
+                "max": histogram.max,
+                "buckets": {str(bound): n for bound, n in zip(histogram.buckets + ("+Inf",), histogram.counts)},
+            })
+    return snapshot
+
+
+def _prometheus_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escape = lambda value: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+
+def prometheus_text() -> str:
+    """
+    当前指标的 Prometheus 文本格式
+
+    Returns:
+        str: 指标文本（计数器为 counter，直方图为 histogram，名称带 qsh_ 前缀）
+    """
+    lines = []
+    with _metrics_lock:
+        declared = set()
+        for (name, labels), value in sorted(_counters.items()):
+            if name not in declared:
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+                declared.add(name)
+            lines.append(f"{METRIC_PREFIX}{name}{_prometheus_labels(labels)} {value}")
+        for (name, labels), histogram in sorted(_histograms.items(), key=lambda item: item[0]):
+            if name not in declared:
+                lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+                declared.add(name)
+            cumulative = 0
+            for bound, n in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                cumulative += n
+                lines.append(f"{METRIC_PREFIX}{name}_bucket{_prometheus_labels(labels, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_prometheus_labels(labels)} {histogram.sum}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_prometheus_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def dump_metrics(path: str = None) -> Optional[str]:
+    """
+    将指标写入文件（遥测关闭时跳过）
+
+    Args:
+        path: 输出路径，默认读取 config.METRICS_FILE；扩展名为 .prom / .txt 时写 Prometheus 文本，否则写 JSON
+
+    Returns:
+        Optional[str]: 写入的文件路径，遥测关闭时为 None
+    """
+    if not _enabled:
+        return None
+    path = path or telemetry_config.METRICS_FILE
+    if path.endswith((".prom", ".txt")):
+        content = prometheus_text()
+    else:
+        content = json.dumps(metrics_snapshot(), ensure_ascii=False, indent=2)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+    get_logger("Telemetry").info(f"指标已写入 {path}")
+    return path
+
+
+# ============================================================================
+# span
+# ============================================================================
+
+_span_logger = get_logger("Span")
+
+
+class Span:
+    """
+    一个阶段的计时（上下文管理器）
+
+    退出时把耗时写入 span_duration_seconds{span=名称, status=ok/error, 其他标签} 直方图，
+    DEBUG 级别时输出一行日志。span 通过 contextvars 嵌套（同一线程或同一 asyncio 任务内）。
+
+    Attributes:
+        name: 阶段名称
+        labels: 标签
+        path: 从最外层 span 到当前 span 的路径（如 retrieval/encode）
+        duration: 耗时（秒），退出后有效
+    """
+
+    __slots__ = ("name", "labels", "path", "duration", "_start", "_token")
+
+    def __init__(self, name: str, labels: Dict):
+        self.name = name
+        self.labels = labels
+        self.path = name
+        self.duration = 0.0
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is not None:
+            self.path = f"{parent.path}/{self.name}"
+        self._token = _current_span.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+        observe("span_duration_seconds", self.duration, span=self.name, status=status, **self.labels)
+        _span_logger.debug(self.path, duration_ms=round(self.duration * 1000, 3), status=status, **self.labels)
+        return False
+
+
+class _NoopSpan:
+    """遥测关闭时 span() 返回的共享空对象"""
+
+    __slots__ = ()
+    name = path = ""
+    duration = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """
+    创建一个计时 span（遥测关闭时返回共享的空对象）
+
+    用法：
+        with span("encode", store="numpy"):
+            ...
+
+    Args:
+        name: 阶段名称
+        **labels: 标签（取值应为有限的几种）
+
+    Returns:
+        上下文管理器
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, labels)
+
+
+def traced_iter(iterable, name: str, **labels):
+    """
+    逐项计时的迭代器包装：每次取下一项的耗时记为一个 span（遥测关闭时原样返回）
+
+    用于读取和处理交替进行的生成器（如 读取 → 分段），无法用一个 with 块包住的场景。
+
+    Args:
+        iterable: 可迭代对象
+        name: span 名称
+        **labels: 标签
+
+    Returns:
+        可迭代对象
+    """
+    if not _enabled:
+        return iterable
+    return _traced_iter(iter(iterable), name, labels)
+
+
+def _traced_iter(iterator, name: str, labels: Dict):
+    while True:
+        with Span(name, labels):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def traced(name: str = None, counter: str = None, size_metric: str = None, **labels):
+    """
+    用 span 包装同步或异步函数的装饰器（遥测关闭时直接调用原函数）
+
+    Args:
+        name: span 名称，默认为函数名
+        counter: 调用次数计数器名称（标签中附带 status=ok/error），为 None 时不计数
+        size_metric: 返回值长度的直方图名称（返回值为字符串时记录），为 None 时不记录
+        **labels: 标签
+
+    Returns:
+        装饰器（保留原函数的签名和类型注解，可用于 autogen 工具函数）
+    """
+    def finish(status: str, result):
+        if counter:
+            count(counter, status=status, **labels)
+        if size_metric and isinstance(result, str):
+            observe(size_metric, len(result), buckets=SIZE_BUCKETS, **labels)
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                result, status = None, "error"
+                try:
+                    with Span(span_name, labels):
+                        result = await func(*args, **kwargs)
+                    status = "ok"
+                    return result
+                finally:
+                    finish(status, result)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            result, status = None, "error"
+            try:
+                with Span(span_name, labels):
+                    result = func(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                finish(status, result)
+        return wrapper
+
+    return decorator
+
+
+configure(level=telemetry_config.LOG_LEVEL, fmt=telemetry_config.LOG_FORMAT)